@@ -0,0 +1,98 @@
+"""
+Time spent reading one DescribeContainerGroups response, before and after
+reading the SDK's typed body.
+
+"Before" is the previous path: ``to_map()`` on the whole response once for
+the RequestId and again for the body, then dict lookups. "After" reads the
+typed body the SDK has already decoded (``response_field``) and builds
+``SandboxInfo`` from the typed group models, the way the clients do.
+
+Usage:
+    python benchmarks/describe_response.py [groups] [rounds]
+"""
+
+import sys
+import timeit
+from typing import Any, Dict, List
+
+from alibabacloud_eci20180808 import models as eci_models
+
+from eci_as_sandbox import SandboxInfo
+from eci_as_sandbox._common.models import extract_request_id, response_field
+
+
+def group_payload(i: int) -> Dict[str, Any]:
+    """A large ``ContainerGroups`` item: several containers, many events."""
+    return {
+        "ContainerGroupId": f"eci-{i:08d}",
+        "ContainerGroupName": f"sandbox-{i}",
+        "Status": "Running",
+        "Containers": [
+            {
+                "Name": f"container-{j}",
+                "Image": "registry.example.com/sandbox:latest",
+                "EnvironmentVars": [
+                    {"Key": f"VAR_{k}", "Value": "value"} for k in range(30)
+                ],
+                "Ports": [{"Port": 80, "Protocol": "TCP"}],
+                "VolumeMounts": [
+                    {"Name": f"volume-{k}", "MountPath": f"/mnt/{k}"} for k in range(5)
+                ],
+            }
+            for j in range(4)
+        ],
+        "Events": [
+            {"Count": 1, "Reason": "Pulled", "Message": "m" * 100} for _ in range(20)
+        ],
+        "Volumes": [
+            {"Name": f"volume-{k}", "Type": "EmptyDirVolume"} for k in range(5)
+        ],
+    }
+
+
+def response(groups: int) -> Any:
+    return eci_models.DescribeContainerGroupsResponse().from_map(
+        {
+            "headers": {},
+            "statusCode": 200,
+            "body": {
+                "RequestId": "request",
+                "TotalCount": groups,
+                "ContainerGroups": [group_payload(i) for i in range(groups)],
+            },
+        }
+    )
+
+
+def before(resp: Any) -> List[SandboxInfo]:
+    request_id = resp.to_map()["body"]["RequestId"]
+    body = resp.to_map().get("body", {})
+    assert request_id
+    return [SandboxInfo.from_group(group) for group in body["ContainerGroups"]]
+
+
+def after(resp: Any) -> List[SandboxInfo]:
+    request_id = extract_request_id(resp)
+    assert request_id
+    return [
+        SandboxInfo.from_group(group)
+        for group in response_field(resp, "container_groups", [])
+    ]
+
+
+def main(groups: int, rounds: int) -> None:
+    resp = response(groups)
+    print(f"DescribeContainerGroups response with {groups} groups")
+    for label, read in (
+        ("before: to_map() twice", before),
+        ("after: typed body", after),
+    ):
+        elapsed = timeit.timeit(lambda: read(resp), number=rounds) / rounds
+        print(f"{label:<24} {elapsed * 1e6:10.1f} us/response")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    )
@@ -0,0 +1,173 @@
+"""
+Latency of a streamed exec when ECI keeps the socket open after the exit
+frame, before and after finishing reads on that frame.
+
+A local stand-in answers ExecContainerCommand with a WebSocket URL. Its
+stream sends one line of output and the exit frame, then waits
+``close_delay`` seconds before closing, as ECI does. "Before" is the
+previous reader, which looped until the socket closed. "After" is
+``exec_command`` in both clients, which returns on the exit frame; its
+times also include the ExecContainerCommand call, which "before" skips.
+
+Usage:
+    python benchmarks/exec_exit_latency.py [runs] [close_delay]
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, List
+
+import websocket
+from websockets.sync.server import ServerConnection, serve
+
+from eci_as_sandbox import AsyncEciSandbox, Config, EciSandbox
+from eci_as_sandbox._common.models import EXEC_MODE_WEBSOCKET
+from eci_as_sandbox._common.ws import WS_MSG_EXIT, WS_MSG_STDOUT
+
+COMMAND = ["sh", "-c", "echo hi"]
+
+
+class StandIn:
+    """OpenAPI endpoint plus exec WebSocket server on localhost."""
+
+    def __init__(self, close_delay: float):
+        self.close_delay = close_delay
+        self.ws = serve(self._stream, "127.0.0.1", 0)
+        host, port = self.ws.socket.getsockname()[:2]
+        self.ws_url = f"ws://{host}:{port}"
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                # Every call is an ExecContainerCommand.
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                body = json.dumps(
+                    {
+                        "RequestId": uuid.uuid4().hex,
+                        "WebSocketUri": f"{stand_in.ws_url}/{uuid.uuid4().hex}",
+                        "HttpUrl": "",
+                    }
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.http.daemon_threads = True
+        for target in (self.http.serve_forever, self.ws.serve_forever):
+            threading.Thread(target=target, daemon=True).start()
+
+    def _stream(self, connection: ServerConnection) -> None:
+        connection.send(bytes([WS_MSG_STDOUT]) + b"hi\n")
+        connection.send(bytes([WS_MSG_EXIT]) + json.dumps({"exitCode": 0}).encode())
+        time.sleep(self.close_delay)
+        connection.close()
+
+    def client_kwargs(self) -> Any:
+        host, port = self.http.server_address[:2]
+        return dict(
+            access_key_id="id",
+            access_key_secret="secret",
+            cfg=Config(f"{host}:{port}", 10000, "cn-test"),
+            region_id="cn-test",
+        )
+
+    def point(self, client: Any) -> Any:
+        host, port = self.http.server_address[:2]
+        # The SDK derives the endpoint from the region; point it here.
+        client.client._endpoint = f"{host}:{port}"
+        client.client._protocol = "http"
+        return client
+
+    def close(self) -> None:
+        self.ws.shutdown()
+        self.http.shutdown()
+        self.http.server_close()
+
+
+def read_until_close(stand_in: StandIn) -> None:
+    """The previous reader: every frame until the socket closes."""
+    ws = websocket.create_connection(f"{stand_in.ws_url}/{uuid.uuid4().hex}")
+    try:
+        while True:
+            try:
+                if not ws.recv():
+                    break
+            except websocket.WebSocketConnectionClosedException:
+                break
+    finally:
+        ws.close()
+
+
+def report(label: str, latencies: List[float]) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{label:<28} p50 {statistics.median(latencies) * 1e3:7.1f} ms  "
+        f"p95 {p95 * 1e3:7.1f} ms"
+    )
+
+
+def timed(runs: int, call: Callable[[], Any]) -> List[float]:
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def timed_async(runs: int, client: AsyncEciSandbox) -> List[float]:
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await client.exec_command(
+            "eci-1", COMMAND, container_name="sandbox", exec_mode=EXEC_MODE_WEBSOCKET
+        )
+        latencies.append(time.perf_counter() - started)
+        assert result.exit_code == 0, result.error_message
+    await client.aclose()
+    return latencies
+
+
+def main(runs: int, close_delay: float) -> None:
+    stand_in = StandIn(close_delay)
+    client = stand_in.point(EciSandbox(**stand_in.client_kwargs()))
+
+    def sync_exec() -> None:
+        result = client.exec_command(
+            "eci-1", COMMAND, container_name="sandbox", exec_mode=EXEC_MODE_WEBSOCKET
+        )
+        assert result.exit_code == 0, result.error_message
+
+    print(f"{runs} streamed execs, socket closed {close_delay:g} s after exit")
+    report("before: read until close", timed(runs, lambda: read_until_close(stand_in)))
+    report("after: sync exec_command", timed(runs, sync_exec))
+    client.close()
+
+    async def run_async() -> List[float]:
+        client = stand_in.point(AsyncEciSandbox(**stand_in.client_kwargs()))
+        return await timed_async(runs, client)
+
+    report("after: async exec_command", asyncio.run(run_async()))
+    stand_in.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 1.0,
+    )
@@ -0,0 +1,185 @@
+"""
+Memory held by 100k ``SandboxInfo`` objects, before and after slotting.
+
+"Before" is the previous dict-backed class, which copied ``containers`` and
+kept the group dict as ``raw``. "After" is the current slotted class, built
+from dicts and from the SDK's typed models (what the clients pass). Memory
+is measured with tracemalloc after the response payloads are dropped, so it
+counts everything the info objects keep alive.
+
+Usage:
+    python benchmarks/sandbox_info_memory.py [count]
+"""
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from alibabacloud_eci20180808 import models as eci_models
+
+from eci_as_sandbox import SandboxInfo
+
+
+class DictSandboxInfo:
+    """The pre-slots ``SandboxInfo``: a plain object with eager fields."""
+
+    def __init__(
+        self,
+        sandbox_id: str = "",
+        name: str = "",
+        status: str = "",
+        cpu: Optional[float] = None,
+        memory: Optional[float] = None,
+        region_id: str = "",
+        zone_id: str = "",
+        intranet_ip: str = "",
+        internet_ip: str = "",
+        creation_time: str = "",
+        containers: Optional[List[Dict[str, Any]]] = None,
+        raw: Optional[Dict[str, Any]] = None,
+    ):
+        self.sandbox_id = sandbox_id
+        self.name = name
+        self.status = status
+        self.cpu = cpu
+        self.memory = memory
+        self.region_id = region_id
+        self.zone_id = zone_id
+        self.intranet_ip = intranet_ip
+        self.internet_ip = internet_ip
+        self.creation_time = creation_time
+        self.containers = containers or []
+        self.raw = raw or {}
+
+    @classmethod
+    def from_group(cls, group: Dict[str, Any]) -> "DictSandboxInfo":
+        return cls(
+            sandbox_id=group.get("ContainerGroupId", ""),
+            name=group.get("ContainerGroupName", ""),
+            status=group.get("Status", ""),
+            cpu=group.get("Cpu"),
+            memory=group.get("Memory"),
+            region_id=group.get("RegionId", ""),
+            zone_id=group.get("ZoneId", ""),
+            intranet_ip=group.get("IntranetIp", ""),
+            internet_ip=group.get("InternetIp", ""),
+            creation_time=group.get("CreationTime", ""),
+            containers=group.get("Containers", []) or [],
+            raw=group,
+        )
+
+
+def group_payload(i: int) -> str:
+    """A DescribeContainerGroups item shaped like a small real sandbox."""
+    return json.dumps(
+        {
+            "ContainerGroupId": f"eci-{i:08d}",
+            "ContainerGroupName": f"sandbox-{i}",
+            "Status": "Running",
+            "Cpu": 2.0,
+            "Memory": 4.0,
+            "RegionId": "cn-hangzhou",
+            "ZoneId": "cn-hangzhou-k",
+            "IntranetIp": "10.0.0.1",
+            "InternetIp": "",
+            "CreationTime": "2026-01-01T00:00:00Z",
+            "Containers": [
+                {
+                    "Name": "sandbox",
+                    "Image": "registry.example.com/sandbox:latest",
+                    "Cpu": 2.0,
+                    "Memory": 4.0,
+                    "Commands": ["sleep", "infinity"],
+                    "EnvironmentVars": [
+                        {"Key": f"VAR_{j}", "Value": "value"} for j in range(5)
+                    ],
+                }
+            ],
+            "Events": [
+                {
+                    "Count": 1,
+                    "Type": "Normal",
+                    "Reason": "Pulled",
+                    "Message": "Successfully pulled image",
+                    "FirstTimestamp": "2026-01-01T00:00:00Z",
+                }
+                for _ in range(6)
+            ],
+            "Tags": [{"Key": "team", "Value": "agents"}],
+        }
+    )
+
+
+def as_dict(text: str) -> Dict[str, Any]:
+    return json.loads(text)
+
+
+def as_model(text: str) -> Any:
+    return eci_models.DescribeContainerGroupsResponseBodyContainerGroups().from_map(
+        json.loads(text)
+    )
+
+
+def measure(
+    label: str,
+    payloads: List[str],
+    decode: Callable[[str], Any],
+    build: Callable[[Any], Any],
+    touch: Optional[Callable[[Any], Any]] = None,
+) -> None:
+    groups = [decode(text) for text in payloads]
+    started = time.perf_counter()
+    for group in groups:
+        build(group)
+    # Timed without tracemalloc, which slows allocation-heavy code a lot.
+    elapsed = time.perf_counter() - started
+    del groups
+    gc.collect()
+    tracemalloc.start()
+    groups = [decode(text) for text in payloads]
+    infos = [build(group) for group in groups]
+    del groups
+    if touch is not None:
+        for info in infos:
+            touch(info)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"{label:<40} {retained / len(infos):8.0f} B/info "
+        f"{retained / 2**20:8.1f} MiB  build {elapsed * 1e6 / len(infos):6.1f} us/info"
+    )
+    del infos
+
+
+def main(count: int) -> None:
+    payloads = [group_payload(i) for i in range(count)]
+    print(f"{count} sandboxes, memory retained after the payloads are dropped")
+    measure(
+        "before: dict-backed, from dicts", payloads, as_dict, DictSandboxInfo.from_group
+    )
+    measure("after: slotted, from dicts", payloads, as_dict, SandboxInfo.from_group)
+    measure(
+        "after: slotted, from SDK models", payloads, as_model, SandboxInfo.from_group
+    )
+    measure(
+        "after: SDK models, containers read",
+        payloads,
+        as_model,
+        SandboxInfo.from_group,
+        touch=lambda info: info.containers,
+    )
+    measure(
+        "after: SDK models, raw read",
+        payloads,
+        as_model,
+        SandboxInfo.from_group,
+        touch=lambda info: info.raw,
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
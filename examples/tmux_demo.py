@@ -74,7 +74,9 @@ def main(sandbox_id: str) -> None:
             sandbox_id=sandbox_id,
             session_id=start_result.session_id,
         )
-        print(f"Poll {i + 1}: status={poll_result.status}, exit_code={poll_result.exit_code}")
+        print(
+            f"Poll {i + 1}: status={poll_result.status}, exit_code={poll_result.exit_code}"
+        )
 
         if poll_result.status.value == "completed":
             print(f"Output:\n{poll_result.output}")
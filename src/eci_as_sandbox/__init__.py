@@ -1,12 +1,21 @@
-from ._common.config import Config
+from typing import TYPE_CHECKING, Any
+
+from ._common.config import CaptureLimits, Config, PoolLimits
 from ._common.exceptions import ApiError, AuthenticationError, SandboxError
+from ._common.logger import configure_logging
 from ._common.models import (
     ApiResponse,
     AsyncSandboxResult,
+    BatchResult,
+    BroadcastItem,
+    BroadcastSummary,
     CommandResult,
     DeleteResult,
     GetSandboxResult,
     OperationResult,
+    PoolStats,
+    PythonRunResult,
+    RegistryStats,
     SandboxInfo,
     SandboxListResult,
     SandboxResult,
@@ -15,6 +24,8 @@ from ._common.models import (
     TmuxPollResult,
     TmuxStartResult,
     TMUX_DEFAULT_TIMEOUT,
+    RUN_LONG_DETACH_AFTER,
+    DEFAULT_RECONNECT_RETRIES,
     TMUX_HISTORY_LIMIT,
     TMUX_MARKER_EXIT_CODE,
     TMUX_OUTPUT_TAIL_LINES,
@@ -22,10 +33,73 @@ from ._common.models import (
     TMUX_POLL_INITIAL_DELAY,
     TMUX_POLL_MAX_DELAY,
     TMUX_SESSION_PREFIX,
+    EXEC_MODE_AUTO,
+    EXEC_MODE_HTTP,
+    EXEC_MODE_WEBSOCKET,
+    TRANSPORT_GZIP,
+    TRANSPORT_INLINE,
+    TRANSPORT_STDIN,
+    TRANSPORT_UPLOAD,
+    TRANSPORT_AGENT,
+    BATCH_MODE_PARALLEL,
+    BATCH_MODE_SEQUENTIAL,
     extract_request_id,
 )
-from ._async import AsyncEciSandbox, AsyncSandbox
-from ._sync import EciSandbox, Sandbox
+
+if TYPE_CHECKING:
+    from ._async import (
+        AsyncBroadcastRun,
+        AsyncEciSandbox,
+        AsyncHttpTransport,
+        AsyncPtySession,
+        AsyncPythonSession,
+        AsyncSandbox,
+        AsyncSandboxAgent,
+    )
+    from ._sync import (
+        BroadcastRun,
+        EciSandbox,
+        PtySession,
+        PythonSession,
+        Sandbox,
+        SandboxAgent,
+        SyncHttpTransport,
+    )
+
+# The clients pull in the Alibaba Cloud SDK and its HTTP stack, so they are
+# only imported on first attribute access.
+_LAZY_ATTRS = {
+    "EciSandbox": "._sync",
+    "Sandbox": "._sync",
+    "AsyncEciSandbox": "._async",
+    "AsyncSandbox": "._async",
+    "AsyncHttpTransport": "._async",
+    "SyncHttpTransport": "._sync",
+    "BroadcastRun": "._sync",
+    "AsyncBroadcastRun": "._async",
+    "SandboxAgent": "._sync",
+    "AsyncSandboxAgent": "._async",
+    "PythonSession": "._sync",
+    "AsyncPythonSession": "._async",
+    "PtySession": "._sync",
+    "AsyncPtySession": "._async",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
 
 __all__ = [
     "EciSandbox",
@@ -33,6 +107,13 @@ __all__ = [
     "Sandbox",
     "AsyncSandbox",
     "Config",
+    "PoolLimits",
+    "CaptureLimits",
+    "PoolStats",
+    "RegistryStats",
+    "AsyncHttpTransport",
+    "SyncHttpTransport",
+    "configure_logging",
     "SandboxError",
     "AuthenticationError",
     "ApiError",
@@ -44,8 +125,36 @@ __all__ = [
     "DeleteResult",
     "GetSandboxResult",
     "CommandResult",
+    "BatchResult",
     "SandboxInfo",
     "extract_request_id",
+    # Broadcast
+    "BroadcastRun",
+    "AsyncBroadcastRun",
+    "SandboxAgent",
+    "AsyncSandboxAgent",
+    "BroadcastItem",
+    "BroadcastSummary",
+    # Python sessions
+    "PythonSession",
+    "AsyncPythonSession",
+    "PythonRunResult",
+    # Terminals
+    "PtySession",
+    "AsyncPtySession",
+    # Exec modes
+    "EXEC_MODE_AUTO",
+    "EXEC_MODE_HTTP",
+    "EXEC_MODE_WEBSOCKET",
+    # Command transports
+    "TRANSPORT_INLINE",
+    "TRANSPORT_GZIP",
+    "TRANSPORT_STDIN",
+    "TRANSPORT_UPLOAD",
+    "TRANSPORT_AGENT",
+    # Batch modes
+    "BATCH_MODE_SEQUENTIAL",
+    "BATCH_MODE_PARALLEL",
     # Tmux types
     "TmuxCommandStatus",
     "TmuxStartResult",
@@ -60,4 +169,6 @@ __all__ = [
     "TMUX_POLL_MAX_DELAY",
     "TMUX_POLL_BACKOFF_FACTOR",
     "TMUX_DEFAULT_TIMEOUT",
+    "RUN_LONG_DETACH_AFTER",
+    "DEFAULT_RECONNECT_RETRIES",
 ]
@@ -1,4 +1,35 @@
-from .client import AsyncEciSandbox
+from typing import TYPE_CHECKING, Any
+
+from .agent import AsyncSandboxAgent
+from .broadcast import AsyncBroadcastRun
+from .pty import AsyncPtySession
+from .python_session import AsyncPythonSession
 from .sandbox import AsyncSandbox
 
-__all__ = ["AsyncEciSandbox", "AsyncSandbox"]
+if TYPE_CHECKING:
+    from .client import AsyncEciSandbox
+    from .transport import AsyncHttpTransport
+
+
+def __getattr__(name: str) -> Any:
+    # Deferred so that importing the handle type does not load the SDK.
+    if name == "AsyncEciSandbox":
+        from .client import AsyncEciSandbox
+
+        return AsyncEciSandbox
+    if name == "AsyncHttpTransport":
+        from .transport import AsyncHttpTransport
+
+        return AsyncHttpTransport
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "AsyncBroadcastRun",
+    "AsyncEciSandbox",
+    "AsyncHttpTransport",
+    "AsyncPtySession",
+    "AsyncPythonSession",
+    "AsyncSandbox",
+    "AsyncSandboxAgent",
+]
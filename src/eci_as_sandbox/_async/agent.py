@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from .._common.agent import (
+    AGENT_CALL_TIMEOUT,
+    AGENT_EXEC_TIMEOUT,
+    AgentCall,
+    AgentStream,
+    agent_job_log,
+    call_fields,
+    command_result,
+    encode_frame,
+    exec_request,
+    frame_id,
+    operation_result,
+    split_frame,
+)
+from .._common.capture import OutputCapture
+from .._common.config import CaptureLimits
+from .._common.models import CommandResult, OperationResult, TRANSPORT_AGENT
+from .._common.process import DEFAULT_KILL_GRACE, new_job_token
+from .._common.ws import (
+    WS_MSG_EXIT,
+    WS_MSG_STDERR,
+    WS_MSG_STDOUT,
+    encode_ws_stdin,
+    parse_exit_status,
+    parse_ws_frame,
+)
+
+# Extra seconds to wait for an exec's result after its own timeout, for the
+# agent to stop the command and report.
+_EXEC_RESULT_GRACE = DEFAULT_KILL_GRACE + 5.0
+
+
+class AsyncAgentConnection:
+    """
+    Framed request/response connection to a program running on the stdin
+    of one exec (the helper agent or a Python session kernel).
+
+    Every request carries its own id, so any number of tasks can use the
+    connection at once; a reader task routes the responses. Once the
+    connection is gone, pending and new requests fail and ``connected`` is
+    False.
+    """
+
+    # Names the program in error messages.
+    name = "Agent"
+
+    def __init__(
+        self,
+        ws: Any,
+        sandbox_id: str,
+        container_name: str,
+        request_id: str = "",
+        capture_limits: Optional[CaptureLimits] = None,
+    ):
+        self._ws = ws
+        self.sandbox_id = sandbox_id
+        self.container_name = container_name
+        self.request_id = request_id
+        self._capture_limits = capture_limits or CaptureLimits()
+        self._stream = AgentStream()
+        self._ids = itertools.count(1)
+        self._calls: Dict[int, Tuple[AgentCall, "asyncio.Future[None]"]] = {}
+        self._send_lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._stderr = bytearray()
+        self._background_tasks: Set["asyncio.Task[Any]"] = set()
+        self.error_message = ""
+        self._reader = asyncio.ensure_future(self._read_loop())
+
+    @property
+    def connected(self) -> bool:
+        return self._ready.is_set() and not self._closed.is_set()
+
+    async def wait_ready(self, timeout: float) -> str:
+        """
+        Wait for the program to report that it is running. Returns an error
+        message, or an empty string once it is ready.
+        """
+        waiters = [
+            asyncio.ensure_future(self._ready.wait()),
+            asyncio.ensure_future(self._closed.wait()),
+        ]
+        try:
+            await asyncio.wait(
+                waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        if self._ready.is_set():
+            return ""
+        if not self._closed.is_set():
+            return f"{self.name} did not start within {timeout:g}s"
+        details = self.startup_output() or self.error_message
+        return f"{self.name} failed to start: {details}"
+
+    def startup_output(self) -> str:
+        """What the launcher printed before the program came up."""
+        stderr = bytes(self._stderr).decode("utf-8", errors="replace").strip()
+        return "\n".join(part for part in (self._stream.startup_text(), stderr) if part)
+
+    async def aclose(self) -> None:
+        """Close the connection; the program exits when its stdin closes."""
+        self._shutdown(f"{self.name} connection closed")
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        try:
+            await self._ws.close()
+        except Exception:
+            pass
+        self._reader.cancel()
+
+    async def __aenter__(self) -> "AsyncAgentConnection":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    # ==================== Connection ====================
+
+    async def request(
+        self,
+        request: Dict[str, Any],
+        call: AgentCall,
+        data: bytes = b"",
+        timeout: Optional[float] = AGENT_CALL_TIMEOUT,
+        cancellable: bool = False,
+    ) -> AgentCall:
+        """
+        Send ``request`` and wait up to ``timeout`` seconds for ``call`` to
+        finish. If ``cancellable``, cancelling the awaiting task sends a
+        ``cancel`` request for it.
+        """
+        call_id, done = await self.submit(request, call, data)
+        try:
+            await asyncio.wait_for(asyncio.shield(done), timeout)
+        except asyncio.TimeoutError:
+            self.forget(call_id)
+            call.fail(f"{self.name} call timed out after {timeout:g}s")
+        except asyncio.CancelledError:
+            self.forget(call_id)
+            if cancellable:
+                # The awaiting task is being cancelled, so the stop runs on its own.
+                self.send_in_background({"id": 0, "op": "cancel", "target": call_id})
+            raise
+        return call
+
+    async def submit(
+        self, request: Dict[str, Any], call: AgentCall, data: bytes = b""
+    ) -> Tuple[int, "asyncio.Future[None]"]:
+        """
+        Send ``request`` without waiting. Returns its id and a future that
+        completes once ``call`` has its result (or has failed).
+        """
+        done: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        if self._closed.is_set():
+            call.fail(self.error_message or f"{self.name} is not connected")
+            done.set_result(None)
+            return 0, done
+        call_id = next(self._ids)
+        self._calls[call_id] = (call, done)
+        request["id"] = call_id
+        try:
+            await self._send(encode_frame(request, data))
+        except asyncio.CancelledError:
+            self._calls.pop(call_id, None)
+            raise
+        except Exception as exc:
+            self._shutdown(f"{self.name} connection failed: {exc}")
+        return call_id, done
+
+    def forget(self, call_id: int) -> None:
+        """Stop routing responses for a submitted request."""
+        self._calls.pop(call_id, None)
+
+    def send_in_background(self, request: Dict[str, Any]) -> None:
+        """Send a request whose response is not awaited, as a task of its own."""
+        if self._closed.is_set():
+            return
+        task = asyncio.ensure_future(self._send(encode_frame(request)))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _send(self, frame: bytes) -> None:
+        async with self._send_lock:
+            for chunk in split_frame(frame):
+                await self._ws.send(encode_ws_stdin(chunk))
+
+    async def _read_loop(self) -> None:
+        error = f"{self.name} connection closed"
+        try:
+            while True:
+                try:
+                    message = await self._ws.recv()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    error = f"{self.name} connection lost: {exc}"
+                    break
+                if not message:
+                    break
+                channel, payload = parse_ws_frame(message)
+                if channel == WS_MSG_EXIT:
+                    error = f"{self.name} exited with code {parse_exit_status(payload)}"
+                    break
+                if channel == WS_MSG_STDERR:
+                    self._stderr.extend(payload)
+                    del self._stderr[:-4096]
+                elif channel == WS_MSG_STDOUT:
+                    self._dispatch(payload)
+        except Exception as exc:
+            error = f"{self.name} connection failed: {exc}"
+        finally:
+            self._shutdown(error)
+
+    def _dispatch(self, payload: bytes) -> None:
+        for header, data in self._stream.feed(payload):
+            rid = frame_id(header)
+            entry = self._calls.get(rid)
+            if entry is None:
+                continue
+            call, done = entry
+            if call.add(header, data):
+                self._calls.pop(rid, None)
+                if not done.done():
+                    done.set_result(None)
+        if self._stream.ready:
+            self._ready.set()
+
+    def _shutdown(self, error: str) -> None:
+        if self._closed.is_set():
+            return
+        self.error_message = error
+        self._closed.set()
+        calls = list(self._calls.values())
+        self._calls.clear()
+        for call, done in calls:
+            call.fail(error)
+            if not done.done():
+                done.set_result(None)
+
+
+class AsyncSandboxAgent(AsyncAgentConnection):
+    """
+    Connection to the helper agent running in one sandbox.
+
+    Created by ``AsyncEciSandbox.start_agent``. Every call is a framed
+    request with its own id on a single exec stream, so any number of tasks
+    can use the agent at once. Cancelling a task awaiting ``exec`` stops
+    the command. Once the connection is gone, calls return
+    ``success=False`` and ``connected`` is False.
+    """
+
+    async def __aenter__(self) -> "AsyncSandboxAgent":
+        return self
+
+    async def exec(
+        self,
+        command: List[str],
+        exec_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+        stdin: Union[str, bytes] = b"",
+    ) -> CommandResult:
+        """
+        Run a list-form command and collect its output (stdout and stderr
+        combined). A command still running after ``timeout`` seconds
+        (default 600) has its process group stopped and reports
+        ``terminated``.
+        """
+        if not command:
+            return CommandResult(
+                success=False,
+                error_message="command is required",
+                transport=TRANSPORT_AGENT,
+            )
+        if isinstance(stdin, str):
+            stdin = stdin.encode("utf-8")
+        if timeout is None or timeout <= 0:
+            timeout = AGENT_EXEC_TIMEOUT
+        call = AgentCall(OutputCapture(self._capture_limits))
+        await self.request(
+            exec_request(command, exec_dir, timeout, DEFAULT_KILL_GRACE),
+            call,
+            stdin,
+            timeout + _EXEC_RESULT_GRACE,
+            cancellable=True,
+        )
+        return command_result(call, self.request_id)
+
+    async def bash(
+        self,
+        command: str,
+        exec_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> CommandResult:
+        """Run a shell command via ``bash -lc`` (see ``exec``)."""
+        if not command:
+            return CommandResult(
+                success=False,
+                error_message="command is required",
+                transport=TRANSPORT_AGENT,
+            )
+        return await self.exec(
+            ["bash", "-lc", command], exec_dir=exec_dir, timeout=timeout
+        )
+
+    async def spawn(
+        self,
+        command: str,
+        exec_dir: Optional[str] = None,
+        log_path: Optional[str] = None,
+    ) -> OperationResult:
+        """
+        Start a shell command in the background, in its own session, with
+        its output appended to ``log_path`` (a new file under the agent's
+        job directory by default). ``data`` holds ``pid`` and ``log``; the
+        exit code is written to ``<log>.exit`` when it finishes.
+        """
+        request = {
+            "op": "spawn",
+            "argv": ["bash", "-lc", command],
+            "cwd": exec_dir,
+            "log": log_path or agent_job_log(new_job_token()),
+        }
+        call = await self.request(request, AgentCall())
+        return operation_result(call, self.request_id, call_fields(call))
+
+    async def read_file(
+        self, path: str, offset: int = 0, length: Optional[int] = None
+    ) -> OperationResult:
+        """Read ``length`` bytes (all by default) from ``offset``; ``data`` is bytes."""
+        call = await self.request(
+            {"op": "read", "path": path, "offset": offset, "length": length},
+            AgentCall(),
+        )
+        return operation_result(call, self.request_id, bytes(call.data))
+
+    async def write_file(
+        self,
+        path: str,
+        content: Union[str, bytes],
+        mode: Optional[int] = None,
+        append: bool = False,
+    ) -> OperationResult:
+        """
+        Write ``content`` to ``path``, creating parent directories. The file
+        is replaced atomically unless ``append`` is set.
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        call = await self.request(
+            {"op": "write", "path": path, "mode": mode, "append": append},
+            AgentCall(),
+            content,
+        )
+        return operation_result(call, self.request_id, call_fields(call))
+
+    async def stat(self, path: str) -> OperationResult:
+        """``data`` holds ``exists`` and, if it does, size, mode, mtime and is_dir."""
+        call = await self.request({"op": "stat", "path": path}, AgentCall())
+        return operation_result(call, self.request_id, call_fields(call))
+
+    async def list_dir(self, path: str) -> OperationResult:
+        """``data`` is a list of entries (name, path, size, mode, mtime, is_dir)."""
+        call = await self.request({"op": "list", "path": path}, AgentCall())
+        return operation_result(
+            call, self.request_id, call_fields(call).get("entries", [])
+        )
+
+    async def kill(
+        self, pid: int, signal: int = 15, group: bool = True
+    ) -> OperationResult:
+        """Signal a process (its whole group by default); ``data["killed"]``."""
+        call = await self.request(
+            {"op": "kill", "pid": pid, "signal": signal, "group": group}, AgentCall()
+        )
+        return operation_result(call, self.request_id, call_fields(call))
+
+    async def tail(
+        self,
+        path: str,
+        lines: Optional[int] = None,
+        cursor: Optional[int] = None,
+        max_bytes: int = 64 * 1024,
+    ) -> OperationResult:
+        """
+        Read the end of a file, or what was written after ``cursor`` (a
+        byte offset from a previous call). ``data`` holds ``output``,
+        ``cursor``, ``size`` and, for a spawned job's log, ``exit_code``
+        once it has finished.
+        """
+        call = await self.request(
+            {
+                "op": "tail",
+                "path": path,
+                "lines": lines,
+                "offset": cursor,
+                "max_bytes": max_bytes,
+            },
+            AgentCall(),
+        )
+        fields = call_fields(call)
+        fields["output"] = bytes(call.data).decode("utf-8", errors="replace")
+        return operation_result(call, self.request_id, fields)
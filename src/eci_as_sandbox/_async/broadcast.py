@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Iterable, List, Optional
+
+from .._common.broadcast import (
+    BroadcastStats,
+    TokenBucket,
+    failed_item,
+    timed_out_item,
+    unique_ids,
+)
+from .._common.models import BroadcastItem, BroadcastSummary, CommandResult
+
+
+class AsyncBroadcastRun:
+    """
+    One command running on many sandboxes from a bounded set of tasks.
+
+    ``async for`` yields a ``BroadcastItem`` per sandbox in completion
+    order. Each target runs under ``asyncio.wait_for``, so a target that
+    exceeds ``timeout`` is cancelled and reported as timed out. After
+    ``aclose`` iteration ends, including in tasks already waiting.
+    """
+
+    def __init__(
+        self,
+        run_one: Callable[[str], Awaitable[CommandResult]],
+        sandbox_ids: Iterable[str],
+        concurrency: int,
+        timeout: Optional[float] = None,
+        rate_limit: Optional[float] = None,
+    ):
+        self._todo: Deque[str] = deque(unique_ids(sandbox_ids))
+        self._run_one = run_one
+        self._timeout = timeout if timeout and timeout > 0 else None
+        self._bucket = TokenBucket(rate_limit) if rate_limit else None
+        self._concurrency = max(1, min(concurrency, len(self._todo) or 1))
+        self._stats = BroadcastStats(len(self._todo))
+        self._remaining = len(self._todo)
+        # Created on first iteration, inside the caller's event loop. None
+        # is the sentinel ``aclose`` puts to wake waiting iterators.
+        self._results: Optional["asyncio.Queue[Optional[BroadcastItem]]"] = None
+        self._workers: List["asyncio.Task[None]"] = []
+        self._closed = False
+
+    def __aiter__(self) -> "AsyncBroadcastRun":
+        return self
+
+    async def __anext__(self) -> BroadcastItem:
+        if self._closed:
+            raise StopAsyncIteration
+        if self._remaining <= 0:
+            await self.aclose()
+            raise StopAsyncIteration
+        if self._results is None:
+            self._start()
+        assert self._results is not None
+        item = await self._results.get()
+        if item is None:
+            # Pass the sentinel on to any other waiting iterator.
+            self._results.put_nowait(None)
+            raise StopAsyncIteration
+        self._remaining -= 1
+        return item
+
+    async def __aenter__(self) -> "AsyncBroadcastRun":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def summary(self) -> BroadcastSummary:
+        """Drain the remaining results and return aggregate statistics."""
+        async for _ in self:
+            pass
+        return self._stats.summary()
+
+    async def aclose(self) -> None:
+        """Cancel running and queued targets and end iteration."""
+        self._closed = True
+        self._todo.clear()
+        if self._results is not None:
+            self._results.put_nowait(None)
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def _start(self) -> None:
+        self._results = asyncio.Queue()
+        self._workers = [
+            asyncio.ensure_future(self._worker()) for _ in range(self._concurrency)
+        ]
+
+    async def _worker(self) -> None:
+        assert self._results is not None
+        while self._todo:
+            sandbox_id = self._todo.popleft()
+            if self._bucket is not None:
+                delay = self._bucket.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            item = await self._run(sandbox_id)
+            self._stats.record(item)
+            self._results.put_nowait(item)
+
+    async def _run(self, sandbox_id: str) -> BroadcastItem:
+        started = time.monotonic()
+        try:
+            if self._timeout is None:
+                result = await self._run_one(sandbox_id)
+            else:
+                result = await asyncio.wait_for(
+                    self._run_one(sandbox_id), self._timeout
+                )
+        except asyncio.TimeoutError:
+            assert self._timeout is not None
+            return timed_out_item(sandbox_id, self._timeout, time.monotonic() - started)
+        except Exception as exc:
+            return failed_item(sandbox_id, exc, time.monotonic() - started)
+        return BroadcastItem(
+            sandbox_id=sandbox_id,
+            result=result,
+            elapsed=time.monotonic() - started,
+        )
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Optional, Union
+
+from .._common.ws import (
+    WS_MSG_EXIT,
+    WS_MSG_STDERR,
+    WS_MSG_STDOUT,
+    encode_ws_resize,
+    encode_ws_stdin,
+    parse_exit_status,
+    parse_ws_frame,
+)
+
+
+class AsyncPtySession:
+    """
+    Interactive terminal in a sandbox, on one exec with a TTY.
+
+    Created by ``AsyncEciSandbox.open_pty``. ``write`` sends keystrokes as
+    they come, each in its own stdin frame; ``read`` returns the terminal's
+    raw output; ``resize`` changes the window size. A reader task collects
+    output, and the connection sends keep-alive pings while idle. Once the
+    shell exits or the connection drops, ``closed`` is True, ``exit_code``
+    and ``error_message`` say why, and ``write`` returns False.
+    """
+
+    def __init__(
+        self,
+        ws: Any,
+        sandbox_id: str,
+        container_name: str,
+        request_id: str = "",
+    ):
+        self._ws = ws
+        self.sandbox_id = sandbox_id
+        self.container_name = container_name
+        self.request_id = request_id
+        self.exit_code: Optional[int] = None
+        self.error_message = ""
+        self._output: "asyncio.Queue[bytes]" = asyncio.Queue()
+        self._send_lock = asyncio.Lock()
+        self._closed = asyncio.Event()
+        self._reader = asyncio.ensure_future(self._read_loop())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    async def write(self, data: Union[str, bytes]) -> bool:
+        """Send input to the terminal; False once the session is closed."""
+        return await self._send(encode_ws_stdin(data))
+
+    async def resize(self, cols: int, rows: int) -> bool:
+        """Set the terminal's window size in columns and rows."""
+        return await self._send(encode_ws_resize(cols, rows))
+
+    async def read(self, timeout: Optional[float] = None) -> bytes:
+        """
+        Output received since the last read, waiting up to ``timeout``
+        seconds (forever if None) for some to arrive. Returns ``b""`` on
+        timeout or once the session has ended and everything was read.
+        """
+        chunks = []
+        try:
+            chunk = await asyncio.wait_for(self._output.get(), timeout)
+            while chunk:
+                chunks.append(chunk)
+                chunk = self._output.get_nowait()
+            # The end-of-session marker stays queued for later reads.
+            self._output.put_nowait(b"")
+        except (asyncio.TimeoutError, asyncio.QueueEmpty):
+            pass
+        return b"".join(chunks)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """Yield output chunks until the session ends."""
+        while True:
+            data = await self.read()
+            if data:
+                yield data
+            elif self.closed:
+                return
+
+    async def aclose(self) -> None:
+        """Close the connection; the shell gets a hangup."""
+        self._shutdown("PTY session closed")
+        try:
+            await self._ws.close()
+        except Exception:
+            pass
+        self._reader.cancel()
+
+    async def __aenter__(self) -> "AsyncPtySession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _send(self, message: bytes) -> bool:
+        if self._closed.is_set():
+            return False
+        try:
+            async with self._send_lock:
+                await self._ws.send(message)
+        except Exception as exc:
+            self._shutdown(f"PTY connection failed: {exc}")
+            return False
+        return True
+
+    async def _read_loop(self) -> None:
+        error = ""
+        try:
+            while True:
+                try:
+                    message = await self._ws.recv()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    if not self._closed.is_set():
+                        error = f"PTY connection lost: {exc}"
+                    break
+                if not message:
+                    break
+                channel, payload = parse_ws_frame(message)
+                if channel == WS_MSG_EXIT:
+                    self.exit_code = parse_exit_status(payload)
+                    break
+                if channel in (WS_MSG_STDOUT, WS_MSG_STDERR) and payload:
+                    self._output.put_nowait(payload)
+        finally:
+            self._shutdown(error)
+
+    def _shutdown(self, error: str) -> None:
+        if self._closed.is_set():
+            return
+        self.error_message = error
+        self._closed.set()
+        # Marks the end of the output; ``read`` returns at it.
+        self._output.put_nowait(b"")
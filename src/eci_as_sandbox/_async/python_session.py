@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from .._common.agent import AgentCall, call_fields
+from .._common.capture import OutputCapture
+from .._common.config import CaptureLimits
+from .._common.models import OperationResult, PythonRunResult
+from .._common.python_session import (
+    PYTHON_INTERRUPT_GRACE,
+    PYTHON_RUN_TIMEOUT,
+    run_request,
+    run_result,
+)
+from .agent import AsyncAgentConnection
+
+
+class AsyncPythonKernel(AsyncAgentConnection):
+    """Connection to the kernel process behind an ``AsyncPythonSession``."""
+
+    name = "Python session"
+
+
+class AsyncPythonSession:
+    """
+    A persistent Python interpreter in one sandbox.
+
+    Created by ``AsyncEciSandbox.python_session``. The interpreter is a
+    small kernel, uploaded once through the script cache and kept running
+    on the stdin of one exec; it starts on the first ``run`` (or
+    ``start``). Globals persist between runs, so imports and variables stay
+    loaded and each run costs one round trip on the open connection instead
+    of an API call and an interpreter startup. Runs are serialized;
+    cancelling a task awaiting ``run`` interrupts the code.
+
+    If the interpreter dies, the next ``run`` starts a new one and reports
+    ``restarted``; so does a run that had to restart it after a timeout.
+    """
+
+    def __init__(
+        self,
+        launch: Callable[[], Awaitable[Tuple[Optional[AsyncPythonKernel], str, str]]],
+        capture_limits: Optional[CaptureLimits] = None,
+    ):
+        self._launch = launch
+        self._capture_limits = capture_limits or CaptureLimits()
+        self._kernel: Optional[AsyncPythonKernel] = None
+        self._run_lock = asyncio.Lock()
+        self._running: Optional[Tuple[AsyncPythonKernel, int]] = None
+        self._started = False
+        self._closed = False
+        self.request_id = ""
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        """Whether the interpreter is running and connected."""
+        kernel = self._kernel
+        return kernel is not None and kernel.connected
+
+    async def start(self) -> OperationResult:
+        """Start the interpreter if it is not already running."""
+        async with self._run_lock:
+            error = await self._ensure_kernel()
+        return OperationResult(
+            request_id=self.request_id, success=not error, error_message=error
+        )
+
+    async def run(self, code: str, timeout: Optional[float] = None) -> PythonRunResult:
+        """
+        Run ``code`` in the session's ``__main__`` namespace.
+
+        stdout and stderr (including output of C extensions and child
+        processes) are captured separately. When the last statement is an
+        expression, ``result`` is the ``repr`` of its value, which is also
+        bound to ``_``.
+
+        Args:
+            code: Python source, any number of statements
+            timeout: Seconds before the run is interrupted with
+                ``KeyboardInterrupt`` (default 600). If it does not stop
+                within a few seconds more, the interpreter is restarted.
+
+        Returns:
+            PythonRunResult
+        """
+        if timeout is None or timeout <= 0:
+            timeout = PYTHON_RUN_TIMEOUT
+        async with self._run_lock:
+            restarted = self._started and not self.alive
+            error = await self._ensure_kernel()
+            kernel = self._kernel
+            if error or kernel is None:
+                return PythonRunResult(
+                    request_id=self.request_id,
+                    error_message=error or "Python session is not running",
+                    restarted=restarted,
+                )
+            call = AgentCall(
+                OutputCapture(self._capture_limits), OutputCapture(self._capture_limits)
+            )
+            call_id, done = await kernel.submit(run_request(code), call)
+            self._running = (kernel, call_id)
+            try:
+                try:
+                    await asyncio.wait_for(asyncio.shield(done), timeout)
+                    return run_result(call, self.request_id, restarted=restarted)
+                except asyncio.TimeoutError:
+                    pass
+                except asyncio.CancelledError:
+                    kernel.forget(call_id)
+                    # The awaiting task is being cancelled, so the interrupt runs on its own.
+                    kernel.send_in_background(
+                        {"id": 0, "op": "interrupt", "target": call_id}
+                    )
+                    raise
+                await self._interrupt(kernel, call_id)
+                try:
+                    await asyncio.wait_for(asyncio.shield(done), PYTHON_INTERRUPT_GRACE)
+                except asyncio.TimeoutError:
+                    # Stuck where KeyboardInterrupt cannot reach (e.g. in C code).
+                    kernel.forget(call_id)
+                    await kernel.aclose()
+                    await self._ensure_kernel()
+                    restarted = True
+            finally:
+                self._running = None
+            return run_result(call, self.request_id, timeout, restarted)
+
+    async def interrupt(self) -> bool:
+        """
+        Raise ``KeyboardInterrupt`` in the code being run, from another
+        task. Returns whether a run was interrupted.
+        """
+        running = self._running
+        if running is None:
+            return False
+        return await self._interrupt(*running)
+
+    async def restart(self) -> OperationResult:
+        """
+        Start a fresh interpreter, discarding all state. A run in progress
+        in another task fails.
+        """
+        kernel = self._kernel
+        if kernel is not None:
+            await kernel.aclose()
+        return await self.start()
+
+    async def aclose(self) -> None:
+        """Stop the interpreter; later runs fail."""
+        self._closed = True
+        kernel = self._kernel
+        if kernel is not None:
+            await kernel.aclose()
+
+    async def __aenter__(self) -> "AsyncPythonSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _ensure_kernel(self) -> str:
+        """Start the interpreter unless it is running; returns an error message."""
+        if self._closed:
+            return "Python session is closed"
+        if self.alive:
+            return ""
+        if self._kernel is not None:
+            await self._kernel.aclose()
+        kernel, request_id, error = await self._launch()
+        self.request_id = request_id
+        if kernel is None:
+            return error
+        if self._started:
+            self.restarts += 1
+        self._started = True
+        self._kernel = kernel
+        return ""
+
+    async def _interrupt(self, kernel: AsyncPythonKernel, call_id: int) -> bool:
+        call = await kernel.request(
+            {"op": "interrupt", "target": call_id},
+            AgentCall(),
+            timeout=PYTHON_INTERRUPT_GRACE,
+        )
+        return bool(call_fields(call).get("interrupted"))
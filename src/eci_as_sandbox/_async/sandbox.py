@@ -1,11 +1,23 @@
 from __future__ import annotations
 
-from typing import Optional, TYPE_CHECKING
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+)
 
 from .._common.models import (
+    BATCH_MODE_SEQUENTIAL,
+    BatchResult,
     CommandResult,
     DeleteResult,
+    EXEC_MODE_AUTO,
     OperationResult,
+    RUN_LONG_DETACH_AFTER,
     TmuxKillResult,
     TmuxPollResult,
     TmuxStartResult,
@@ -15,8 +27,11 @@ from .._common.models import (
     TMUX_POLL_INITIAL_DELAY,
     TMUX_POLL_MAX_DELAY,
 )
+from .._common.pty import PTY_DEFAULT_COLS, PTY_DEFAULT_ROWS, PTY_DEFAULT_TERM
 
 if TYPE_CHECKING:
+    from .agent import AsyncSandboxAgent
+    from .python_session import AsyncPythonSession
     from .client import AsyncEciSandbox
 
 
@@ -40,19 +55,113 @@ class AsyncSandbox:
     async def restart(self) -> OperationResult:
         return await self._manager.restart(self.sandbox_id)
 
+    # ==================== Agent ====================
+
+    async def start_agent(self, timeout: Optional[float] = None) -> OperationResult:
+        """
+        Start the helper agent (see ``AsyncEciSandbox.start_agent``). While
+        it is connected, ``exec_command`` and ``bash`` run through it.
+        """
+        return await self._manager.start_agent(
+            self.sandbox_id, container_name=self.container_name, timeout=timeout
+        )
+
+    async def stop_agent(self) -> None:
+        await self._manager.stop_agent(self.sandbox_id)
+
+    @property
+    def agent(self) -> Optional["AsyncSandboxAgent"]:
+        """The connected helper agent, or None."""
+        return self._manager.get_agent(self.sandbox_id)
+
+    def _routed_agent(
+        self,
+        container_name: Optional[str],
+        sync: bool,
+        exec_mode: str,
+        detach_after: Optional[float],
+        compress_output: bool,
+    ) -> Optional["AsyncSandboxAgent"]:
+        # Calls that ask for a specific exec path keep using it.
+        if not sync or exec_mode != EXEC_MODE_AUTO:
+            return None
+        if detach_after is not None or compress_output:
+            return None
+        agent = self.agent
+        if agent is None:
+            return None
+        if container_name and container_name != agent.container_name:
+            return None
+        return agent
+
+    # ==================== Python Session ====================
+
+    def python_session(
+        self,
+        exec_dir: Optional[str] = None,
+        python: str = "python3",
+        start_timeout: Optional[float] = None,
+    ) -> "AsyncPythonSession":
+        """
+        A persistent Python interpreter in this sandbox, whose globals
+        persist between ``run`` calls (see ``AsyncEciSandbox.python_session``).
+        """
+        return self._manager.python_session(
+            self.sandbox_id,
+            container_name=self.container_name,
+            exec_dir=exec_dir,
+            python=python,
+            start_timeout=start_timeout,
+        )
+
+    # ==================== PTY ====================
+
+    async def open_pty(
+        self,
+        cols: int = PTY_DEFAULT_COLS,
+        rows: int = PTY_DEFAULT_ROWS,
+        command: Optional[list[str]] = None,
+        exec_dir: Optional[str] = None,
+        term: str = PTY_DEFAULT_TERM,
+    ) -> OperationResult:
+        """
+        Open an interactive terminal; ``data`` is the ``AsyncPtySession`` (see
+        ``AsyncEciSandbox.open_pty``).
+        """
+        return await self._manager.open_pty(
+            self.sandbox_id,
+            cols=cols,
+            rows=rows,
+            command=command,
+            container_name=self.container_name,
+            exec_dir=exec_dir,
+            term=term,
+        )
+
     async def exec_command(
         self,
         command: list[str],
         container_name: Optional[str] = None,
         sync: bool = True,
         timeout: Optional[float] = None,
+        exec_mode: str = EXEC_MODE_AUTO,
+        detach_after: Optional[float] = None,
+        compress_output: bool = False,
     ) -> CommandResult:
+        agent = self._routed_agent(
+            container_name, sync, exec_mode, detach_after, compress_output
+        )
+        if agent is not None:
+            return await agent.exec(command, timeout=timeout)
         return await self._manager.exec_command(
             sandbox_id=self.sandbox_id,
             command=command,
             container_name=container_name or self.container_name,
             sync=sync,
             timeout=timeout,
+            exec_mode=exec_mode,
+            detach_after=detach_after,
+            compress_output=compress_output,
         )
 
     async def bash(
@@ -62,7 +171,15 @@ class AsyncSandbox:
         container_name: Optional[str] = None,
         sync: bool = True,
         timeout: Optional[float] = None,
+        exec_mode: str = EXEC_MODE_AUTO,
+        detach_after: Optional[float] = None,
+        compress_output: bool = False,
     ) -> CommandResult:
+        agent = self._routed_agent(
+            container_name, sync, exec_mode, detach_after, compress_output
+        )
+        if agent is not None:
+            return await agent.bash(command, exec_dir=exec_dir, timeout=timeout)
         return await self._manager.bash(
             sandbox_id=self.sandbox_id,
             command=command,
@@ -70,6 +187,50 @@ class AsyncSandbox:
             container_name=container_name or self.container_name,
             sync=sync,
             timeout=timeout,
+            exec_mode=exec_mode,
+            detach_after=detach_after,
+            compress_output=compress_output,
+        )
+
+    async def run_long(
+        self,
+        command: str,
+        exec_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+        detach_after: float = RUN_LONG_DETACH_AFTER,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """Run a command of any duration and collect its complete output."""
+        return await self._manager.run_long(
+            sandbox_id=self.sandbox_id,
+            command=command,
+            exec_dir=exec_dir,
+            container_name=self.container_name,
+            timeout=timeout,
+            detach_after=detach_after,
+            on_output=on_output,
+        )
+
+    async def bash_batch(
+        self,
+        commands: list[str],
+        mode: str = BATCH_MODE_SEQUENTIAL,
+        stop_on_error: bool = False,
+        exec_dir: Optional[str] = None,
+        container_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+        exec_mode: str = EXEC_MODE_AUTO,
+    ) -> BatchResult:
+        """Run several bash commands in a single exec (see client docs)."""
+        return await self._manager.bash_batch(
+            sandbox_id=self.sandbox_id,
+            commands=commands,
+            mode=mode,
+            stop_on_error=stop_on_error,
+            exec_dir=exec_dir,
+            container_name=container_name or self.container_name,
+            timeout=timeout,
+            exec_mode=exec_mode,
         )
 
     # ==================== Tmux Methods ====================
@@ -95,6 +256,9 @@ class AsyncSandbox:
         self,
         session_id: str,
         tail_lines: int = TMUX_OUTPUT_TAIL_LINES,
+        cursor: Optional[int] = None,
+        include_output: bool = True,
+        compress_output: bool = False,
     ) -> TmuxPollResult:
         """Poll for command completion and retrieve output."""
         return await self._manager.tmux_poll(
@@ -102,6 +266,28 @@ class AsyncSandbox:
             session_id=session_id,
             container_name=self.container_name,
             tail_lines=tail_lines,
+            cursor=cursor,
+            include_output=include_output,
+            compress_output=compress_output,
+        )
+
+    async def tmux_poll_many(
+        self,
+        session_ids: Iterable[str],
+        tail_lines: int = TMUX_OUTPUT_TAIL_LINES,
+        cursors: Optional[Dict[str, int]] = None,
+        include_output: bool = True,
+        compress_output: bool = False,
+    ) -> Dict[str, TmuxPollResult]:
+        """Poll several tmux sessions with a single exec."""
+        return await self._manager.tmux_poll_many(
+            sandbox_id=self.sandbox_id,
+            session_ids=session_ids,
+            container_name=self.container_name,
+            tail_lines=tail_lines,
+            cursors=cursors,
+            include_output=include_output,
+            compress_output=compress_output,
         )
 
     async def tmux_wait(
@@ -113,8 +299,9 @@ class AsyncSandbox:
         backoff_factor: float = TMUX_POLL_BACKOFF_FACTOR,
         tail_lines: int = TMUX_OUTPUT_TAIL_LINES,
         cleanup: bool = True,
+        blocking: bool = True,
     ) -> TmuxPollResult:
-        """Wait for command completion with exponential backoff polling."""
+        """Wait for command completion."""
         return await self._manager.tmux_wait(
             sandbox_id=self.sandbox_id,
             session_id=session_id,
@@ -125,6 +312,24 @@ class AsyncSandbox:
             backoff_factor=backoff_factor,
             tail_lines=tail_lines,
             cleanup=cleanup,
+            blocking=blocking,
+        )
+
+    def tmux_wait_many(
+        self,
+        session_ids: Iterable[str],
+        timeout: Optional[float] = None,
+        tail_lines: int = TMUX_OUTPUT_TAIL_LINES,
+        cleanup: bool = True,
+    ) -> AsyncIterator[Tuple[str, TmuxPollResult]]:
+        """Wait for several tmux sessions, yielding each as it finishes."""
+        return self._manager.tmux_wait_many(
+            sandbox_id=self.sandbox_id,
+            session_ids=session_ids,
+            container_name=self.container_name,
+            timeout=timeout,
+            tail_lines=tail_lines,
+            cleanup=cleanup,
         )
 
     async def tmux_kill(self, session_id: str) -> TmuxKillResult:
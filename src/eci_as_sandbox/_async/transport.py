@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import socket
+import ssl
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from alibabacloud_eci20180808.client import Client as EciClient
+
+from .._common.config import PoolLimits
+from .._common.logger import get_logger
+from .._common.models import PoolStats
+from .._common.transport import (
+    _patch_sdk_cores,
+    _pool_key,
+    _request_body,
+    _resolve_proxy,
+    _resolve_ssl,
+    _resolve_timeouts,
+)
+
+
+_logger = get_logger("eci-as-sandbox.transport")
+
+# Transport used by SDK calls issued from the current task. Set around
+# ``call_api_async`` by ``PooledEciClient`` and read by the SDK core hook.
+_active_transport: contextvars.ContextVar[Optional["AsyncHttpTransport"]] = (
+    contextvars.ContextVar("eci_sandbox_async_transport", default=None)
+)
+_HOOK_INSTALLED = False
+
+
+def _install_sdk_hook() -> None:
+    """
+    Route the SDK's ``async_do_action`` through the active transport.
+
+    The SDK opens a fresh aiohttp session (and TLS handshake) per request.
+    The hook is process-wide but only diverts requests issued while a
+    transport is active, so other SDK users keep the stock behaviour.
+    """
+    global _HOOK_INSTALLED
+    if _HOOK_INSTALLED:
+        return
+
+    def _make_dispatch(core, original, response_cls, retry_error):
+        async def _dispatch(request, runtime_option=None):
+            transport = _active_transport.get()
+            if transport is None:
+                return await original(request, runtime_option)
+            return await transport.send(
+                core, request, runtime_option or {}, response_cls, retry_error
+            )
+
+        return _dispatch
+
+    _patch_sdk_cores("async_do_action", _make_dispatch)
+    _HOOK_INSTALLED = True
+
+
+class _Pool:
+    def __init__(self, loop: asyncio.AbstractEventLoop, client: Any, kind: str):
+        self.loop = loop
+        self.client = client
+        self.kind = kind
+
+
+class AsyncHttpTransport:
+    """
+    Shared keep-alive HTTP transport for ``AsyncEciSandbox``.
+
+    One bounded connection pool is kept per endpoint (scheme, host, port,
+    proxy and TLS settings) and event loop. HTTP/2 is used when ``httpx`` and
+    ``h2`` are installed and ``limits.http2`` is true; otherwise the pool is
+    an aiohttp connector, which the SDK already depends on. Pools of event
+    loops that have been closed (e.g. by an earlier ``asyncio.run``) are
+    discarded when the next pool is opened.
+
+    A single instance may be shared by several clients to share connections.
+    Clients that did not get it passed in hold it (``acquire``); the last
+    one to ``release`` it closes its pools.
+    """
+
+    def __init__(self, limits: Optional[PoolLimits] = None):
+        self.limits = limits or PoolLimits()
+        # Pools are keyed by ``(endpoint key, loop)``; the lock guards the
+        # dict against loops running in other threads.
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple[Any, ...], _Pool] = {}
+        self._holders = 0
+        self._requests = 0
+        self._errors = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._pools_opened = 0
+        self._use_httpx = self.limits.http2 and _httpx_http2_available()
+
+    @property
+    def http2(self) -> bool:
+        return self._use_httpx
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            pools = list(self._pools.values())
+        idle = 0
+        for pool in pools:
+            idle += _idle_connections(pool)
+        return PoolStats(
+            pools=len(pools),
+            pools_opened=self._pools_opened,
+            requests=self._requests,
+            errors=self._errors,
+            in_flight=self._in_flight,
+            peak_in_flight=self._peak_in_flight,
+            idle_connections=idle,
+            max_connections=self.limits.max_connections,
+            http2=self._use_httpx,
+        )
+
+    def acquire(self) -> None:
+        """Register a client holding the transport."""
+        with self._lock:
+            self._holders += 1
+
+    async def release(self) -> None:
+        """Drop a hold; the last holder closes the pools (see ``aclose``)."""
+        with self._lock:
+            self._holders = max(0, self._holders - 1)
+            last = self._holders == 0
+        if last:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the pools bound to the running loop and discard those of
+        closed loops; pools of loops running in other threads are kept.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            closing = [pool for pool in self._pools.values() if pool.loop is loop]
+            self._prune_locked(loop)
+        for pool in closing:
+            try:
+                if pool.kind == "httpx":
+                    await pool.client.aclose()
+                else:
+                    await pool.client.close()
+            except Exception:
+                pass
+
+    async def send(
+        self,
+        core: Any,
+        request: Any,
+        runtime_option: Dict[str, Any],
+        response_cls: Any,
+        retry_error: Any,
+    ) -> Any:
+        url = core.compose_url(request)
+        protocol = request.protocol.upper()
+        verify, ssl_context = _resolve_ssl(core, protocol, runtime_option)
+        proxy = _resolve_proxy(
+            protocol, request.headers.get("host", ""), runtime_option
+        )
+        connect_s, read_s = _resolve_timeouts(runtime_option)
+        body = _request_body(request)
+
+        key = _pool_key(request, proxy, verify, runtime_option)
+        pool = self._get_pool(key, ssl_context, proxy)
+
+        self._requests += 1
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            if pool.kind == "httpx":
+                return await self._send_httpx(
+                    pool, request, url, body, connect_s, read_s, response_cls
+                )
+            return await self._send_aiohttp(
+                pool,
+                request,
+                url,
+                body,
+                proxy,
+                connect_s,
+                read_s,
+                response_cls,
+            )
+        except (IOError, asyncio.TimeoutError) as exc:
+            self._errors += 1
+            raise retry_error(str(exc))
+        except Exception as exc:
+            self._errors += 1
+            if _is_httpx_transport_error(exc):
+                raise retry_error(str(exc))
+            raise
+        finally:
+            self._in_flight -= 1
+
+    def _get_pool(
+        self,
+        key: Tuple[Any, ...],
+        ssl_context: Optional[ssl.SSLContext],
+        proxy: Optional[str],
+    ) -> _Pool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.get(key + (loop,))
+            if pool is not None and not _pool_closed(pool):
+                return pool
+            pool = self._open_pool(loop, ssl_context, proxy)
+            self._prune_locked()
+            self._pools[key + (loop,)] = pool
+            self._pools_opened += 1
+        _logger.debug("Opened %s connection pool for %s", pool.kind, key[1])
+        return pool
+
+    def _prune_locked(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Drop pools of closed loops, and of ``loop`` if given."""
+        for pool_key, pool in list(self._pools.items()):
+            if pool.loop is loop:
+                del self._pools[pool_key]
+            elif pool.loop.is_closed():
+                del self._pools[pool_key]
+                _close_dead_pool(pool)
+
+    def _open_pool(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        ssl_context: Optional[ssl.SSLContext],
+        proxy: Optional[str],
+    ) -> _Pool:
+        limits = self.limits
+        if self._use_httpx:
+            import httpx  # pyright: ignore[reportMissingImports]
+
+            client_kwargs: Dict[str, Any] = {
+                "http2": True,
+                "verify": ssl_context if ssl_context is not None else False,
+                "limits": httpx.Limits(
+                    max_connections=limits.max_connections,
+                    max_keepalive_connections=limits.max_keepalive_connections,
+                    keepalive_expiry=limits.keepalive_expiry,
+                ),
+                "trust_env": False,
+            }
+            if proxy:
+                client_kwargs["proxy"] = proxy
+            return _Pool(loop, httpx.AsyncClient(**client_kwargs), "httpx")
+
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            ssl=ssl_context if ssl_context is not None else False,
+            limit=limits.max_connections,
+            limit_per_host=limits.max_connections,
+            keepalive_timeout=limits.keepalive_expiry,
+        )
+        return _Pool(loop, aiohttp.ClientSession(connector=connector), "aiohttp")
+
+    async def _send_aiohttp(
+        self,
+        pool: _Pool,
+        request: Any,
+        url: str,
+        body: bytes,
+        proxy: Optional[str],
+        connect_s: float,
+        read_s: float,
+        response_cls: Any,
+    ) -> Any:
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(sock_read=read_s, sock_connect=connect_s)
+        async with pool.client.request(
+            request.method,
+            url,
+            data=body,
+            headers=request.headers,
+            proxy=proxy,
+            timeout=timeout,
+        ) as response:
+            result = response_cls()
+            result.body = await response.read()
+            result.headers = {k.lower(): v for k, v in response.headers.items()}
+            result.status_code = response.status
+            result.status_message = response.reason
+            result.response = response
+            return result
+
+    async def _send_httpx(
+        self,
+        pool: _Pool,
+        request: Any,
+        url: str,
+        body: bytes,
+        connect_s: float,
+        read_s: float,
+        response_cls: Any,
+    ) -> Any:
+        import httpx  # pyright: ignore[reportMissingImports]
+
+        response = await pool.client.request(
+            request.method,
+            url,
+            content=body,
+            headers=request.headers,
+            timeout=httpx.Timeout(read_s, connect=connect_s),
+        )
+        result = response_cls()
+        result.body = response.content
+        result.headers = {k.lower(): v for k, v in response.headers.items()}
+        result.status_code = response.status_code
+        result.status_message = response.reason_phrase
+        result.response = response
+        return result
+
+
+class PooledEciClient(EciClient):
+    """``EciClient`` whose async calls go through an ``AsyncHttpTransport``."""
+
+    def __init__(self, config: Any, transport: AsyncHttpTransport):
+        super().__init__(config)
+        self.transport = transport
+        _install_sdk_hook()
+
+    async def call_api_async(self, params, request, runtime):
+        token = _active_transport.set(self.transport)
+        try:
+            return await super().call_api_async(params, request, runtime)
+        finally:
+            _active_transport.reset(token)
+
+
+def _httpx_http2_available() -> bool:
+    try:
+        import h2  # pyright: ignore[reportMissingImports]  # noqa: F401
+        import httpx  # pyright: ignore[reportMissingImports]  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _is_httpx_transport_error(exc: Exception) -> bool:
+    try:
+        import httpx  # pyright: ignore[reportMissingImports]
+    except ImportError:
+        return False
+    return isinstance(exc, httpx.TransportError)
+
+
+def _pool_closed(pool: _Pool) -> bool:
+    client = pool.client
+    return bool(getattr(client, "closed", False) or getattr(client, "is_closed", False))
+
+
+def _close_dead_pool(pool: _Pool) -> None:
+    """
+    Shut down the connections of a pool whose event loop is closed.
+
+    Its ``close`` coroutine can no longer run, so the sockets are shut down
+    directly and their descriptors are released with the transports. Only
+    aiohttp pools are reachable this way; httpx ones are left to the GC.
+    """
+    if pool.kind != "aiohttp":
+        return
+    try:
+        conns = pool.client.connector._conns  # type: ignore[attr-defined]
+        protocols = [proto for entries in conns.values() for proto, _ in entries]
+    except Exception:
+        return
+    for proto in protocols:
+        try:
+            sock = proto.transport.get_extra_info("socket")
+            if sock is not None:
+                sock.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
+
+
+def _idle_connections(pool: _Pool) -> int:
+    # Best effort: neither aiohttp nor httpx exposes pool occupancy publicly.
+    try:
+        if pool.kind == "aiohttp":
+            conns = pool.client.connector._conns  # type: ignore[attr-defined]
+            return sum(len(v) for v in conns.values())
+        connections = pool.client._transport._pool.connections  # type: ignore[attr-defined]
+        return sum(1 for c in connections if c.is_idle())
+    except Exception:
+        return 0
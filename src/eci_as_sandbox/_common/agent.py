@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import json
+import shlex
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .capture import OutputCapture
+from .models import CommandResult, OperationResult, TRANSPORT_AGENT
+from .script_cache import guard_command
+
+
+# The helper agent is a small Python 3 program kept running on the stdin of
+# one exec per sandbox. It is uploaded once through the script cache.
+# Requests and responses are frames: a ``>II`` header giving the lengths of
+# a JSON object and of a binary payload, then the two. Every request
+# carries an ``id``; the agent serves each one on its own thread and tags
+# its response frames with that id, so many calls share one connection.
+# Output is sent as frames with ``"more": true`` followed by one final
+# frame holding the result (or an ``error``).
+AGENT_READY_LINE = "__ECI_AGENT__ ready"
+AGENT_JOB_DIR = "/tmp/.eci_agent"
+AGENT_READY_TIMEOUT = 20.0
+# Default exec timeout, as for a streamed exec.
+AGENT_EXEC_TIMEOUT = 600.0
+# Seconds a file or process call may take before the client gives up on it.
+AGENT_CALL_TIMEOUT = 60.0
+# Largest stdin message sent at once; bigger frames are split.
+AGENT_SEND_CHUNK = 64 * 1024
+# Idle seconds between keep-alive pings on the agent's connection.
+AGENT_PING_INTERVAL = 20.0
+
+_FRAME_HEAD = struct.Struct(">II")
+# Kept on the client so a failed start can report why.
+_STARTUP_OUTPUT_LIMIT = 4096
+
+_AGENT_TEMPLATE = r"""
+import json
+import os
+import signal
+import struct
+import subprocess
+import sys
+import threading
+
+HEAD = struct.Struct(">II")
+CHUNK = 65536
+out = sys.stdout.buffer
+out_lock = threading.Lock()
+running = {}
+running_lock = threading.Lock()
+
+
+def send(header, data=b""):
+    body = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    with out_lock:
+        out.write(HEAD.pack(len(body), len(data)) + body + data)
+        out.flush()
+
+
+def read_exact(stream, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = stream.read(size - len(buf))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def stop_group(proc, grace):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except OSError:
+        return False
+    try:
+        proc.wait(grace)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    return True
+
+
+def feed(proc, data):
+    try:
+        proc.stdin.write(data)
+        proc.stdin.close()
+    except OSError:
+        pass
+
+
+def op_exec(rid, req, data):
+    proc = subprocess.Popen(
+        req["argv"],
+        cwd=req.get("cwd") or None,
+        stdin=subprocess.PIPE if data else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    with running_lock:
+        running[rid] = proc
+    if data:
+        threading.Thread(target=feed, args=(proc, data), daemon=True).start()
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        stop_group(proc, req.get("grace", 2.0))
+
+    timer = None
+    if req.get("timeout"):
+        timer = threading.Timer(req["timeout"], expire)
+        timer.daemon = True
+        timer.start()
+    try:
+        fd = proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, CHUNK)
+            if not chunk:
+                break
+            send({"id": rid, "more": True}, chunk)
+        code = proc.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        proc.stdout.close()
+        with running_lock:
+            running.pop(rid, None)
+    terminated = expired.is_set()
+    send({"id": rid, "exit_code": None if terminated else code, "terminated": terminated})
+
+
+def op_spawn(rid, req, data):
+    log = req["log"]
+    os.makedirs(os.path.dirname(log), exist_ok=True)
+    with open(log, "ab") as sink:
+        proc = subprocess.Popen(
+            req["argv"],
+            cwd=req.get("cwd") or None,
+            stdin=subprocess.DEVNULL,
+            stdout=sink,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    def reap():
+        code = proc.wait()
+        with open(log + ".exit", "w") as status:
+            status.write("%d\n" % code)
+
+    threading.Thread(target=reap, daemon=True).start()
+    send({"id": rid, "pid": proc.pid, "log": log})
+
+
+def op_read(rid, req, data):
+    length = req.get("length")
+    with open(req["path"], "rb") as source:
+        size = os.fstat(source.fileno()).st_size
+        source.seek(req.get("offset") or 0)
+        while length is None or length > 0:
+            chunk = source.read(CHUNK if length is None else min(CHUNK, length))
+            if not chunk:
+                break
+            if length is not None:
+                length -= len(chunk)
+            send({"id": rid, "more": True}, chunk)
+    send({"id": rid, "size": size})
+
+
+def op_write(rid, req, data):
+    path = req["path"]
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    if req.get("append"):
+        with open(path, "ab") as target:
+            target.write(data)
+    else:
+        tmp = "%s.eci-%d-%d" % (path, os.getpid(), threading.get_ident())
+        with open(tmp, "wb") as target:
+            target.write(data)
+        os.replace(tmp, path)
+    if req.get("mode") is not None:
+        os.chmod(path, req["mode"])
+    send({"id": rid, "size": len(data)})
+
+
+def describe(path, info):
+    return {
+        "path": path,
+        "size": info.st_size,
+        "mode": info.st_mode & 0o7777,
+        "mtime": info.st_mtime,
+        "is_dir": os.path.isdir(path),
+    }
+
+
+def op_stat(rid, req, data):
+    path = req["path"]
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        send({"id": rid, "exists": False})
+        return
+    result = describe(path, info)
+    result.update({"id": rid, "exists": True})
+    send(result)
+
+
+def op_list(rid, req, data):
+    entries = []
+    for entry in os.scandir(req["path"]):
+        try:
+            item = describe(entry.path, entry.stat())
+        except OSError:
+            continue
+        item["name"] = entry.name
+        entries.append(item)
+    entries.sort(key=lambda item: item["name"])
+    send({"id": rid, "entries": entries})
+
+
+def op_kill(rid, req, data):
+    try:
+        if req.get("group", True):
+            os.killpg(req["pid"], req.get("signal", signal.SIGTERM))
+        else:
+            os.kill(req["pid"], req.get("signal", signal.SIGTERM))
+    except ProcessLookupError:
+        send({"id": rid, "killed": False})
+        return
+    send({"id": rid, "killed": True})
+
+
+def op_tail(rid, req, data):
+    path = req["path"]
+    size = os.path.getsize(path)
+    limit = req.get("max_bytes") or CHUNK
+    offset = req.get("offset")
+    start = max(0, size - limit) if offset is None else min(offset, size)
+    with open(path, "rb") as source:
+        source.seek(start)
+        chunk = source.read(min(limit, size - start))
+    if offset is None and req.get("lines"):
+        lines = chunk.splitlines(True)[-req["lines"]:]
+        chunk = b"".join(lines)
+    exited = None
+    try:
+        with open(path + ".exit") as status:
+            exited = int(status.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+    send({"id": rid, "size": size, "cursor": start + len(chunk) if offset is not None else size, "exit_code": exited}, chunk)
+
+
+def op_cancel(rid, req, data):
+    with running_lock:
+        proc = running.get(req["target"])
+    if proc is not None:
+        threading.Thread(target=stop_group, args=(proc, 1.0), daemon=True).start()
+    send({"id": rid, "cancelled": proc is not None})
+
+
+OPS = {
+    "exec": op_exec,
+    "spawn": op_spawn,
+    "read": op_read,
+    "write": op_write,
+    "stat": op_stat,
+    "list": op_list,
+    "kill": op_kill,
+    "tail": op_tail,
+    "cancel": op_cancel,
+}
+
+
+def handle(req, data):
+    rid = req.get("id")
+    op = OPS.get(req.get("op"))
+    try:
+        if op is None:
+            raise ValueError("unknown op %r" % req.get("op"))
+        op(rid, req, data)
+    except Exception as exc:
+        send({"id": rid, "error": "%s: %s" % (type(exc).__name__, exc)})
+
+
+def main():
+    stdin = sys.stdin.buffer
+    out.write(b"@READY@\n")
+    out.flush()
+    while True:
+        head = read_exact(stdin, HEAD.size)
+        if head is None:
+            break
+        body_size, data_size = HEAD.unpack(head)
+        body = read_exact(stdin, body_size)
+        data = read_exact(stdin, data_size)
+        if body is None or data is None:
+            break
+        req = json.loads(body.decode("utf-8"))
+        threading.Thread(target=handle, args=(req, data), daemon=True).start()
+    # The client is gone: stop the commands it was waiting for. Spawned
+    # processes run in their own sessions and are left alone.
+    with running_lock:
+        procs = list(running.values())
+    for proc in procs:
+        stop_group(proc, 1.0)
+
+
+main()
+"""
+
+AGENT_SOURCE = _AGENT_TEMPLATE.replace("@READY@", AGENT_READY_LINE)
+
+
+def python_script_command(
+    path: str, python: str = "python3", args: Sequence[str] = ()
+) -> List[str]:
+    """Argv that runs the cached Python program at ``path`` with ``python``."""
+    interpreter = shlex.quote(python)
+    argv = " ".join(shlex.quote(part) for part in [path, *args])
+    command = (
+        f"if command -v {interpreter} >/dev/null 2>&1; then exec {interpreter} -u {argv}; fi; "
+        f"echo {shlex.quote(python + ' is not installed in the container')} >&2; exit 127"
+    )
+    return ["bash", "-c", guard_command(path, command, missing_exit_code=127)]
+
+
+def agent_job_log(token: str) -> str:
+    return f"{AGENT_JOB_DIR}/{token}.log"
+
+
+def encode_frame(header: Dict[str, Any], data: bytes = b"") -> bytes:
+    body = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return _FRAME_HEAD.pack(len(body), len(data)) + body + data
+
+
+def frame_id(header: Dict[str, Any]) -> int:
+    """
+    The call id a response frame answers. Every request carries an integer
+    id, so a frame without one means the stream is out of step; raise
+    ``ValueError`` rather than drop it and leave its call waiting.
+    """
+    rid = header.get("id")
+    if not isinstance(rid, int) or isinstance(rid, bool):
+        raise ValueError(f"agent sent a frame without a call id: {header!r:.200}")
+    return rid
+
+
+def split_frame(frame: bytes, size: int = AGENT_SEND_CHUNK) -> List[bytes]:
+    return [frame[i : i + size] for i in range(0, len(frame), size)] or [b""]
+
+
+class AgentStream:
+    """
+    Decoder for the agent's stdout.
+
+    Until the ready line arrives the output is kept as startup text (shell
+    errors, the script cache's missing marker); after it, complete frames
+    are returned from ``feed`` as ``(header, payload)`` pairs.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.startup = bytearray()
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[Dict[str, Any], bytes]]:
+        if not self.ready:
+            self.startup.extend(data)
+            marker = (AGENT_READY_LINE + "\n").encode("utf-8")
+            position = self.startup.find(marker)
+            if position < 0:
+                del self.startup[:-_STARTUP_OUTPUT_LIMIT]
+                return []
+            self.ready = True
+            data = bytes(self.startup[position + len(marker) :])
+            del self.startup[position:]
+        self._buffer.extend(data)
+        frames = []
+        while len(self._buffer) >= _FRAME_HEAD.size:
+            body_size, data_size = _FRAME_HEAD.unpack_from(self._buffer)
+            end = _FRAME_HEAD.size + body_size + data_size
+            if len(self._buffer) < end:
+                break
+            body = bytes(self._buffer[_FRAME_HEAD.size : _FRAME_HEAD.size + body_size])
+            payload = bytes(self._buffer[_FRAME_HEAD.size + body_size : end])
+            del self._buffer[:end]
+            frames.append((json.loads(body.decode("utf-8")), payload))
+        return frames
+
+    def startup_text(self) -> str:
+        return bytes(self.startup).decode("utf-8", errors="replace").strip()
+
+
+class AgentCall:
+    """
+    One request in flight: collects its output frames into ``capture`` (or
+    a plain buffer) until the final frame arrives. Frames marked
+    ``"stream": "stderr"`` go to ``stderr`` when it is given.
+    """
+
+    def __init__(
+        self,
+        capture: Optional[OutputCapture] = None,
+        stderr: Optional[OutputCapture] = None,
+    ):
+        self.capture = capture
+        self.stderr = stderr
+        self.data = bytearray()
+        self.header: Optional[Dict[str, Any]] = None
+        self.error_message = ""
+
+    def add(self, header: Dict[str, Any], payload: bytes) -> bool:
+        """Take one response frame; True once the call is complete."""
+        if self.stderr is not None and header.get("stream") == "stderr":
+            self.stderr.write(payload)
+        elif self.capture is not None:
+            self.capture.write(payload)
+        else:
+            self.data.extend(payload)
+        if header.get("more"):
+            return False
+        self.header = header
+        self.error_message = header.get("error") or ""
+        return True
+
+    def fail(self, message: str) -> None:
+        self.error_message = message
+
+
+def exec_request(
+    argv: Sequence[str],
+    cwd: Optional[str],
+    timeout: Optional[float],
+    grace: float,
+) -> Dict[str, Any]:
+    return {
+        "op": "exec",
+        "argv": list(argv),
+        "cwd": cwd,
+        "timeout": timeout,
+        "grace": grace,
+    }
+
+
+def command_result(call: AgentCall, request_id: str) -> CommandResult:
+    """Turn a finished exec call into a ``CommandResult``."""
+    capture = call.capture
+    header = call.header or {}
+    if capture is not None:
+        capture.close()
+    return CommandResult(
+        request_id=request_id,
+        success=not call.error_message,
+        output=capture.text() if capture is not None else "",
+        error_message=call.error_message,
+        transport=TRANSPORT_AGENT,
+        exit_code=header.get("exit_code"),
+        truncated=capture.truncated if capture is not None else False,
+        total_bytes=capture.total_bytes if capture is not None else 0,
+        output_file=capture.spill_path if capture is not None else "",
+        terminated=bool(header.get("terminated")),
+    )
+
+
+def operation_result(call: AgentCall, request_id: str, data: Any) -> OperationResult:
+    """``OperationResult`` for a finished call; ``data`` is used on success."""
+    if call.error_message:
+        return OperationResult(
+            request_id=request_id, success=False, error_message=call.error_message
+        )
+    return OperationResult(request_id=request_id, success=True, data=data)
+
+
+def call_fields(call: AgentCall) -> Dict[str, Any]:
+    """The final frame's fields, without the request id."""
+    fields = dict(call.header or {})
+    fields.pop("id", None)
+    return fields
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import shlex
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .models import (
+    BATCH_MODE_PARALLEL,
+    BATCH_MODE_SEQUENTIAL,
+    BATCH_MODES,
+    CommandResult,
+)
+
+
+_FRAME_PREFIX = "__ECI_BATCH_"
+
+
+def validate_batch_mode(mode: str) -> str:
+    """Return an error message for an unknown mode, or an empty string."""
+    if mode in BATCH_MODES:
+        return ""
+    return f"mode must be one of {', '.join(BATCH_MODES)}"
+
+
+def build_batch_script(
+    commands: Sequence[str],
+    mode: str = BATCH_MODE_SEQUENTIAL,
+    stop_on_error: bool = False,
+    exec_dir: Optional[str] = None,
+) -> Tuple[str, str]:
+    """
+    Build one bash script that runs ``commands`` and reports each result.
+
+    Each command runs in its own ``bash`` with stdout, stderr and exit code
+    captured to files. Results are then printed as frames: a header line
+    ``<marker> <index> <exit code>`` followed by one line of base64 stdout
+    and one of base64 stderr, so command output can never be mistaken for
+    framing. The marker carries a random nonce.
+
+    Returns:
+        Tuple of (marker, script).
+    """
+    marker = f"{_FRAME_PREFIX}{uuid.uuid4().hex}__"
+    lines = [
+        '__eci_d=$(mktemp -d "${TMPDIR:-/tmp}/.eci_batch.XXXXXX") || exit 1',
+        "trap 'rm -rf \"$__eci_d\"' EXIT",
+        "__eci_emit() {",
+        '  [ -f "$__eci_d/$1.rc" ] || return 0',
+        f'  printf \'%s %s %s\\n\' {marker} "$1" "$(cat "$__eci_d/$1.rc")"',
+        "  base64 < \"$__eci_d/$1.out\" | tr -d '\\n'; echo",
+        "  base64 < \"$__eci_d/$1.err\" | tr -d '\\n'; echo",
+        "}",
+    ]
+    for index, command in enumerate(commands):
+        if exec_dir:
+            command = f"cd {shlex.quote(exec_dir)} && {command}"
+        encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+        lines.append(f'echo {encoded} | base64 -d > "$__eci_d/{index}.sh"')
+
+    def run(index: int) -> str:
+        files = f'"$__eci_d/{index}'
+        return (
+            f'bash {files}.sh" > {files}.out" 2> {files}.err" < /dev/null; '
+            f'echo $? > {files}.rc"'
+        )
+
+    if mode == BATCH_MODE_PARALLEL:
+        # Output is emitted after ``wait`` so frames never interleave.
+        for index in range(len(commands)):
+            lines.append(f"{{ {run(index)}; }} &")
+        lines.append("wait")
+        lines.extend(f"__eci_emit {index}" for index in range(len(commands)))
+    else:
+        # Sequential results are emitted as they finish, so a timeout
+        # still returns the commands that completed.
+        for index in range(len(commands)):
+            step = f"{run(index)}; __eci_emit {index}"
+            if stop_on_error:
+                step = (
+                    f'if [ -z "$__eci_stop" ]; then {step}; '
+                    f'[ "$(cat "$__eci_d/{index}.rc")" = 0 ] || __eci_stop=1; fi'
+                )
+            lines.append(step)
+    return marker, "\n".join(lines) + "\n"
+
+
+def parse_batch_output(
+    output: str,
+    marker: str,
+    count: int,
+    transport: str = "",
+    truncated: bool = False,
+) -> List[CommandResult]:
+    """
+    Split framed batch output into one ``CommandResult`` per command.
+
+    As with ``bash``, ``success`` means the command ran and its status is
+    in ``exit_code``. A command without a frame did not run, or its frame
+    was in the part of a ``truncated`` output that was dropped; the two
+    cases are reported separately.
+    """
+    frames: Dict[int, Tuple[int, str, str]] = {}
+    lines = output.splitlines()
+    for position, line in enumerate(lines):
+        if not line.startswith(marker):
+            continue
+        parts = line.split()
+        if len(parts) != 3 or position + 2 >= len(lines):
+            continue
+        try:
+            index, exit_code = int(parts[1]), int(parts[2])
+            stdout = _decode(lines[position + 1])
+            stderr = _decode(lines[position + 2])
+        except (ValueError, binascii.Error):
+            continue
+        frames[index] = (exit_code, stdout, stderr)
+
+    if truncated:
+        missing = CommandResult(
+            success=False,
+            error_message="Result lost: the batch output was truncated; "
+            "run fewer commands per batch or reduce their output",
+            transport=transport,
+            truncated=True,
+        )
+    else:
+        missing = CommandResult(
+            success=False,
+            error_message="Command did not run (an earlier command "
+            "failed or the batch ended early)",
+            transport=transport,
+        )
+    results = []
+    for index in range(count):
+        frame = frames.get(index)
+        if frame is None:
+            results.append(missing)
+            continue
+        exit_code, stdout, stderr = frame
+        results.append(
+            CommandResult(
+                success=True,
+                output=stdout,
+                stderr=stderr,
+                exit_code=exit_code,
+                transport=transport,
+            )
+        )
+    return results
+
+
+def _decode(line: str) -> str:
+    return base64.b64decode(line.strip(), validate=True).decode(
+        "utf-8", errors="replace"
+    )
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from .models import BroadcastItem, BroadcastSummary, CommandResult
+
+
+DEFAULT_BROADCAST_CONCURRENCY = 16
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to pace ExecContainerCommand calls.
+
+    ``reserve()`` takes a token and returns how long the caller must wait
+    before using it, so sync and async callers can sleep their own way.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class BroadcastStats:
+    """Accumulates per-sandbox items into a ``BroadcastSummary``."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self._started = time.monotonic()
+        self._latencies: List[float] = []
+        self._succeeded = 0
+        self._timed_out = 0
+        self._failed_ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, item: BroadcastItem) -> None:
+        with self._lock:
+            self._latencies.append(item.elapsed)
+            if item.timed_out:
+                self._timed_out += 1
+            if item.success:
+                self._succeeded += 1
+            else:
+                self._failed_ids.append(item.sandbox_id)
+
+    def summary(self) -> BroadcastSummary:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return BroadcastSummary(
+                total=self.total,
+                succeeded=self._succeeded,
+                failed=len(self._failed_ids),
+                timed_out=self._timed_out,
+                elapsed=time.monotonic() - self._started,
+                latency_p50=_percentile(latencies, 0.50),
+                latency_p95=_percentile(latencies, 0.95),
+                latency_max=latencies[-1] if latencies else 0.0,
+                failed_ids=list(self._failed_ids),
+            )
+
+
+def unique_ids(sandbox_ids: Iterable[str]) -> List[str]:
+    """Drop empty and duplicate ids, keeping first-seen order."""
+    return list(dict.fromkeys(sid for sid in sandbox_ids if sid))
+
+
+def timed_out_item(sandbox_id: str, timeout: float, elapsed: float) -> BroadcastItem:
+    return BroadcastItem(
+        sandbox_id=sandbox_id,
+        result=CommandResult(
+            success=False, error_message=f"Timed out after {timeout:g}s"
+        ),
+        elapsed=elapsed,
+        timed_out=True,
+    )
+
+
+def failed_item(sandbox_id: str, exc: BaseException, elapsed: float) -> BroadcastItem:
+    return BroadcastItem(
+        sandbox_id=sandbox_id,
+        result=CommandResult(success=False, error_message=f"Broadcast failed: {exc}"),
+        elapsed=elapsed,
+    )
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import tempfile
+from typing import IO, Optional, Union
+
+from .config import CaptureLimits
+
+
+class OutputCapture:
+    """
+    Collects a command's output stream within fixed memory.
+
+    The first ``head_bytes`` are kept as they arrive and the most recent
+    ``tail_bytes`` in a buffer that is trimmed once it grows to twice that
+    size, so memory stays bounded however much the command prints. Bytes in
+    between are only counted (and written to the spill file, if enabled).
+    """
+
+    def __init__(self, limits: Optional[CaptureLimits] = None):
+        limits = limits or CaptureLimits()
+        self._head_limit = limits.head_bytes
+        self._tail_limit = limits.tail_bytes
+        self._head = bytearray()
+        self._tail = bytearray()
+        self.total_bytes = 0
+        self._spill_to_file = limits.spill_to_file
+        self._spill_dir = limits.spill_dir
+        self._spill: Optional[IO[bytes]] = None
+        self.spill_path = ""
+
+    def write(self, data: Union[bytes, str]) -> None:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data:
+            return
+        self.total_bytes += len(data)
+        if self._spill_to_file:
+            if self._spill is None:
+                # Opened on first output so failed connects leave no file.
+                self._spill = tempfile.NamedTemporaryFile(
+                    prefix="eci-output-",
+                    suffix=".log",
+                    dir=self._spill_dir,
+                    delete=False,
+                )
+                self.spill_path = self._spill.name
+            self._spill.write(data)
+        room = self._head_limit - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+            if not data:
+                return
+        if self._tail_limit <= 0:
+            return
+        self._tail += data
+        if len(self._tail) > 2 * self._tail_limit:
+            del self._tail[: -self._tail_limit]
+
+    @property
+    def dropped_bytes(self) -> int:
+        kept = len(self._head) + min(len(self._tail), self._tail_limit)
+        return self.total_bytes - kept
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped_bytes > 0
+
+    def text(self) -> str:
+        """The kept output, with a marker where bytes were dropped."""
+        tail = bytes(self._tail[-self._tail_limit :]) if self._tail_limit else b""
+        if not self.truncated:
+            return (bytes(self._head) + tail).decode("utf-8", errors="replace")
+        marker = f"\n... [{self.dropped_bytes} bytes truncated] ...\n"
+        return (
+            bytes(self._head).decode("utf-8", errors="replace")
+            + marker
+            + tail.decode("utf-8", errors="replace")
+        )
+
+    def close(self) -> None:
+        """Flush and close the spill file; further writes are not spilled."""
+        self._spill_to_file = False
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import zlib
+from typing import Any, List, Optional, Sequence
+
+
+# A compressing launcher prints "<CODEC_HEADER> <codec>" as its first line
+# of stdout, then the command's output piped through that codec's tool.
+CODEC_HEADER = "__ECI_CODEC__"
+CODEC_ZSTD = "zstd"
+CODEC_GZIP = "gzip"
+CODEC_IDENTITY = "identity"
+
+# Fast levels: the aim is fewer bytes on the wire, not the smallest output.
+_COMPRESSORS = {
+    CODEC_ZSTD: "zstd -q -1 -c",
+    CODEC_GZIP: "gzip -1 -c",
+}
+
+
+def client_codecs() -> List[str]:
+    """
+    Codecs this process can decode, best first. zstd needs the optional
+    ``zstandard`` package; gzip is always available.
+    """
+    codecs = []
+    try:
+        import zstandard  # pyright: ignore[reportMissingImports]  # noqa: F401
+
+        codecs.append(CODEC_ZSTD)
+    except ImportError:
+        pass
+    codecs.append(CODEC_GZIP)
+    return codecs
+
+
+def compressor_setup(codecs: Sequence[str]) -> str:
+    """
+    Shell snippet that sets ``$__eci_c`` to the first of ``codecs`` whose
+    tool is installed in the container and ``$__eci_z`` to its filter
+    command, falling back to ``identity`` and ``cat``.
+    """
+    branches = [
+        f"command -v {_COMPRESSORS[codec].split()[0]} >/dev/null 2>&1; "
+        f"then __eci_c={codec}; __eci_z='{_COMPRESSORS[codec]}'"
+        for codec in codecs
+        if codec in _COMPRESSORS
+    ]
+    fallback = f"__eci_c={CODEC_IDENTITY}; __eci_z=cat"
+    if not branches:
+        return fallback
+    return "if " + "; elif ".join(branches) + f"; else {fallback}; fi"
+
+
+def codec_line() -> str:
+    """Shell command that prints the codec line chosen by ``compressor_setup``."""
+    return f'echo "{CODEC_HEADER} $__eci_c"'
+
+
+def parse_codec_line(line: str) -> Optional[str]:
+    """The codec named by a codec line, or None if ``line`` is not one."""
+    parts = line.split()
+    if len(parts) == 2 and parts[0] == CODEC_HEADER:
+        return parts[1]
+    return None
+
+
+class Decompressor:
+    """
+    Incremental decoder for one codec's output.
+
+    Concatenated gzip members or zstd frames are decoded one after another;
+    ``identity`` passes data through.
+    """
+
+    def __init__(self, codec: str):
+        self.codec = codec
+        self._state = self._new()
+
+    def _new(self) -> Any:
+        if self.codec == CODEC_GZIP:
+            return zlib.decompressobj(wbits=31)
+        if self.codec == CODEC_ZSTD:
+            import zstandard  # pyright: ignore[reportMissingImports]
+
+            return zstandard.ZstdDecompressor().decompressobj()
+        if self.codec == CODEC_IDENTITY:
+            return None
+        raise ValueError(f"Unsupported output codec: {self.codec}")
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._state is None:
+            return data
+        chunks = []
+        while data:
+            chunks.append(self._state.decompress(data))
+            if not getattr(self._state, "eof", False):
+                break
+            data = self._state.unused_data
+            self._state = self._new()
+        return b"".join(chunks)
+
+
+def decompress_payload(codec: str, data: bytes) -> bytes:
+    """Decode a complete payload compressed with ``codec``."""
+    try:
+        return Decompressor(codec).decompress(data)
+    except Exception as exc:
+        raise ValueError(f"Corrupt {codec} payload: {exc}") from exc
+
+
+class DecompressingOutput:
+    """
+    Output sink for a compressing launcher.
+
+    Reads the codec line, then decompresses the rest of the stream into
+    ``inner`` as it arrives. Lines printed before the codec line (a login
+    shell's profile, say) are passed through unchanged.
+    """
+
+    def __init__(self, inner: Any):
+        self._inner = inner
+        self._pending = bytearray()
+        self._decompressor: Optional[Decompressor] = None
+
+    def write(self, data: bytes) -> None:
+        if self._decompressor is None:
+            self._pending.extend(data)
+            data = b""
+            while self._decompressor is None:
+                newline = self._pending.find(b"\n")
+                if newline < 0:
+                    return
+                line = bytes(self._pending[: newline + 1])
+                del self._pending[: newline + 1]
+                codec = parse_codec_line(line.decode("utf-8", errors="replace"))
+                if codec is None:
+                    self._inner.write(line)
+                else:
+                    self._decompressor = Decompressor(codec)
+            data = bytes(self._pending)
+            self._pending.clear()
+        if data:
+            output = self._decompressor.decompress(data)
+            if output:
+                self._inner.write(output)
+
+    def finish(self) -> None:
+        """Pass on anything left over if the codec line never arrived."""
+        if self._decompressor is None and self._pending:
+            self._inner.write(bytes(self._pending))
+            self._pending.clear()
@@ -2,8 +2,6 @@ import os
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-import dotenv
-
 from .logger import get_logger
 
 
@@ -17,6 +15,59 @@ class Config:
         self.region_id = region_id
 
 
+class PoolLimits:
+    """
+    Connection pool limits for the HTTP transport used by the clients.
+
+    Args:
+        max_connections: Upper bound on open connections per endpoint
+        max_keepalive_connections: Idle connections kept alive for reuse
+        keepalive_expiry: Seconds an idle connection is kept before closing
+        http2: Use HTTP/2 when the optional ``httpx[http2]`` extra is installed
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+
+
+class CaptureLimits:
+    """
+    Bounds on the output kept in memory for one exec.
+
+    Only the first ``head_bytes`` and the last ``tail_bytes`` of a stream are
+    kept; anything in between is counted and dropped. With ``spill_to_file``
+    the complete stream is also written to a temporary file whose path is
+    reported as ``CommandResult.output_file``.
+
+    Args:
+        head_bytes: Bytes kept from the start of the output
+        tail_bytes: Bytes kept from the end of the output
+        spill_to_file: Also write the full output to a temporary file
+        spill_dir: Directory for spill files (system temp dir by default)
+    """
+
+    def __init__(
+        self,
+        head_bytes: int = 4 * 1024 * 1024,
+        tail_bytes: int = 4 * 1024 * 1024,
+        spill_to_file: bool = False,
+        spill_dir: Optional[str] = None,
+    ):
+        self.head_bytes = max(0, head_bytes)
+        self.tail_bytes = max(0, tail_bytes)
+        self.spill_to_file = spill_to_file
+        self.spill_dir = spill_dir
+
+
 DEFAULT_REGION = "cn-shanghai"
 
 
@@ -52,6 +103,9 @@ def _find_dotenv_file(start_path: Optional[Path] = None) -> Optional[Path]:
 
 
 def _load_dotenv_with_fallback(custom_env_path: Optional[str] = None) -> None:
+    # Imported here so that `import eci_as_sandbox` stays cheap.
+    import dotenv
+
     if custom_env_path:
         env_path = Path(custom_env_path)
         if env_path.exists():
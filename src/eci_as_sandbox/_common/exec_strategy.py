@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .models import (
+    EXEC_MODE_AUTO,
+    EXEC_MODE_HTTP,
+    EXEC_MODE_WEBSOCKET,
+    EXEC_MODES,
+    SYNC_RESPONSE_MAX_OUTPUT,
+    SYNC_RESPONSE_MAX_SECONDS,
+)
+
+
+# A command is "short" when its measured duration stays under this bound.
+_SHORT_COMMAND_SECONDS = 2.0
+_EWMA_ALPHA = 0.3
+_HISTORY_SIZE = 512
+
+
+class _CommandStats:
+    __slots__ = ("duration", "output_bytes")
+
+    def __init__(self, duration: float, output_bytes: int):
+        self.duration = duration
+        self.output_bytes = output_bytes
+
+
+class ExecStrategy:
+    """
+    Chooses how a synchronous ``exec_command`` collects its output.
+
+    ``http`` asks ECI for an inline ``SyncResponse``: one round trip, but
+    bounded to short commands with small output. ``websocket`` fetches a
+    stream URL and reads it, which costs a second connection but has no
+    such limits.
+
+    In ``auto`` mode a command goes over HTTP only when the caller bounded
+    it with a timeout ECI can honour inline, and previous runs of the same
+    command, if any, were measured to be short and small. Everything else
+    streams. Per-command history is kept in a small LRU.
+    """
+
+    def __init__(self, history_size: int = _HISTORY_SIZE):
+        self._history_size = history_size
+        self._history: "OrderedDict[str, _CommandStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def choose(self, command_key: str, timeout: Optional[float], mode: str) -> str:
+        """Return ``EXEC_MODE_HTTP`` or ``EXEC_MODE_WEBSOCKET`` for a call."""
+        if mode != EXEC_MODE_AUTO:
+            return mode
+        # Without a watchdog inside ECI's window, a run that is slower than
+        # its history would be cut off mid-output; only bounded calls may go
+        # inline.
+        if timeout is None or not 0 < timeout <= SYNC_RESPONSE_MAX_SECONDS:
+            return EXEC_MODE_WEBSOCKET
+        with self._lock:
+            stats = self._history.get(command_key)
+            if stats is not None:
+                self._history.move_to_end(command_key)
+        if stats is not None and (
+            stats.duration > _SHORT_COMMAND_SECONDS
+            or stats.output_bytes > SYNC_RESPONSE_MAX_OUTPUT
+        ):
+            return EXEC_MODE_WEBSOCKET
+        return EXEC_MODE_HTTP
+
+    def record(self, command_key: str, duration: float, output_bytes: int) -> None:
+        """Feed back the measured duration and output size of a call."""
+        with self._lock:
+            stats = self._history.get(command_key)
+            if stats is None:
+                self._history[command_key] = _CommandStats(duration, output_bytes)
+                while len(self._history) > self._history_size:
+                    self._history.popitem(last=False)
+                return
+            self._history.move_to_end(command_key)
+            stats.duration += _EWMA_ALPHA * (duration - stats.duration)
+            stats.output_bytes = max(stats.output_bytes, output_bytes)
+
+
+def validate_exec_mode(mode: str) -> str:
+    """Return an error message for an unknown mode, or an empty string."""
+    if mode in EXEC_MODES:
+        return ""
+    return f"exec_mode must be one of {', '.join(EXEC_MODES)}"
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import codecs
+import shlex
+from typing import Callable, Optional, Tuple
+
+from .capture import OutputCapture
+
+
+# A job that outlives one exec stream (a tmux job, or a streamed exec whose
+# connection dropped) writes its output to a log file in the container.
+# Follow execs stream that log from the byte offset the client has already
+# received and report the outcome on stderr.
+_FOLLOW_HEADER = "__ECI_FOLLOW__"
+FOLLOW_DONE = "done"
+FOLLOW_RUNNING = "running"
+FOLLOW_GONE = "gone"
+# Reported after ``done`` once ``cleanup`` has run.
+_FOLLOW_CLEANED = "cleaned"
+_FOLLOW_SLEEP = 0.2
+# Seconds between the (rarer) liveness checks of the follow loop.
+_FOLLOW_CHECK_EVERY = 1.0
+# Written to a follow exec's stdin to confirm its done report arrived.
+FOLLOW_ACK = "ack\n"
+_FOLLOW_ACK_WAIT = 10
+
+
+def log_follow_script(
+    directory: str,
+    offset: int,
+    seconds: float,
+    alive: str,
+    cleanup: str = "",
+    on_gone: str = "",
+    claim: str = "",
+) -> str:
+    """
+    Script that streams ``<directory>/log`` from byte ``offset`` to stdout
+    until ``<directory>/exit`` appears or ``seconds`` pass.
+
+    ``exit`` must be written only after the log is complete; its first
+    word is the exit code. ``alive`` is a shell test for the job still
+    running, checked about once a second. ``cleanup`` and ``on_gone`` are
+    shell commands run once the job is done or has vanished without an
+    exit status; both may refer to the directory as ``$d``.
+
+    Only log bytes go to stdout, so the caller can resume at exactly the
+    offset it has received. The outcome is reported on stderr as
+    ``<header> <state> [<exit code>]``: ``done`` once the whole log has
+    been sent, ``running`` when time ran out, ``gone`` if the job
+    disappeared. ``cleanup`` runs only after the caller acknowledges the
+    done report by writing ``FOLLOW_ACK`` to stdin, so a follower orphaned
+    by a dropped connection leaves the job to the one that replaces it;
+    ``FollowStatus.cleaned`` tells whether it ran. ``claim`` is a shell
+    test run first; if it fails the job is reported gone and nothing else
+    runs.
+    """
+    check_every = max(1, int(_FOLLOW_CHECK_EVERY / _FOLLOW_SLEEP))
+    report_gone = f'echo "{_FOLLOW_HEADER} {FOLLOW_GONE}" >&3'
+    lines = [
+        "exec 3>&2 2>/dev/null",
+        f"d={shlex.quote(directory)}; off={max(0, int(offset))}; "
+        f"end=$((SECONDS + {max(1, int(seconds))})); i=0",
+    ]
+    if claim:
+        lines.append(f"{{ {claim}; }} || {{ {report_gone}; exit 0; }}")
+    lines.extend(
+        [
+            "while :; do",
+            '  fin=0; [ -f "$d/exit" ] && fin=1',
+            '  size=$(wc -c < "$d/log" 2>/dev/null); size=${size:-0}',
+            '  if [ "$size" -gt "$off" ]; then',
+            '    tail -c +$((off + 1)) "$d/log" | head -c $((size - off)); off=$size',
+            "  fi",
+            "  if [ $fin -eq 1 ]; then",
+            '    read -r rc _ < "$d/exit"',
+            f'    echo "{_FOLLOW_HEADER} {FOLLOW_DONE} $rc" >&3',
+        ]
+    )
+    if cleanup:
+        lines.extend(
+            [
+                f'    if read -r -t {_FOLLOW_ACK_WAIT} ack && [ "$ack" = {FOLLOW_ACK.strip()} ]; then',
+                f"      {cleanup}",
+                f'      echo "{_FOLLOW_HEADER} {_FOLLOW_CLEANED}" >&3',
+                "    fi",
+            ]
+        )
+    gone = f"{report_gone}; "
+    if on_gone:
+        gone += f"{on_gone}; "
+    lines.extend(
+        [
+            "    exit 0",
+            "  fi",
+            f"  if [ $((i % {check_every})) -eq 0 ] && ! {{ {alive}; }}; then",
+            f'    [ -f "$d/exit" ] || {{ {gone}exit 0; }}',
+            "  fi",
+            f'  [ $SECONDS -ge $end ] && {{ echo "{_FOLLOW_HEADER} {FOLLOW_RUNNING}" >&3; exit 0; }}',
+            f"  sleep {_FOLLOW_SLEEP}; i=$((i + 1))",
+            "done",
+        ]
+    )
+    return "\n".join(lines)
+
+
+def parse_follow_status(output: str) -> Tuple[str, Optional[int]]:
+    """Read ``log_follow_script``'s stderr report: (state, exit code)."""
+    for line in (output or "").split("\n"):
+        parts = line.split()
+        if len(parts) >= 2 and parts[0] == _FOLLOW_HEADER:
+            exit_code = None
+            if len(parts) > 2:
+                try:
+                    exit_code = int(parts[2])
+                except ValueError:
+                    pass
+            return parts[1], exit_code
+    return "", None
+
+
+class FollowStatus:
+    """
+    Stderr sink for a follow exec.
+
+    Calls ``on_done`` as soon as a complete done report arrives, so the
+    caller can acknowledge it while the exec is still waiting.
+    """
+
+    def __init__(self, on_done: Callable[[], None]):
+        self._buffer = bytearray()
+        self._on_done = on_done
+        self._acknowledged = False
+
+    def write(self, data: bytes) -> None:
+        self._buffer.extend(data)
+        if not self._acknowledged and self.result()[0] == FOLLOW_DONE:
+            self._acknowledged = True
+            self._on_done()
+
+    @property
+    def cleaned(self) -> bool:
+        """Whether the follow exec reported that its cleanup ran."""
+        return f"{_FOLLOW_HEADER} {_FOLLOW_CLEANED}\n".encode() in self._buffer
+
+    def result(self) -> Tuple[str, Optional[int]]:
+        """The reported (state, exit code); complete lines only."""
+        complete = bytes(self._buffer[: self._buffer.rfind(b"\n") + 1])
+        return parse_follow_status(complete.decode("utf-8", errors="replace"))
+
+
+class JobOutput:
+    """
+    Output sink for a followed job.
+
+    Counts the log bytes received so far (the offset to resume from after a
+    reconnect), keeps them in an ``OutputCapture`` and passes decoded text
+    to ``on_output`` as it arrives.
+    """
+
+    def __init__(
+        self,
+        capture: OutputCapture,
+        on_output: Optional[Callable[[str], None]] = None,
+    ):
+        self.capture = capture
+        self.offset = 0
+        self._on_output = on_output
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def write(self, data: bytes) -> None:
+        self.capture.write(data)
+        self.offset += len(data)
+        if self._on_output is not None:
+            text = self._decoder.decode(data)
+            if text:
+                self._on_output(text)
+
+    def close(self) -> None:
+        if self._on_output is not None:
+            text = self._decoder.decode(b"", final=True)
+            if text:
+                self._on_output(text)
+        self.capture.close()
@@ -1,47 +1,92 @@
 import logging
-from typing import Any, Dict, Optional
+import random
+from typing import Any, Optional
 
 
-_LOGGING_CONFIGURED = False
+_ROOT_LOGGER_NAME = "eci-as-sandbox"
 
+# Library logging: never touch the host application's root logger. A
+# NullHandler keeps "No handlers could be found" warnings away while leaving
+# all output decisions to the application.
+logging.getLogger(_ROOT_LOGGER_NAME).addHandler(logging.NullHandler())
 
-def _configure_logging() -> None:
-    global _LOGGING_CONFIGURED
-    if _LOGGING_CONFIGURED:
-        return
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-    )
-    _LOGGING_CONFIGURED = True
+_api_logger = logging.getLogger(f"{_ROOT_LOGGER_NAME}.api")
+_error_logger = logging.getLogger(_ROOT_LOGGER_NAME)
+
+# Fraction of API call/response events emitted while debug logging is on.
+_api_sample_rate = 1.0
+# The handler ``configure_logging`` installed, replaced on the next call.
+_configured_handler: Optional[logging.Handler] = None
 
 
 def get_logger(name: str) -> logging.Logger:
-    _configure_logging()
     return logging.getLogger(name)
 
 
-def _log_api_call(api_name: str, details: str) -> None:
-    logger = get_logger("eci-as-sandbox.api")
-    logger.info("Call %s: %s", api_name, details)
+def configure_logging(
+    level: int = logging.DEBUG,
+    sample_rate: float = 1.0,
+    handler: Optional[logging.Handler] = None,
+) -> None:
+    """
+    Opt in to eci-as-sandbox log output.
+
+    Args:
+        level: Level for the ``eci-as-sandbox`` logger hierarchy
+        sample_rate: Fraction (0-1] of per-call API events to emit; errors are
+            never sampled
+        handler: Optional handler to attach (a stderr StreamHandler is added
+            when omitted and the logger has no real handler yet). It
+            replaces the handler attached by a previous call.
+    """
+    global _api_sample_rate, _configured_handler
+    _api_sample_rate = min(max(sample_rate, 0.0), 1.0)
+
+    logger = logging.getLogger(_ROOT_LOGGER_NAME)
+    logger.setLevel(level)
+    if handler is None:
+        if any(not isinstance(h, logging.NullHandler) for h in logger.handlers):
+            return
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+    if _configured_handler is not None and _configured_handler is not handler:
+        logger.removeHandler(_configured_handler)
+    _configured_handler = handler
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
+
+
+def _api_event_enabled() -> bool:
+    """Cheap guard for call sites that would otherwise build log arguments."""
+    if not _api_logger.isEnabledFor(logging.DEBUG):
+        return False
+    return _api_sample_rate >= 1.0 or random.random() < _api_sample_rate
+
+
+def _log_api_call(api_name: str, details: str, *args: Any) -> None:
+    if not _api_event_enabled():
+        return
+    _api_logger.debug("Call %s: " + details, api_name, *args)
 
 
 def _log_api_response(
     api_name: str,
     request_id: str,
     success: bool,
-    key_fields: Optional[Dict[str, Any]] = None,
+    **key_fields: Any,
 ) -> None:
-    logger = get_logger("eci-as-sandbox.api")
+    # Callers check ``_api_event_enabled()`` first, so the keyword arguments
+    # are never built while API logging is off.
     summary = "ok" if success else "failed"
     if key_fields:
-        logger.info(
+        _api_logger.debug(
             "%s %s request_id=%s details=%s", api_name, summary, request_id, key_fields
         )
     else:
-        logger.info("%s %s request_id=%s", api_name, summary, request_id)
+        _api_logger.debug("%s %s request_id=%s", api_name, summary, request_id)
 
 
 def _log_operation_error(operation: str, message: str, exc_info: bool = False) -> None:
-    logger = get_logger("eci-as-sandbox")
-    logger.error("%s error: %s", operation, message, exc_info=exc_info)
+    _error_logger.error("%s error: %s", operation, message, exc_info=exc_info)
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .._async.sandbox import AsyncSandbox
@@ -10,13 +10,38 @@ if TYPE_CHECKING:
 TMUX_SESSION_PREFIX = "eci_cmd_"
 TMUX_HISTORY_LIMIT = 50000
 TMUX_OUTPUT_TAIL_LINES = 10000
-TMUX_MARKER_EXIT_CODE = "__ECI_MARKER_EXIT_CODE__"
+TMUX_MARKER_EXIT_CODE = (
+    "__ECI_MARKER_EXIT_CODE__"  # No longer printed; jobs write an exit file
+)
 
 # Polling Strategy Constants
 TMUX_POLL_INITIAL_DELAY = 0.1  # 100ms
 TMUX_POLL_MAX_DELAY = 5.0  # 5 seconds
 TMUX_POLL_BACKOFF_FACTOR = 1.5
 TMUX_DEFAULT_TIMEOUT = 600.0  # 10 minutes
+RUN_LONG_DETACH_AFTER = 300.0  # run_long reconnects at least this often
+
+# Exec output collection modes
+EXEC_MODE_AUTO = "auto"  # Pick per call from timeout and measured history
+EXEC_MODE_HTTP = "http"  # Inline SyncResponse, one round trip
+EXEC_MODE_WEBSOCKET = "websocket"  # Stream output over the exec WebSocket
+EXEC_MODES = (EXEC_MODE_AUTO, EXEC_MODE_HTTP, EXEC_MODE_WEBSOCKET)
+SYNC_RESPONSE_MAX_SECONDS = 10.0  # ECI cuts off inline sync execs after ~10s
+SYNC_RESPONSE_MAX_OUTPUT = 8 * 1024  # Larger outputs are streamed instead
+DEFAULT_RECONNECT_RETRIES = 3  # Reattempts to resume a dropped exec stream
+
+# Command transports (how a command reaches the container)
+ECI_COMMAND_MAX_BYTES = 2048  # ExecContainerCommand limit on the command JSON
+TRANSPORT_INLINE = "inline"  # base64 script in argv
+TRANSPORT_GZIP = "gzip"  # gzip + base64 script in argv
+TRANSPORT_STDIN = "stdin"  # Script streamed over the exec WebSocket's stdin
+TRANSPORT_UPLOAD = "upload"  # Script written to a file, then executed
+TRANSPORT_AGENT = "agent"  # Run by the helper agent (see ``start_agent``)
+
+# bash_batch modes
+BATCH_MODE_SEQUENTIAL = "sequential"  # One after another, in order
+BATCH_MODE_PARALLEL = "parallel"  # All at once, results reported in order
+BATCH_MODES = (BATCH_MODE_SEQUENTIAL, BATCH_MODE_PARALLEL)
 
 
 class TmuxCommandStatus(Enum):
@@ -28,15 +53,58 @@ class TmuxCommandStatus(Enum):
     ERROR = "error"  # Error occurred during polling
 
 
-class ApiResponse:
+_set = object.__setattr__
+
+
+class _Record:
+    """
+    Base for slotted, immutable result types.
+
+    Fields are assigned once in ``__init__`` through ``_set``; later
+    assignment raises ``AttributeError``.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = {}
+        for klass in type(self).__mro__:
+            for name in getattr(klass, "__slots__", ()):
+                if hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            _set(self, name, value)
+
+
+class ApiResponse(_Record):
+    __slots__ = ("request_id",)
+
     def __init__(self, request_id: str = ""):
-        self.request_id = request_id
+        _set(self, "request_id", request_id)
 
     def get_request_id(self) -> str:
         return self.request_id
 
 
 class OperationResult(ApiResponse):
+    __slots__ = (
+        "success",
+        "data",
+        "error_message",
+        "code",
+        "message",
+        "http_status_code",
+    )
+
     def __init__(
         self,
         request_id: str = "",
@@ -48,15 +116,17 @@ class OperationResult(ApiResponse):
         http_status_code: int = 0,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.data = data
-        self.error_message = error_message
-        self.code = code
-        self.message = message
-        self.http_status_code = http_status_code
+        _set(self, "success", success)
+        _set(self, "data", data)
+        _set(self, "error_message", error_message)
+        _set(self, "code", code)
+        _set(self, "message", message)
+        _set(self, "http_status_code", http_status_code)
 
 
 class SandboxResult(ApiResponse):
+    __slots__ = ("success", "error_message", "sandbox")
+
     def __init__(
         self,
         request_id: str = "",
@@ -65,12 +135,14 @@ class SandboxResult(ApiResponse):
         sandbox: Optional["Sandbox"] = None,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.error_message = error_message
-        self.sandbox = sandbox
+        _set(self, "success", success)
+        _set(self, "error_message", error_message)
+        _set(self, "sandbox", sandbox)
 
 
 class AsyncSandboxResult(ApiResponse):
+    __slots__ = ("success", "error_message", "sandbox")
+
     def __init__(
         self,
         request_id: str = "",
@@ -79,12 +151,21 @@ class AsyncSandboxResult(ApiResponse):
         sandbox: Optional["AsyncSandbox"] = None,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.error_message = error_message
-        self.sandbox = sandbox
+        _set(self, "success", success)
+        _set(self, "error_message", error_message)
+        _set(self, "sandbox", sandbox)
 
 
 class SandboxListResult(ApiResponse):
+    __slots__ = (
+        "success",
+        "error_message",
+        "sandbox_ids",
+        "next_token",
+        "max_results",
+        "total_count",
+    )
+
     def __init__(
         self,
         request_id: str = "",
@@ -96,15 +177,17 @@ class SandboxListResult(ApiResponse):
         total_count: int = 0,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.error_message = error_message
-        self.sandbox_ids = sandbox_ids or []
-        self.next_token = next_token
-        self.max_results = max_results
-        self.total_count = total_count
+        _set(self, "success", success)
+        _set(self, "error_message", error_message)
+        _set(self, "sandbox_ids", sandbox_ids or [])
+        _set(self, "next_token", next_token)
+        _set(self, "max_results", max_results)
+        _set(self, "total_count", total_count)
 
 
 class DeleteResult(ApiResponse):
+    __slots__ = ("success", "error_message", "code", "message", "http_status_code")
+
     def __init__(
         self,
         request_id: str = "",
@@ -115,14 +198,16 @@ class DeleteResult(ApiResponse):
         http_status_code: int = 0,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.error_message = error_message
-        self.code = code
-        self.message = message
-        self.http_status_code = http_status_code
+        _set(self, "success", success)
+        _set(self, "error_message", error_message)
+        _set(self, "code", code)
+        _set(self, "message", message)
+        _set(self, "http_status_code", http_status_code)
 
 
 class GetSandboxResult(ApiResponse):
+    __slots__ = ("success", "error_message", "data")
+
     def __init__(
         self,
         request_id: str = "",
@@ -131,12 +216,28 @@ class GetSandboxResult(ApiResponse):
         data: Optional["SandboxInfo"] = None,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.error_message = error_message
-        self.data = data
+        _set(self, "success", success)
+        _set(self, "error_message", error_message)
+        _set(self, "data", data)
 
 
 class CommandResult(ApiResponse):
+    __slots__ = (
+        "success",
+        "output",
+        "error_message",
+        "http_url",
+        "websocket_url",
+        "transport",
+        "exit_code",
+        "stderr",
+        "truncated",
+        "total_bytes",
+        "output_file",
+        "terminated",
+        "reconnects",
+    )
+
     def __init__(
         self,
         request_id: str = "",
@@ -145,34 +246,99 @@ class CommandResult(ApiResponse):
         error_message: str = "",
         http_url: str = "",
         websocket_url: str = "",
+        transport: str = "",
+        exit_code: Optional[int] = None,
+        stderr: str = "",
+        truncated: bool = False,
+        total_bytes: int = 0,
+        output_file: str = "",
+        terminated: bool = False,
+        reconnects: int = 0,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.output = output
-        self.error_message = error_message
-        self.http_url = http_url
-        self.websocket_url = websocket_url
+        _set(self, "success", success)
+        _set(self, "output", output)
+        _set(self, "error_message", error_message)
+        _set(self, "http_url", http_url)
+        _set(self, "websocket_url", websocket_url)
+        _set(self, "transport", transport)
+        _set(self, "exit_code", exit_code)
+        _set(self, "stderr", stderr)
+        _set(self, "truncated", truncated)
+        _set(self, "total_bytes", total_bytes)
+        _set(self, "output_file", output_file)
+        _set(self, "terminated", terminated)
+        _set(self, "reconnects", reconnects)
+
+
+class BatchResult(ApiResponse):
+    """Per-command results of ``bash_batch``, in the order given."""
+
+    __slots__ = ("success", "results", "error_message", "transport")
+
+    def __init__(
+        self,
+        request_id: str = "",
+        success: bool = False,
+        results: Optional[List[CommandResult]] = None,
+        error_message: str = "",
+        transport: str = "",
+    ):
+        super().__init__(request_id)
+        _set(self, "success", success)
+        _set(self, "results", results or [])
+        _set(self, "error_message", error_message)
+        _set(self, "transport", transport)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __iter__(self) -> Iterator[CommandResult]:
+        return iter(self.results)
+
+    def __getitem__(self, index: int) -> CommandResult:
+        return self.results[index]
 
 
 class TmuxStartResult(ApiResponse):
     """Result of starting a tmux command."""
 
+    __slots__ = ("success", "session_id", "error_message", "transport", "status")
+
     def __init__(
         self,
         request_id: str = "",
         success: bool = False,
         session_id: str = "",
         error_message: str = "",
+        transport: str = "",
+        status: TmuxCommandStatus = TmuxCommandStatus.ERROR,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.session_id = session_id
-        self.error_message = error_message
+        _set(self, "success", success)
+        _set(self, "session_id", session_id)
+        _set(self, "error_message", error_message)
+        _set(self, "transport", transport)
+        # RUNNING once the session is confirmed, COMPLETED if the job had
+        # already finished by then.
+        _set(self, "status", status)
 
 
 class TmuxPollResult(ApiResponse):
     """Result of polling a tmux command."""
 
+    __slots__ = (
+        "success",
+        "status",
+        "exit_code",
+        "output",
+        "output_truncated",
+        "error_message",
+        "cursor",
+        "started_at",
+        "finished_at",
+    )
+
     def __init__(
         self,
         request_id: str = "",
@@ -182,31 +348,252 @@ class TmuxPollResult(ApiResponse):
         output: str = "",
         output_truncated: bool = False,
         error_message: str = "",
+        cursor: int = 0,
+        started_at: Optional[int] = None,
+        finished_at: Optional[int] = None,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.status = status
-        self.exit_code = exit_code
-        self.output = output
-        self.output_truncated = output_truncated
-        self.error_message = error_message
+        _set(self, "success", success)
+        _set(self, "status", status)
+        _set(self, "exit_code", exit_code)
+        _set(self, "output", output)
+        _set(self, "output_truncated", output_truncated)
+        _set(self, "error_message", error_message)
+        # Job log offset reached by this poll; pass it back to read only
+        # newer output.
+        _set(self, "cursor", cursor)
+        # Job start and end times (epoch seconds), when known.
+        _set(self, "started_at", started_at)
+        _set(self, "finished_at", finished_at)
 
 
 class TmuxKillResult(ApiResponse):
     """Result of killing a tmux session."""
 
+    __slots__ = ("success", "error_message")
+
+    def __init__(
+        self,
+        request_id: str = "",
+        success: bool = False,
+        error_message: str = "",
+    ):
+        super().__init__(request_id)
+        _set(self, "success", success)
+        _set(self, "error_message", error_message)
+
+
+class PythonRunResult(ApiResponse):
+    """
+    Result of running code in a ``PythonSession``.
+
+    ``success`` is False if the code raised (``exception_type`` and
+    ``traceback`` say what) or could not be run (``error_message`` only).
+    ``result`` is the ``repr`` of the last statement's value when that
+    statement is an expression. ``restarted`` means the interpreter was
+    started afresh for or during this run, so earlier state is gone.
+    """
+
+    __slots__ = (
+        "success",
+        "stdout",
+        "stderr",
+        "result",
+        "error_message",
+        "exception_type",
+        "traceback",
+        "execution_count",
+        "timed_out",
+        "restarted",
+        "truncated",
+    )
+
     def __init__(
         self,
         request_id: str = "",
         success: bool = False,
+        stdout: str = "",
+        stderr: str = "",
+        result: Optional[str] = None,
         error_message: str = "",
+        exception_type: str = "",
+        traceback: str = "",
+        execution_count: int = 0,
+        timed_out: bool = False,
+        restarted: bool = False,
+        truncated: bool = False,
     ):
         super().__init__(request_id)
-        self.success = success
-        self.error_message = error_message
+        _set(self, "success", success)
+        _set(self, "stdout", stdout)
+        _set(self, "stderr", stderr)
+        _set(self, "result", result)
+        _set(self, "error_message", error_message)
+        _set(self, "exception_type", exception_type)
+        _set(self, "traceback", traceback)
+        _set(self, "execution_count", execution_count)
+        _set(self, "timed_out", timed_out)
+        _set(self, "restarted", restarted)
+        _set(self, "truncated", truncated)
 
 
-class SandboxInfo:
+class BroadcastItem(_Record):
+    """Result of a broadcast command on one sandbox."""
+
+    __slots__ = ("sandbox_id", "result", "elapsed", "timed_out")
+
+    def __init__(
+        self,
+        sandbox_id: str = "",
+        result: Optional[CommandResult] = None,
+        elapsed: float = 0.0,
+        timed_out: bool = False,
+    ):
+        _set(self, "sandbox_id", sandbox_id)
+        _set(self, "result", result if result is not None else CommandResult())
+        _set(self, "elapsed", elapsed)
+        _set(self, "timed_out", timed_out)
+
+    @property
+    def success(self) -> bool:
+        return self.result.success
+
+
+class BroadcastSummary(_Record):
+    """Aggregate statistics of a finished broadcast."""
+
+    __slots__ = (
+        "total",
+        "succeeded",
+        "failed",
+        "timed_out",
+        "elapsed",
+        "latency_p50",
+        "latency_p95",
+        "latency_max",
+        "failed_ids",
+    )
+
+    def __init__(
+        self,
+        total: int = 0,
+        succeeded: int = 0,
+        failed: int = 0,
+        timed_out: int = 0,
+        elapsed: float = 0.0,
+        latency_p50: float = 0.0,
+        latency_p95: float = 0.0,
+        latency_max: float = 0.0,
+        failed_ids: Optional[List[str]] = None,
+    ):
+        _set(self, "total", total)
+        _set(self, "succeeded", succeeded)
+        _set(self, "failed", failed)
+        _set(self, "timed_out", timed_out)
+        _set(self, "elapsed", elapsed)
+        _set(self, "latency_p50", latency_p50)
+        _set(self, "latency_p95", latency_p95)
+        _set(self, "latency_max", latency_max)
+        _set(self, "failed_ids", failed_ids or [])
+
+    def __repr__(self) -> str:
+        return (
+            f"BroadcastSummary(total={self.total}, succeeded={self.succeeded}, "
+            f"failed={self.failed}, timed_out={self.timed_out}, "
+            f"elapsed={self.elapsed:.2f}s, p50={self.latency_p50:.2f}s, "
+            f"p95={self.latency_p95:.2f}s, max={self.latency_max:.2f}s)"
+        )
+
+
+class PoolStats:
+    """Snapshot of HTTP connection pool usage."""
+
+    def __init__(
+        self,
+        pools: int = 0,
+        pools_opened: int = 0,
+        requests: int = 0,
+        errors: int = 0,
+        in_flight: int = 0,
+        peak_in_flight: int = 0,
+        idle_connections: int = 0,
+        max_connections: int = 0,
+        http2: bool = False,
+    ):
+        self.pools = pools
+        self.pools_opened = pools_opened
+        self.requests = requests
+        self.errors = errors
+        self.in_flight = in_flight
+        self.peak_in_flight = peak_in_flight
+        self.idle_connections = idle_connections
+        self.max_connections = max_connections
+        self.http2 = http2
+
+    def __repr__(self) -> str:
+        return (
+            f"PoolStats(pools={self.pools}, requests={self.requests}, "
+            f"in_flight={self.in_flight}, idle_connections={self.idle_connections}, "
+            f"errors={self.errors}, http2={self.http2})"
+        )
+
+
+class RegistryStats:
+    """Snapshot of a client's sandbox handle registry."""
+
+    def __init__(
+        self,
+        size: int = 0,
+        max_size: int = 0,
+        weak_handles: int = 0,
+        hits: int = 0,
+        misses: int = 0,
+        evictions: int = 0,
+    ):
+        self.size = size
+        self.max_size = max_size
+        self.weak_handles = weak_handles
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+
+    def __repr__(self) -> str:
+        return (
+            f"RegistryStats(size={self.size}, max_size={self.max_size}, "
+            f"weak_handles={self.weak_handles}, hits={self.hits}, "
+            f"misses={self.misses}, evictions={self.evictions})"
+        )
+
+
+class SandboxInfo(_Record):
+    """
+    Summary of a container group.
+
+    Scalar fields are read eagerly. The rest of the payload (a response
+    dict or the SDK's typed group model) is kept as given, and ``containers``
+    and ``raw`` are converted from it on first access, so building an info
+    costs no serialization. The trade-off is memory: an info keeps its
+    payload alive, which is most of its size (see
+    ``benchmarks/sandbox_info_memory.py``).
+    """
+
+    __slots__ = (
+        "sandbox_id",
+        "name",
+        "status",
+        "cpu",
+        "memory",
+        "region_id",
+        "zone_id",
+        "intranet_ip",
+        "internet_ip",
+        "creation_time",
+        "container_name",
+        "_source",
+        "_containers",
+        "_raw",
+    )
+
     def __init__(
         self,
         sandbox_id: str = "",
@@ -221,42 +608,113 @@ class SandboxInfo:
         creation_time: str = "",
         containers: Optional[List[Dict[str, Any]]] = None,
         raw: Optional[Dict[str, Any]] = None,
+        container_name: str = "",
+        source: Any = None,
     ):
-        self.sandbox_id = sandbox_id
-        self.name = name
-        self.status = status
-        self.cpu = cpu
-        self.memory = memory
-        self.region_id = region_id
-        self.zone_id = zone_id
-        self.intranet_ip = intranet_ip
-        self.internet_ip = internet_ip
-        self.creation_time = creation_time
-        self.containers = containers or []
-        self.raw = raw or {}
+        _set(self, "sandbox_id", sandbox_id)
+        _set(self, "name", name)
+        _set(self, "status", status)
+        _set(self, "cpu", cpu)
+        _set(self, "memory", memory)
+        _set(self, "region_id", region_id)
+        _set(self, "zone_id", zone_id)
+        _set(self, "intranet_ip", intranet_ip)
+        _set(self, "internet_ip", internet_ip)
+        _set(self, "creation_time", creation_time)
+        _set(self, "container_name", container_name)
+        _set(self, "_source", None if raw is not None else source)
+        _set(self, "_containers", containers)
+        _set(self, "_raw", raw)
+
+    @property
+    def containers(self) -> List[Dict[str, Any]]:
+        containers = self._containers
+        if containers is None:
+            source = self._raw if self._raw is not None else self._source
+            if source is None:
+                containers = []
+            elif isinstance(source, dict):
+                containers = source.get("Containers") or []
+            else:
+                containers = [c.to_map() for c in source.containers or []]
+            _set(self, "_containers", containers)
+        return containers
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        raw = self._raw
+        if raw is None:
+            source = self._source
+            if source is None:
+                raw = {}
+            elif isinstance(source, dict):
+                raw = source
+            else:
+                raw = source.to_map()
+                # Share the container dicts instead of keeping two copies.
+                if self._containers is not None:
+                    raw["Containers"] = self._containers
+            _set(self, "_raw", raw)
+            # The dict now carries everything; let the payload go.
+            _set(self, "_source", None)
+        return raw
 
     @classmethod
-    def from_group(cls, group: Dict[str, Any]) -> "SandboxInfo":
+    def from_group(cls, group: Any) -> "SandboxInfo":
+        """Build from a ``ContainerGroups`` item, as a dict or SDK model."""
+        if isinstance(group, dict):
+            containers = group.get("Containers") or []
+            return cls(
+                sandbox_id=group.get("ContainerGroupId", ""),
+                name=group.get("ContainerGroupName", ""),
+                status=group.get("Status", ""),
+                cpu=group.get("Cpu"),
+                memory=group.get("Memory"),
+                region_id=group.get("RegionId", ""),
+                zone_id=group.get("ZoneId", ""),
+                intranet_ip=group.get("IntranetIp", ""),
+                internet_ip=group.get("InternetIp", ""),
+                creation_time=group.get("CreationTime", ""),
+                container_name=(containers[0].get("Name") or "") if containers else "",
+                source=group,
+            )
+        containers = group.containers or []
         return cls(
-            sandbox_id=group.get("ContainerGroupId", ""),
-            name=group.get("ContainerGroupName", ""),
-            status=group.get("Status", ""),
-            cpu=group.get("Cpu"),
-            memory=group.get("Memory"),
-            region_id=group.get("RegionId", ""),
-            zone_id=group.get("ZoneId", ""),
-            intranet_ip=group.get("IntranetIp", ""),
-            internet_ip=group.get("InternetIp", ""),
-            creation_time=group.get("CreationTime", ""),
-            containers=group.get("Containers", []) or [],
-            raw=group,
+            sandbox_id=group.container_group_id or "",
+            name=group.container_group_name or "",
+            status=group.status or "",
+            cpu=group.cpu,
+            memory=group.memory,
+            region_id=group.region_id or "",
+            zone_id=group.zone_id or "",
+            intranet_ip=group.intranet_ip or "",
+            internet_ip=group.internet_ip or "",
+            creation_time=group.creation_time or "",
+            container_name=(containers[0].name or "") if containers else "",
+            source=group,
         )
 
 
+def response_field(response: Any, name: str, default: Any = "") -> Any:
+    """
+    Read ``name`` (snake_case) from the typed body of an SDK response.
+
+    The SDK already decodes the JSON payload into models; reading attributes
+    avoids serializing the whole tree back to a dict with ``to_map()``.
+    """
+    body = getattr(response, "body", None)
+    value = getattr(body, name, None)
+    return default if value is None else value
+
+
 def extract_request_id(response: Any) -> str:
     if response is None:
         return ""
 
+    request_id = response_field(response, "request_id", None)
+    if request_id is not None:
+        return request_id
+
     try:
         response_dict = response.to_map()
         if isinstance(response_dict, dict) and "body" in response_dict:
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import shlex
+from typing import List, Optional
+
+from .models import (
+    ECI_COMMAND_MAX_BYTES,
+    TRANSPORT_GZIP,
+    TRANSPORT_INLINE,
+    TRANSPORT_STDIN,
+    TRANSPORT_UPLOAD,
+)
+
+
+# Scripts at least this large are uploaded to the sandbox's script cache
+# rather than streamed over stdin: they are sent once, and later runs of the
+# same script send nothing.
+UPLOAD_MIN_BYTES = 64 * 1024
+
+
+class CommandPlan:
+    """
+    How a command reaches the container.
+
+    ``argv`` is set for the inline transports and is sent as the exec
+    command. ``script`` is set for ``stdin`` and ``upload`` and holds the
+    bash script to stream or write to a file first.
+    """
+
+    __slots__ = ("transport", "argv", "script")
+
+    def __init__(
+        self,
+        transport: str,
+        argv: Optional[List[str]] = None,
+        script: str = "",
+    ):
+        self.transport = transport
+        self.argv = argv or []
+        self.script = script
+
+    @property
+    def inline(self) -> bool:
+        return self.transport in (TRANSPORT_INLINE, TRANSPORT_GZIP)
+
+
+class TransportPlanner:
+    """
+    Picks the cheapest way to deliver a command within ECI's size limit.
+
+    ExecContainerCommand accepts at most ``ECI_COMMAND_MAX_BYTES`` of
+    command JSON. Scripts are sent base64-encoded in argv when they fit,
+    gzip-compressed when that makes them fit, and otherwise streamed over
+    the exec WebSocket's stdin or uploaded to a file and executed. Scripts
+    of ``UPLOAD_MIN_BYTES`` or more are uploaded, smaller ones streamed;
+    ``upload`` is the only option when the output is not collected
+    (``sync=False``, tmux). The clients also run a streamable script from
+    the upload cache when it is already there.
+    """
+
+    def plan_script(self, script: str, streamable: bool = True) -> CommandPlan:
+        """Plan a bash script (``bash()``, ``tmux_start``)."""
+        data = script.encode("utf-8")
+        encoded = base64.b64encode(data).decode("ascii")
+        argv = ["bash", "-lc", f"echo {encoded} | base64 -d | bash"]
+        if command_fits(argv):
+            return CommandPlan(TRANSPORT_INLINE, argv=argv)
+
+        encoded = base64.b64encode(gzip.compress(data)).decode("ascii")
+        argv = ["bash", "-lc", f"echo {encoded} | base64 -d | gunzip | bash"]
+        if command_fits(argv):
+            return CommandPlan(TRANSPORT_GZIP, argv=argv)
+
+        if not streamable or len(data) >= UPLOAD_MIN_BYTES:
+            return CommandPlan(TRANSPORT_UPLOAD, script=script)
+        return CommandPlan(TRANSPORT_STDIN, script=script)
+
+    def plan_argv(self, argv: List[str], streamable: bool = True) -> CommandPlan:
+        """Plan a list-form command (``exec_command``)."""
+        if command_fits(argv):
+            return CommandPlan(TRANSPORT_INLINE, argv=list(argv))
+        return self.plan_script(
+            " ".join(shlex.quote(part) for part in argv), streamable=streamable
+        )
+
+
+def command_fits(argv: List[str]) -> bool:
+    """Whether ``argv`` fits in a single ExecContainerCommand call."""
+    command_json = json.dumps(argv, ensure_ascii=False)
+    return len(command_json.encode("utf-8")) <= ECI_COMMAND_MAX_BYTES
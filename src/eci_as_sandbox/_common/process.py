@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import shlex
+import uuid
+from typing import List, Optional, Sequence, Tuple
+
+from .compression import codec_line, compressor_setup
+from .follow import log_follow_script
+
+
+# Streamed execs keep their state in ``<PID_DIR>/<token>/``: ``pid`` (the
+# process group, so a timed-out or cancelled call can signal it from a
+# second exec), ``log`` (a copy of the first ``STREAM_LOG_LIMIT`` bytes of
+# output, so a dropped stream can be resumed; only when resuming is on)
+# and, once the command has finished, ``exit``. Whoever creates ``claim``
+# first owns the directory: the launcher when the exec ends, which removes
+# it at once, or a resume exec, which removes it once the client has the
+# exit status. ``mkdir`` is atomic, so exactly one of them wins.
+PID_DIR = "/tmp/.eci_pids"
+TERMINATED_MARKER = "__ECI_TERMINATED__"
+EXIT_MARKER = "__ECI_EXIT__"
+DEFAULT_KILL_GRACE = 2.0
+STREAM_LOG_LIMIT = 32 * 1024 * 1024
+
+
+def new_job_token() -> str:
+    return uuid.uuid4().hex
+
+
+def stream_dir(token: str) -> str:
+    return f"{PID_DIR}/{token}"
+
+
+def pid_file(token: str) -> str:
+    return f"{stream_dir(token)}/pid"
+
+
+def _launcher(
+    token: str, command: str, codecs: Sequence[str] = (), log: bool = True
+) -> str:
+    # ``set -m`` puts the background job in its own process group (pgid =
+    # pid); ``set +m`` and the quiet ``wait`` keep bash from printing job
+    # notices into the output. tee ignores SIGPIPE so the command and its
+    # log outlive a dropped stream; ``ulimit -f`` (512-byte blocks) caps the
+    # log, and tee goes on streaming once it is full. Should both its
+    # outputs fail, ``cat`` drains the rest so the command is not killed.
+    # ``exit`` is written after the log is complete. With ``codecs`` the
+    # streamed copy (not the log) is compressed, after a codec line.
+    d = shlex.quote(stream_dir(token))
+    setup = tee = compress = ""
+    if codecs:
+        setup = f"{compressor_setup(codecs)}; {codec_line()}; "
+        compress = " | $__eci_z"
+    if log:
+        tee = (
+            f" | (trap '' PIPE XFSZ; ulimit -f {STREAM_LOG_LIMIT // 512}; "
+            "tee -a $d/log 2>/dev/null; exec cat > /dev/null)"
+        )
+    return (
+        f"d={d}; mkdir -p $d; {setup}set -m; "
+        f"( {{ {command}; echo $? > $d/rc; }} 2>&1{tee}"
+        f"{compress}; mv -f $d/rc $d/exit ) & __eci_pid=$!; set +m; "
+        f"echo $__eci_pid > $d/pid; wait $__eci_pid 2>/dev/null; __eci_rc=$?; "
+        f"[ -f $d/exit ] && read -r __eci_rc < $d/exit; "
+        f"mkdir $d/claim 2>/dev/null && rm -rf $d; exit $__eci_rc"
+    )
+
+
+def wrap_argv(
+    argv: List[str], token: str, codecs: Sequence[str] = (), log: bool = True
+) -> List[str]:
+    """
+    Run ``argv`` in its own process group whose id is saved under ``token``.
+    With ``codecs`` the output is streamed compressed (see
+    ``compressor_setup``); without ``log`` no copy is kept for resuming.
+    """
+    return ["bash", "-c", _launcher(token, '"$@"', codecs, log), "eci-exec", *argv]
+
+
+def wrap_inline_argv(
+    argv: List[str], timeout: Optional[float] = None, grace: float = DEFAULT_KILL_GRACE
+) -> List[str]:
+    """
+    Run ``argv`` for an inline (HTTP) exec, which reports no exit status
+    and cannot be signalled from outside: ``EXIT_MARKER`` and the status are
+    printed after its output, and with ``timeout`` a watchdog stops its
+    process group (TERM, then KILL after ``grace`` seconds) and prints
+    ``TERMINATED_MARKER``. See ``split_inline_output``.
+    """
+    report = f"printf '\\n{EXIT_MARKER} %d\\n' $__eci_rc"
+    # Stderr goes to stdout so the status stays last however ECI joins the
+    # two streams in the response.
+    if timeout is None or timeout <= 0:
+        script = f'exec 2>&1; "$@"; __eci_rc=$?; {report}'
+    else:
+        # Both jobs get their own process group (``set -m``) so killing the
+        # watchdog also ends its ``sleep``, which holds the output open.
+        script = (
+            f'exec 2>&1; set -m; "$@" & __eci_pid=$!; '
+            f"( sleep {timeout:g}; echo; echo {TERMINATED_MARKER}; "
+            f"kill -TERM -- -$__eci_pid; sleep {grace:g}; "
+            f"kill -KILL -- -$__eci_pid ) 2>/dev/null & __eci_dog=$!; set +m; "
+            f"wait $__eci_pid 2>/dev/null; __eci_rc=$?; "
+            f"kill -- -$__eci_dog 2>/dev/null; {report}"
+        )
+    return ["bash", "-c", script, "eci-exec", *argv]
+
+
+def split_inline_output(output: str) -> Tuple[str, Optional[int], bool]:
+    """
+    Split the output of a ``wrap_inline_argv`` exec into the command's own
+    output, its exit status (None if it was stopped or the status is
+    missing, e.g. the response was cut off) and whether the watchdog
+    stopped it.
+    """
+    exit_code = None
+    mark = output.rfind(f"\n{EXIT_MARKER} ")
+    if mark >= 0:
+        try:
+            exit_code = int(output[mark + len(EXIT_MARKER) + 2 :].strip())
+        except ValueError:
+            pass
+        output = output[:mark]
+    terminated = False
+    stop = output.rfind(f"\n{TERMINATED_MARKER}\n")
+    if stop >= 0:
+        terminated = True
+        exit_code = None
+        output = output[:stop] + output[stop + len(TERMINATED_MARKER) + 2 :]
+    return output, exit_code, terminated
+
+
+def wrap_script(
+    script: str, token: str, codecs: Sequence[str] = (), log: bool = True
+) -> str:
+    """Like ``wrap_argv`` for a script fed to a shell over stdin."""
+    # Stdin is detached so the script cannot consume the launcher's own
+    # remaining lines.
+    return _launcher(token, f"(\n{script}\n) < /dev/null", codecs, log)
+
+
+def kill_command(token: str, grace: float = DEFAULT_KILL_GRACE) -> str:
+    """
+    Shell command that sends SIGTERM to the recorded process group, then
+    SIGKILL if it is still alive after ``grace`` seconds, and removes the
+    exec's directory. Prints ``TERMINATED_MARKER`` when a process was
+    signalled.
+    """
+    path = shlex.quote(pid_file(token))
+    directory = shlex.quote(stream_dir(token))
+    steps = max(1, int(grace * 10))
+    return (
+        f"[ -f {path} ] || exit 0; p=$(cat {path}); "
+        f"kill -TERM -- -$p 2>/dev/null || {{ rm -rf {directory}; exit 0; }}; "
+        f"echo {TERMINATED_MARKER}; i=0; "
+        f"while [ $i -lt {steps} ] && kill -0 -- -$p 2>/dev/null; "
+        f"do sleep 0.1; i=$((i+1)); done; "
+        f"kill -KILL -- -$p 2>/dev/null; rm -rf {directory}"
+    )
+
+
+def was_terminated(output: str) -> bool:
+    return TERMINATED_MARKER in (output or "")
+
+
+def resume_script(token: str, offset: int, seconds: float) -> str:
+    """
+    Script that claims a streamed exec's directory and streams the rest of
+    its log from byte ``offset`` (see ``log_follow_script``). If the
+    launcher claimed it first, the exec has ended and is reported gone.
+    """
+    return log_follow_script(
+        stream_dir(token),
+        offset,
+        seconds,
+        alive='[ -f "$d/pid" ] && kill -0 "$(cat "$d/pid")"',
+        cleanup='rm -rf "$d"',
+        on_gone='rm -rf "$d"',
+        claim='{ mkdir "$d/claim" && : > "$d/claim/resume"; }; '
+        '[ -f "$d/claim/resume" ]',
+    )
+
+
+def remove_stream_command(token: str) -> str:
+    """Shell command that removes a finished streamed exec's directory."""
+    directory = shlex.quote(stream_dir(token))
+    return f"[ -f {directory}/exit ] && rm -rf {directory}; exit 0"
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import shlex
+from typing import List, Optional, Sequence
+
+
+# Interactive terminals run on an exec with ``Tty`` and ``Stdin`` set:
+# keystrokes go out as stdin frames, the window size as resize frames, and
+# the terminal's output (stdout and stderr are one stream on a TTY) comes
+# back as it is produced.
+PTY_DEFAULT_COLS = 80
+PTY_DEFAULT_ROWS = 24
+PTY_DEFAULT_TERM = "xterm-256color"
+# Idle seconds between keep-alive pings, so a quiet terminal is not dropped
+# by proxies or load balancers.
+PTY_PING_INTERVAL = 20.0
+
+
+def pty_command(
+    command: Optional[Sequence[str]] = None,
+    exec_dir: Optional[str] = None,
+    term: str = PTY_DEFAULT_TERM,
+) -> List[str]:
+    """
+    Argv for a terminal exec: ``command`` (an interactive login shell by
+    default, bash if installed) with ``TERM`` set and ``exec_dir`` as the
+    working directory.
+    """
+    parts = [f"export TERM={shlex.quote(term)}"]
+    if exec_dir:
+        parts.append(f"cd {shlex.quote(exec_dir)} || exit 1")
+    if command:
+        parts.append("exec " + " ".join(shlex.quote(part) for part in command))
+    else:
+        parts.append("if command -v bash >/dev/null 2>&1; then exec bash -il; fi")
+        parts.append("exec sh -il")
+    return ["sh", "-c", "; ".join(parts)]
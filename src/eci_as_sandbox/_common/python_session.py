@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from .agent import AGENT_READY_LINE, AgentCall
+from .models import PythonRunResult
+
+
+# A Python session is a small kernel kept running on the stdin of one exec.
+# It speaks the agent's frame protocol (see ``agent.py``): ``run`` requests
+# execute code in the main thread against one persistent ``__main__``
+# namespace, while a reader thread takes ``interrupt`` requests and turns
+# them into SIGINT. File descriptors 1 and 2 are pipes forwarded as
+# ``stdout``/``stderr`` output frames, so prints from C extensions and
+# child processes are captured too; a sync marker written at the end of a
+# run makes sure all of it is sent before the result frame.
+PYTHON_RUN_TIMEOUT = 600.0
+# Seconds to wait for a timed-out run to stop after the interrupt before
+# the interpreter is restarted.
+PYTHON_INTERRUPT_GRACE = 5.0
+
+_KERNEL_TEMPLATE = r"""
+import ast
+import json
+import linecache
+import os
+import queue
+import signal
+import struct
+import sys
+import threading
+import traceback
+import types
+
+HEAD = struct.Struct(">II")
+CHUNK = 65536
+SYNC = b"\0__ECI_SYNC__\0"
+
+channel = os.fdopen(os.dup(1), "wb")
+requests = os.fdopen(os.dup(0), "rb")
+send_lock = threading.Lock()
+jobs = queue.Queue()
+state = {"run": None, "busy": False, "count": 0}
+main_module = types.ModuleType("__main__")
+main_module.__dict__["__builtins__"] = __builtins__
+captures = []
+
+
+def send(header, data=b""):
+    body = json.dumps(header).encode("utf-8")
+    with send_lock:
+        channel.write(HEAD.pack(len(body), len(data)) + body + data)
+        channel.flush()
+
+
+def read_exact(stream, size):
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class Capture:
+    def __init__(self, fd, name):
+        self.fd = fd
+        self.name = name
+        self.synced = threading.Event()
+        self.read_fd, write_fd = os.pipe()
+        os.dup2(write_fd, fd)
+        os.close(write_fd)
+        threading.Thread(target=self.forward, daemon=True).start()
+
+    def emit(self, data):
+        rid = state["run"]
+        if data and rid is not None:
+            send({"id": rid, "more": True, "stream": self.name}, data)
+
+    def forward(self):
+        pending = b""
+        keep = len(SYNC) - 1
+        while True:
+            chunk = os.read(self.read_fd, CHUNK)
+            if not chunk:
+                return
+            pending += chunk
+            mark = pending.find(SYNC)
+            while mark >= 0:
+                self.emit(pending[:mark])
+                pending = pending[mark + len(SYNC):]
+                self.synced.set()
+                mark = pending.find(SYNC)
+            if len(pending) > keep:
+                self.emit(pending[:-keep])
+                pending = pending[-keep:]
+
+    def sync(self):
+        self.synced.clear()
+        os.write(self.fd, SYNC)
+        self.synced.wait(5)
+
+
+def on_interrupt(signum, frame):
+    if state["busy"]:
+        raise KeyboardInterrupt
+
+
+def execute(code, filename):
+    linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+    tree = ast.parse(code, filename, "exec")
+    last = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = ast.Expression(tree.body.pop().value)
+    namespace = main_module.__dict__
+    exec(compile(tree, filename, "exec"), namespace)
+    if last is None:
+        return None
+    return eval(compile(last, filename, "eval"), namespace)
+
+
+def user_traceback(exc):
+    tb = exc.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+        tb = tb.tb_next
+    return "".join(traceback.format_exception(type(exc), exc, tb))
+
+
+def run(rid, req):
+    state["count"] += 1
+    header = {"id": rid, "count": state["count"]}
+    state["run"] = rid
+    state["busy"] = True
+    try:
+        value = execute(req.get("code") or "", "<cell %d>" % state["count"])
+        if value is not None:
+            main_module.__dict__["_"] = value
+            header["result"] = repr(value)
+    except BaseException as exc:
+        state["busy"] = False
+        header["exception"] = type(exc).__name__
+        header["message"] = str(exc)
+        header["traceback"] = user_traceback(exc)
+    finally:
+        state["busy"] = False
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+    for capture in captures:
+        capture.sync()
+    state["run"] = None
+    send(header)
+
+
+def read_requests():
+    while True:
+        head = read_exact(requests, HEAD.size)
+        if head is None:
+            os._exit(0)
+        size, length = HEAD.unpack(head)
+        body = read_exact(requests, size)
+        data = read_exact(requests, length) if length else b""
+        if body is None or data is None:
+            os._exit(0)
+        req = json.loads(body.decode("utf-8"))
+        op = req.get("op")
+        if op == "run":
+            jobs.put(req)
+        elif op == "interrupt":
+            hit = state["busy"] and state["run"] == req.get("target")
+            if hit:
+                os.kill(os.getpid(), signal.SIGINT)
+            send({"id": req.get("id"), "interrupted": hit})
+        else:
+            send({"id": req.get("id"), "error": "unknown op: %s" % op})
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1]:
+        os.chdir(sys.argv[1])
+    sys.path[0] = ""
+    sys.modules["__main__"] = main_module
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    captures.extend([Capture(1, "stdout"), Capture(2, "stderr")])
+    signal.signal(signal.SIGINT, on_interrupt)
+    threading.Thread(target=read_requests, daemon=True).start()
+    channel.write(b"@READY@\n")
+    channel.flush()
+    while True:
+        try:
+            req = jobs.get()
+        except KeyboardInterrupt:
+            continue
+        run(req.get("id"), req)
+
+
+main()
+"""
+
+KERNEL_SOURCE = _KERNEL_TEMPLATE.replace("@READY@", AGENT_READY_LINE)
+
+
+def run_request(code: str) -> Dict[str, Any]:
+    return {"op": "run", "code": code}
+
+
+def run_result(
+    call: AgentCall,
+    request_id: str,
+    timeout: Optional[float] = None,
+    restarted: bool = False,
+) -> PythonRunResult:
+    """
+    Turn a finished run call into a ``PythonRunResult``. ``timeout`` is set
+    when the run was interrupted for taking longer than that.
+    """
+    header = call.header or {}
+    stdout, stderr = call.capture, call.stderr
+    for capture in (stdout, stderr):
+        if capture is not None:
+            capture.close()
+    exception_type = header.get("exception") or ""
+    error_message = call.error_message
+    if exception_type and not error_message:
+        message = header.get("message") or ""
+        error_message = f"{exception_type}: {message}" if message else exception_type
+    if timeout is not None:
+        error_message = f"Code did not finish within {timeout:g}s"
+        if restarted:
+            error_message += "; the interpreter was restarted"
+    return PythonRunResult(
+        request_id=request_id,
+        success=not error_message,
+        stdout=stdout.text() if stdout is not None else "",
+        stderr=stderr.text() if stderr is not None else "",
+        result=header.get("result"),
+        error_message=error_message,
+        exception_type=exception_type,
+        traceback=header.get("traceback") or "",
+        execution_count=header.get("count") or 0,
+        timed_out=timeout is not None,
+        restarted=restarted,
+        truncated=any(
+            capture is not None and capture.truncated for capture in (stdout, stderr)
+        ),
+    )
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Generic, Optional, TypeVar
+
+from .models import RegistryStats
+
+
+DEFAULT_REGISTRY_SIZE = 1024
+
+_H = TypeVar("_H")
+
+
+class SandboxEntry(Generic[_H]):
+    """Registry entry: a sandbox handle plus metadata cached from the API."""
+
+    __slots__ = ("sandbox_id", "handle", "container_name", "status", "last_seen")
+
+    def __init__(
+        self,
+        sandbox_id: str,
+        handle: _H,
+        container_name: str = "",
+        status: str = "",
+    ):
+        self.sandbox_id = sandbox_id
+        self.handle = handle
+        self.container_name = container_name
+        self.status = status
+        self.last_seen = time.time()
+
+
+class SandboxRegistry(Generic[_H]):
+    """
+    Bounded, thread-safe LRU cache of sandbox handles.
+
+    At most ``max_size`` entries (with their metadata) are held strongly.
+    Evicted handles move to a weak map, so a handle the caller still holds is
+    returned again by ``get()`` while unreferenced ones are garbage collected.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_REGISTRY_SIZE):
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[str, SandboxEntry[_H]]" = OrderedDict()
+        self._evicted: "weakref.WeakValueDictionary[str, Any]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sandbox_id: object) -> bool:
+        return sandbox_id in self._entries
+
+    def get(self, sandbox_id: str) -> Optional[_H]:
+        """Return the handle for ``sandbox_id`` and mark it recently used."""
+        with self._lock:
+            entry = self._entries.get(sandbox_id)
+            if entry is not None:
+                self._entries.move_to_end(sandbox_id)
+                self._hits += 1
+                return entry.handle
+            handle = self._evicted.pop(sandbox_id, None)
+            if handle is not None:
+                self._hits += 1
+                container_name = getattr(handle, "container_name", "") or ""
+                self._insert(SandboxEntry(sandbox_id, handle, container_name))
+                return handle
+            self._misses += 1
+            return None
+
+    def entry(self, sandbox_id: str) -> Optional[SandboxEntry[_H]]:
+        """Return the cached entry without affecting LRU order or stats."""
+        return self._entries.get(sandbox_id)
+
+    def put(
+        self,
+        sandbox_id: str,
+        handle: _H,
+        container_name: str = "",
+        status: str = "",
+    ) -> None:
+        with self._lock:
+            self._evicted.pop(sandbox_id, None)
+            self._insert(SandboxEntry(sandbox_id, handle, container_name, status))
+
+    def update(
+        self,
+        sandbox_id: str,
+        container_name: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> None:
+        """Refresh metadata of a registered sandbox; unknown ids are ignored."""
+        with self._lock:
+            entry = self._entries.get(sandbox_id)
+            if entry is None:
+                return
+            if container_name:
+                entry.container_name = container_name
+            if status:
+                entry.status = status
+            entry.last_seen = time.time()
+
+    def pop(self, sandbox_id: str) -> Optional[_H]:
+        with self._lock:
+            entry = self._entries.pop(sandbox_id, None)
+            evicted = self._evicted.pop(sandbox_id, None)
+        if entry is not None:
+            return entry.handle
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._evicted.clear()
+
+    def stats(self) -> RegistryStats:
+        with self._lock:
+            return RegistryStats(
+                size=len(self._entries),
+                max_size=self.max_size,
+                weak_handles=len(self._evicted),
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+    def _insert(self, entry: SandboxEntry[_H]) -> None:
+        # Caller holds the lock.
+        self._entries[entry.sandbox_id] = entry
+        self._entries.move_to_end(entry.sandbox_id)
+        while len(self._entries) > self.max_size:
+            old_id, old = self._entries.popitem(last=False)
+            self._evictions += 1
+            try:
+                self._evicted[old_id] = old.handle
+            except TypeError:
+                pass
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import shlex
+import threading
+from collections import OrderedDict
+
+
+# Scripts too long for a single exec are uploaded once under their SHA-256
+# and executed by path afterwards.
+SCRIPT_CACHE_DIR = "/tmp/.eci_scripts"
+# Scripts each sandbox keeps; every upload removes the oldest beyond this.
+SCRIPT_CACHE_LIMIT = 256
+# Printed by a launcher that finds its cached script gone (e.g. after a
+# container restart), so the caller can re-upload and retry.
+SCRIPT_MISSING_MARKER = "__ECI_SCRIPT_MISSING__"
+_SCRIPT_PRESENT_MARKER = "__ECI_SCRIPT_PRESENT__"
+
+_MAX_SANDBOXES = 1024
+
+
+def script_digest(script: str) -> str:
+    return hashlib.sha256(script.encode("utf-8")).hexdigest()
+
+
+def script_path(digest: str) -> str:
+    return f"{SCRIPT_CACHE_DIR}/{digest}.sh"
+
+
+def probe_command(path: str) -> str:
+    """Shell command that prints a marker when ``path`` is already cached."""
+    return f"test -f {shlex.quote(path)} && echo {_SCRIPT_PRESENT_MARKER} || true"
+
+
+def probe_found(output: str) -> bool:
+    return _SCRIPT_PRESENT_MARKER in (output or "")
+
+
+def upload_command(script: str, path: str) -> str:
+    """
+    Shell command (for WebSocket stdin) that atomically writes ``script``,
+    then prunes the cache to the ``SCRIPT_CACHE_LIMIT`` newest scripts.
+    """
+    eof_marker = "EOF_ECI_SCRIPT"
+    counter = 0
+    while eof_marker in script:
+        counter += 1
+        eof_marker = f"EOF_ECI_SCRIPT_{counter}"
+    target = shlex.quote(path)
+    tmp = f"{target}.$$"
+    prune = (
+        f"ls -t {SCRIPT_CACHE_DIR}/*.sh 2>/dev/null "
+        f"| tail -n +{SCRIPT_CACHE_LIMIT + 1} | xargs rm -f"
+    )
+    return (
+        f"mkdir -p {SCRIPT_CACHE_DIR} && cat > {tmp} << '{eof_marker}' "
+        f"&& mv -f {tmp} {target} && {{ {prune}; }}\n{script}\n{eof_marker}"
+    )
+
+
+def guard_command(path: str, command: str, missing_exit_code: int = 0) -> str:
+    """Prefix ``command`` with a check that the cached script still exists."""
+    return (
+        f"if [ ! -f {shlex.quote(path)} ]; then echo {SCRIPT_MISSING_MARKER}; "
+        f"exit {missing_exit_code}; fi; {command}"
+    )
+
+
+class ScriptIndex:
+    """
+    Client-side record of which cached scripts each sandbox already holds.
+
+    Bounded in both dimensions; forgetting an entry only costs a probe (and
+    possibly a re-upload) the next time the script is used. A script the
+    sandbox pruned while still listed here is caught by ``guard_command``.
+    """
+
+    def __init__(
+        self,
+        max_sandboxes: int = _MAX_SANDBOXES,
+        max_scripts: int = SCRIPT_CACHE_LIMIT,
+    ):
+        self._max_sandboxes = max_sandboxes
+        self._max_scripts = max_scripts
+        self._index: "OrderedDict[str, OrderedDict[str, None]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def has(self, sandbox_id: str, digest: str) -> bool:
+        with self._lock:
+            scripts = self._index.get(sandbox_id)
+            if scripts is None or digest not in scripts:
+                return False
+            self._index.move_to_end(sandbox_id)
+            scripts.move_to_end(digest)
+            return True
+
+    def add(self, sandbox_id: str, digest: str) -> None:
+        with self._lock:
+            scripts = self._index.get(sandbox_id)
+            if scripts is None:
+                scripts = self._index[sandbox_id] = OrderedDict()
+                while len(self._index) > self._max_sandboxes:
+                    self._index.popitem(last=False)
+            self._index.move_to_end(sandbox_id)
+            scripts[digest] = None
+            scripts.move_to_end(digest)
+            while len(scripts) > self._max_scripts:
+                scripts.popitem(last=False)
+
+    def discard(self, sandbox_id: str, digest: str) -> None:
+        with self._lock:
+            scripts = self._index.get(sandbox_id)
+            if scripts is not None:
+                scripts.pop(digest, None)
+
+    def forget(self, sandbox_id: str) -> None:
+        with self._lock:
+            self._index.pop(sandbox_id, None)
@@ -0,0 +1,456 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import shlex
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .compression import (
+    codec_line,
+    compressor_setup,
+    decompress_payload,
+    parse_codec_line,
+)
+from .follow import JobOutput, log_follow_script
+from .models import (
+    CommandResult,
+    TmuxCommandStatus,
+    TmuxPollResult,
+    TmuxStartResult,
+)
+
+
+# Each tmux job keeps its state in ``<TMUX_STATE_DIR>/<session_id>/``:
+# ``log`` (combined stdout/stderr), ``start`` (epoch seconds) and, once it
+# has finished, ``exit`` ("<exit code> <epoch seconds>", written atomically).
+TMUX_STATE_DIR = "/tmp/.eci_tmux"
+
+_POLL_HEADER = "__ECI_TMUX_POLL__"
+_STATE_RUNNING = "running"
+_STATE_DONE = "done"
+_STATE_GONE = "gone"
+_MISSING = "-"
+
+_START_HEADER = "__ECI_TMUX_START__"
+START_STARTED = "started"
+START_FINISHED = "finished"
+START_EXISTS = "exists"
+START_FAILED = "failed"
+# How long the start script waits for a new session to become visible.
+_START_VERIFY_TRIES = 10
+
+# Seconds between the (rarer) has-session checks of the wait loop.
+_WAIT_CHECK_EVERY = 1.0
+_WAIT_SLEEP = 0.1
+
+
+def job_dir(session_id: str) -> str:
+    return f"{TMUX_STATE_DIR}/{session_id}"
+
+
+def job_script(session_id: str, command: str) -> str:
+    """
+    Wrap ``command`` as a tmux job: record the start time, append its
+    output to the log (still shown in the pane), then write the exit code
+    and end time. The command runs in its own shell so ``exit`` is
+    captured too. Plain ``sh`` syntax, as tmux may start jobs with
+    ``/bin/sh``.
+
+    Where ``script`` is installed the command runs on a pseudo-terminal of
+    its own, with the pane as its input, so it still sees a TTY (colour,
+    line buffering, prompts and ``send-keys`` all work) while its output is
+    copied to the log. ``onlcr`` is off on that terminal, so the log keeps
+    plain ``\\n`` line endings, and turned back on for the pane, which
+    ``script`` puts in raw mode. Without ``script`` the output goes through
+    a pipe and the command sees no TTY.
+    """
+    directory = shlex.quote(job_dir(session_id))
+    job = shlex.quote(f"({command}\n); echo $? > {directory}/rc")
+    return "\n".join(
+        [
+            f"mkdir -p {directory}; date +%s > {directory}/start",
+            "if command -v script >/dev/null 2>&1; then",
+            "  __eci_tty=$(tmux display-message -p -t \"$TMUX_PANE\" '#{pane_tty}')",
+            '  script -qc "stty -onlcr; stty opost onlcr < $__eci_tty; "'
+            f"{job} /dev/null < /dev/tty | tee -a {directory}/log",
+            f"else sh -c {job} 2>&1 | tee -a {directory}/log; fi",
+            f'echo "$(cat {directory}/rc) $(date +%s)" > {directory}/exit.tmp '
+            f"&& mv -f {directory}/exit.tmp {directory}/exit; rm -f {directory}/rc",
+        ]
+    )
+
+
+def start_script(session_id: str, job: str) -> str:
+    """
+    Script that creates a tmux session running ``job`` and confirms it.
+
+    ``remain-on-exit`` is set in the same tmux invocation, so even an
+    instant job leaves its pane behind. The script prints a status header
+    ``<header> <state> [<tmux exit code>]``; on failure, tmux's error
+    output follows.
+    """
+    session = shlex.quote(session_id)
+    directory = shlex.quote(job_dir(session_id))
+    return "\n".join(
+        [
+            f"if tmux has-session -t {session} 2>/dev/null; then "
+            f'echo "{_START_HEADER} {START_EXISTS}"; exit 0; fi',
+            f"rm -rf {directory}; mkdir -p {directory}",
+            f"__eci_err=$(tmux new-session -d -s {session} {shlex.quote(job)} "
+            f"\\; set-option -t {session} remain-on-exit on 2>&1); __eci_rc=$?",
+            f"for __eci_i in $(seq {_START_VERIFY_TRIES}); do",
+            f"  if [ -f {directory}/exit ]; then "
+            f'echo "{_START_HEADER} {START_FINISHED}"; exit 0; fi',
+            f"  if tmux has-session -t {session} 2>/dev/null; then "
+            f'echo "{_START_HEADER} {START_STARTED}"; exit 0; fi',
+            '  [ "$__eci_rc" -ne 0 ] && break',
+            f"  sleep {_WAIT_SLEEP}",
+            "done",
+            f'echo "{_START_HEADER} {START_FAILED} $__eci_rc"',
+            "printf '%s\\n' \"$__eci_err\"",
+            "exit 0",
+        ]
+    )
+
+
+def start_result(
+    output: str,
+    session_id: str,
+    request_id: str = "",
+    transport: str = "",
+) -> TmuxStartResult:
+    """Turn ``start_script`` output into a ``TmuxStartResult``."""
+    lines = (output or "").split("\n")
+    state, detail = "", (output or "").strip()
+    for position, line in enumerate(lines):
+        parts = line.split()
+        if len(parts) >= 2 and parts[0] == _START_HEADER:
+            state = parts[1]
+            detail = "\n".join(lines[position + 1 :]).strip()
+            break
+    if state in (START_STARTED, START_FINISHED):
+        return TmuxStartResult(
+            request_id=request_id,
+            success=True,
+            session_id=session_id,
+            transport=transport,
+            status=(
+                TmuxCommandStatus.COMPLETED
+                if state == START_FINISHED
+                else TmuxCommandStatus.RUNNING
+            ),
+        )
+    if state == START_EXISTS:
+        error_message = f"Session {session_id} already exists"
+    else:
+        error_message = (
+            f"Failed to start tmux session: {detail or 'no status returned'}"
+        )
+    return TmuxStartResult(
+        request_id=request_id,
+        success=False,
+        error_message=error_message,
+        transport=transport,
+    )
+
+
+def kill_sessions_command(session_ids: Sequence[str]) -> str:
+    """Shell command that kills sessions and removes their job state."""
+    parts = []
+    for session_id in session_ids:
+        parts.append(f"tmux kill-session -t {shlex.quote(session_id)} 2>/dev/null")
+        parts.append(f"rm -rf {shlex.quote(job_dir(session_id))}")
+    parts.append("true")
+    return "; ".join(parts)
+
+
+def poll_script(
+    sessions: Sequence[Tuple[str, Optional[int]]],
+    tail_lines: int,
+    include_output: bool = True,
+    wait_seconds: float = 0.0,
+    cleanup: bool = False,
+    codecs: Sequence[str] = (),
+) -> str:
+    """
+    Script that reports the state and output of several sessions at once.
+
+    ``sessions`` holds ``(session_id, cursor)`` pairs. State comes from the
+    job's ``start`` and ``exit`` files; output is read from its log only
+    when ``include_output`` is set. Without a cursor the last
+    ``tail_lines`` of the log are returned; with one, the log from that
+    byte offset on (still at most ``tail_lines``). Sessions that were not
+    started by ``tmux_start`` have no job files and report their pane.
+
+    With ``wait_seconds`` the script first blocks until any session has
+    finished or disappeared (or the time runs out). When it returns early,
+    sessions still running are reported without output.
+
+    Each session is printed as a header line ``<header> <index> <state>
+    <offset> <log size> <bytes read> <start> <end> <exit code>`` followed
+    by one line of base64 output. With ``codecs`` the output is compressed
+    before encoding, and a codec line comes first (see
+    ``compressor_setup``).
+    """
+    ids = " ".join(shlex.quote(session_id) for session_id, _ in sessions)
+    compress = " | $__eci_z" if codecs else ""
+    lines = []
+    if codecs:
+        lines.append(f"{compressor_setup(codecs)}; {codec_line()}")
+    lines += [
+        f"__eci_s=({ids}); __eci_quiet=0; __eci_cleanup={int(cleanup)}",
+        "__eci_poll() {",
+        f'  local s=$2 c=$3 d="{TMUX_STATE_DIR}/$2" state={_STATE_RUNNING}',
+        f"  local start={_MISSING} end={_MISSING} rc={_MISSING} size=0 n=0",
+        f'  if [ -f "$d/exit" ]; then read -r rc end < "$d/exit"; state={_STATE_DONE}; fi',
+        '  [ -f "$d/start" ] && read -r start < "$d/start"',
+        f'  if [ $state = {_STATE_RUNNING} ] && ! tmux has-session -t "$s" 2>/dev/null; then',
+        f'    echo "{_POLL_HEADER} $1 {_STATE_GONE} 0 0 0 ${{start:-{_MISSING}}} {_MISSING} {_MISSING}"',
+        '    echo; [ "$__eci_cleanup" -eq 1 ] && rm -rf "$d"; return',
+        "  fi",
+        '  [ -f "$d/log" ] && size=$(wc -c < "$d/log")',
+        '  [ "$c" -gt "$size" ] && c=$size',
+        "  n=$((size - c))",
+        f'  echo "{_POLL_HEADER} $1 $state $c $size $n ${{start:-{_MISSING}}} '
+        f'${{end:-{_MISSING}}} ${{rc:-{_MISSING}}}"',
+    ]
+    if not include_output:
+        lines.append("  echo")
+    else:
+        lines.extend(
+            [
+                f"  if [ $state = {_STATE_RUNNING} ] && [ $__eci_quiet -eq 1 ]; then",
+                "    echo",
+                '  elif [ -d "$d" ]; then',
+                f'    tail -c +$((c + 1)) "$d/log" 2>/dev/null | head -c "$n" '
+                f"| tail -n {int(tail_lines)}{compress} | base64 | tr -d '\\n'; echo",
+                "  else",
+                f'    tmux capture-pane -t "$s" -p -S - 2>/dev/null | tail -n {int(tail_lines)} '
+                f"{compress} | base64 | tr -d '\\n'; echo",
+                "  fi",
+            ]
+        )
+    if cleanup:
+        lines.append(
+            f'  [ $state = {_STATE_DONE} ] && {{ tmux kill-session -t "$s" 2>/dev/null; '
+            'rm -rf "$d"; }'
+        )
+    lines.append("  return 0")
+    lines.append("}")
+    if wait_seconds > 0:
+        check_every = max(1, int(_WAIT_CHECK_EVERY / _WAIT_SLEEP))
+        lines.extend(
+            [
+                "__eci_ready() {",
+                '  for s in "${__eci_s[@]}"; do',
+                f'    [ -f "{TMUX_STATE_DIR}/$s/exit" ] && return 0',
+                "  done",
+                f"  [ $((i % {check_every})) -eq 0 ] || return 1",
+                '  for s in "${__eci_s[@]}"; do',
+                '    tmux has-session -t "$s" 2>/dev/null || return 0',
+                "  done",
+                "  return 1",
+                "}",
+                f"end=$((SECONDS + {max(1, int(wait_seconds))})); i=0",
+                "while :; do",
+                "  if __eci_ready; then __eci_quiet=1; break; fi",
+                "  [ $SECONDS -ge $end ] && break",
+                f"  sleep {_WAIT_SLEEP}; i=$((i + 1))",
+                "done",
+            ]
+        )
+    for index, (_, cursor) in enumerate(sessions):
+        lines.append(
+            f'__eci_poll {index} "${{__eci_s[{index}]}}" '
+            f"{0 if cursor is None else max(0, int(cursor))}"
+        )
+    lines.append("exit 0")
+    return "\n".join(lines)
+
+
+def _optional_number(value: str) -> Optional[int]:
+    if value == _MISSING:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def parse_poll_output(
+    output: str,
+    session_ids: Sequence[str],
+    tail_lines: int,
+    request_id: str = "",
+    cursors: Optional[Dict[str, int]] = None,
+) -> Dict[str, TmuxPollResult]:
+    """
+    Turn ``poll_script`` output into one ``TmuxPollResult`` per session.
+
+    Without a cursor, output is the log's tail and ``cursor`` is the log
+    size. With one, output holds the bytes read from that offset; while
+    the job runs, a trailing partial line is held back for the next poll,
+    so consecutive chunks concatenate to the log.
+    """
+    cursors = cursors or {}
+    results: Dict[str, TmuxPollResult] = {}
+    codec = None
+    lines = (output or "").split("\n")
+    for position, line in enumerate(lines):
+        if codec is None:
+            codec = parse_codec_line(line)
+        parts = line.split()
+        if len(parts) < 9 or parts[0] != _POLL_HEADER:
+            continue
+        try:
+            index = int(parts[1])
+            size, count = int(parts[4]), int(parts[5])
+            session_id = session_ids[index]
+        except (ValueError, IndexError):
+            continue
+        state = parts[2]
+        started_at = _optional_number(parts[6])
+        finished_at = _optional_number(parts[7])
+        exit_code = _optional_number(parts[8])
+        if state == _STATE_GONE:
+            results[session_id] = TmuxPollResult(
+                request_id=request_id,
+                success=True,
+                status=TmuxCommandStatus.NOT_FOUND,
+                error_message="Session does not exist (may have been cleaned up)",
+                started_at=started_at,
+            )
+            continue
+
+        encoded = lines[position + 1] if position + 1 < len(lines) else ""
+        try:
+            data = base64.b64decode(encoded)
+            if codec is not None:
+                data = decompress_payload(codec, data)
+        except (binascii.Error, ValueError):
+            data = b""
+        cursor = size
+        incremental = session_id in cursors
+        if incremental and state == _STATE_RUNNING and size:
+            partial = len(data) - (data.rfind(b"\n") + 1)
+            data = data[: len(data) - partial]
+            cursor = size - partial
+        text = data.decode("utf-8", errors="replace")
+        if not incremental:
+            text = text.rstrip("\n")
+
+        results[session_id] = TmuxPollResult(
+            request_id=request_id,
+            success=True,
+            status=(
+                TmuxCommandStatus.COMPLETED
+                if state == _STATE_DONE
+                else TmuxCommandStatus.RUNNING
+            ),
+            exit_code=exit_code,
+            output=text,
+            output_truncated=bool(encoded) and len(data) < count - (size - cursor),
+            cursor=cursor,
+            started_at=started_at,
+            finished_at=finished_at,
+        )
+    missing = [session_id for session_id in session_ids if session_id not in results]
+    results.update(failed_polls(missing, "No status returned for session", request_id))
+    return results
+
+
+def list_script() -> str:
+    """Script listing tmux sessions with their job start/end/exit files."""
+    return "\n".join(
+        [
+            "tmux list-sessions -F '#{session_name}:#{session_created}:#{session_attached}' "
+            "2>/dev/null | while IFS= read -r line; do",
+            f'  d="{TMUX_STATE_DIR}/${{line%%:*}}"; start=; end=; rc=',
+            '  [ -f "$d/start" ] && read -r start < "$d/start"',
+            '  [ -f "$d/exit" ] && read -r rc end < "$d/exit"',
+            '  echo "$line:$start:$end:$rc"',
+            "done",
+            "true",
+        ]
+    )
+
+
+def parse_list_output(output: str) -> List[Dict[str, object]]:
+    """Turn ``list_script`` output into session info dicts."""
+    sessions: List[Dict[str, object]] = []
+    for line in (output or "").strip().split("\n"):
+        parts = line.split(":")
+        if len(parts) < 3:
+            continue
+        parts += [""] * (6 - len(parts))
+        sessions.append(
+            {
+                "session_id": parts[0],
+                "created": parts[1],
+                "attached": parts[2] == "1",
+                "started_at": _optional_number(parts[3] or _MISSING),
+                "finished_at": _optional_number(parts[4] or _MISSING),
+                "exit_code": _optional_number(parts[5] or _MISSING),
+            }
+        )
+    return sessions
+
+
+def failed_polls(
+    session_ids: Sequence[str],
+    error_message: str,
+    request_id: str = "",
+) -> Dict[str, TmuxPollResult]:
+    """The same failed ``TmuxPollResult`` for each session."""
+    return {
+        session_id: TmuxPollResult(
+            request_id=request_id,
+            success=False,
+            status=TmuxCommandStatus.ERROR,
+            error_message=error_message,
+        )
+        for session_id in session_ids
+    }
+
+
+def follow_script(
+    session_id: str, offset: int, seconds: float, cleanup: bool = True
+) -> str:
+    """
+    Script that streams a job's log from byte ``offset`` until the job
+    finishes or ``seconds`` pass (see ``log_follow_script``). With
+    ``cleanup`` a finished job's session and files are removed once the
+    caller acknowledges the exit status.
+    """
+    session = shlex.quote(session_id)
+    return log_follow_script(
+        job_dir(session_id),
+        offset,
+        seconds,
+        alive=f"tmux has-session -t {session}",
+        cleanup=f'tmux kill-session -t {session}; rm -rf "$d"' if cleanup else "",
+    )
+
+
+def job_result(
+    output: JobOutput,
+    request_id: str,
+    transport: str,
+    exit_code: Optional[int] = None,
+    terminated: bool = False,
+    error_message: str = "",
+) -> CommandResult:
+    """Build the ``CommandResult`` of a followed job."""
+    capture = output.capture
+    return CommandResult(
+        request_id=request_id,
+        success=not error_message,
+        output=capture.text(),
+        error_message=error_message,
+        transport=transport,
+        truncated=capture.truncated,
+        total_bytes=capture.total_bytes,
+        output_file=capture.spill_path,
+        exit_code=exit_code,
+        terminated=terminated,
+    )
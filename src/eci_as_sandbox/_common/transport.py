@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import os
+import ssl
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _sdk_cores() -> List[Tuple[Any, Any, Any]]:
+    """Return ``(core, response_cls, retry_error)`` for each installed SDK core.
+
+    Newer ``alibabacloud_tea_openapi`` releases dispatch through
+    ``darabonba.core.DaraCore``; older ones use ``Tea.core.TeaCore``.
+    """
+    cores = []
+    try:
+        from darabonba.core import DaraCore
+        from darabonba.exceptions import RetryError as DaraRetryError
+        from darabonba.response import DaraResponse
+
+        cores.append((DaraCore, DaraResponse, DaraRetryError))
+    except ImportError:
+        pass
+    try:
+        from Tea.core import TeaCore
+        from Tea.exceptions import RetryError as TeaRetryError
+        from Tea.response import TeaResponse
+
+        cores.append((TeaCore, TeaResponse, TeaRetryError))
+    except ImportError:
+        pass
+    return cores
+
+
+def _patch_sdk_cores(
+    attr: str,
+    make_dispatch: Callable[[Any, Any, Any, Any], Callable[..., Any]],
+) -> None:
+    """Replace ``core.<attr>`` on every SDK core with ``make_dispatch(...)``."""
+    for core, response_cls, retry_error in _sdk_cores():
+        original = getattr(core, attr)
+        setattr(
+            core,
+            attr,
+            staticmethod(make_dispatch(core, original, response_cls, retry_error)),
+        )
+
+
+def _resolve_timeouts(runtime_option: Dict[str, Any]) -> Tuple[float, float]:
+    """Return ``(connect, read)`` timeouts in seconds, as the SDK computes them."""
+    timeout = runtime_option.get("timeout")
+    connect_timeout = runtime_option.get("connectTimeout") or timeout or 5000
+    read_timeout = runtime_option.get("readTimeout") or timeout or 10000
+    return int(connect_timeout) / 1000, int(read_timeout) / 1000
+
+
+def _request_body(request: Any) -> bytes:
+    body = request.body
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    if body is not None and not isinstance(body, (bytes, bytearray)):
+        return b"".join(body)
+    return bytes(body or b"")
+
+
+def _resolve_proxy(
+    protocol: str, host: str, runtime_option: Dict[str, Any]
+) -> Optional[str]:
+    """Return the proxy for ``host``, or None when ``noProxy`` exempts it."""
+    if protocol == "HTTP":
+        proxy = (
+            runtime_option.get("httpProxy")
+            or os.environ.get("HTTP_PROXY")
+            or os.environ.get("http_proxy")
+        )
+    elif protocol == "HTTPS":
+        proxy = (
+            runtime_option.get("httpsProxy")
+            or os.environ.get("HTTPS_PROXY")
+            or os.environ.get("https_proxy")
+        )
+    else:
+        return None
+    if not proxy:
+        return None
+    no_proxy = (
+        runtime_option.get("noProxy")
+        or os.environ.get("NO_PROXY")
+        or os.environ.get("no_proxy")
+    )
+    if no_proxy and _bypasses_proxy(host, no_proxy):
+        return None
+    return proxy
+
+
+def _bypasses_proxy(host: str, no_proxy: Any) -> bool:
+    """Whether ``host`` (``name[:port]``) matches a ``noProxy`` entry, as curl does."""
+    if isinstance(no_proxy, str):
+        no_proxy = no_proxy.split(",")
+    if host.startswith("["):
+        name = host[1 : host.find("]")]
+    else:
+        name = host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+    name = name.lower()
+    if not name:
+        return False
+    for entry in no_proxy:
+        entry = str(entry).strip().lower()
+        if entry == "*":
+            return True
+        entry = entry.lstrip(".")
+        if entry and (name == entry or name.endswith("." + entry)):
+            return True
+    return False
+
+
+def _resolve_ssl(
+    core: Any, protocol: str, runtime_option: Dict[str, Any]
+) -> Tuple[bool, Optional[ssl.SSLContext]]:
+    """Mirror the SDK's TLS handling: ignoreSSL, custom CA and tlsMinVersion."""
+    if protocol != "HTTPS" or runtime_option.get("ignoreSSL", False):
+        return False, None
+
+    # The SDK passes an enum or a plain string.
+    tls_min_version = runtime_option.get("tlsMinVersion")
+    tls_min_version = getattr(tls_min_version, "value", tls_min_version)
+    ca = runtime_option.get("ca")
+    cert = runtime_option.get("cert")
+    if ca is None:
+        import certifi
+
+        ca = certifi.where()
+    context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+    context = core._set_tls_minimum_version(context, tls_min_version)
+    context.load_verify_locations(ca)
+    if cert is not None:
+        if isinstance(cert, (list, tuple)):
+            context.load_cert_chain(
+                certfile=cert[0], keyfile=cert[1] if len(cert) > 1 else None
+            )
+        else:
+            context.load_cert_chain(certfile=cert)
+    return True, context
+
+
+def _pool_key(
+    request: Any, proxy: Optional[str], verify: bool, runtime_option: Dict[str, Any]
+) -> Tuple[Any, ...]:
+    return (
+        request.protocol.upper(),
+        request.headers.get("host", ""),
+        request.port,
+        proxy,
+        verify,
+        runtime_option.get("ca"),
+        str(runtime_option.get("tlsMinVersion")),
+    )
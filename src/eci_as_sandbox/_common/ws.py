@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any
+import json
+from typing import Any, Optional, Tuple
 
 
 # ECI WebSocket message type prefixes
@@ -9,6 +10,27 @@ WS_MSG_STDOUT = 1
 WS_MSG_STDERR = 2
 WS_MSG_RESIZE = 3
 WS_MSG_EXIT = 4
+_WS_CHANNELS = {WS_MSG_STDIN, WS_MSG_STDOUT, WS_MSG_STDERR, WS_MSG_RESIZE, WS_MSG_EXIT}
+
+
+class WsReadResult:
+    """What an exec stream reader collected before it stopped."""
+
+    __slots__ = ("capture", "exit_code", "timed_out", "reconnects", "error_message")
+
+    def __init__(
+        self,
+        capture: Any,
+        exit_code: Optional[int],
+        timed_out: bool,
+        reconnects: int = 0,
+        error_message: str = "",
+    ):
+        self.capture = capture
+        self.exit_code = exit_code
+        self.timed_out = timed_out
+        self.reconnects = reconnects
+        self.error_message = error_message
 
 
 def decode_ws_message(message: Any) -> str:
@@ -17,7 +39,7 @@ def decode_ws_message(message: Any) -> str:
         return ""
     if isinstance(message, bytes):
         payload = message
-        if payload and payload[0] in {WS_MSG_STDIN, WS_MSG_STDOUT, WS_MSG_STDERR, WS_MSG_RESIZE, WS_MSG_EXIT}:
+        if payload and payload[0] in _WS_CHANNELS:
             payload = payload[1:]
         return payload.decode("utf-8", errors="replace")
     if isinstance(message, str):
@@ -25,8 +47,60 @@ def decode_ws_message(message: Any) -> str:
     return str(message)
 
 
+def parse_ws_frame(message: Any) -> Tuple[int, bytes]:
+    """
+    Split a WebSocket message from ECI into ``(channel, payload)``.
+
+    Binary frames carry their channel in the first byte. Text frames and
+    binary frames without a known channel are treated as stdout.
+    """
+    if message is None:
+        return WS_MSG_STDOUT, b""
+    if isinstance(message, bytes):
+        if message and message[0] in _WS_CHANNELS:
+            return message[0], message[1:]
+        return WS_MSG_STDOUT, message
+    if isinstance(message, str):
+        return WS_MSG_STDOUT, message.encode("utf-8")
+    return WS_MSG_STDOUT, str(message).encode("utf-8")
+
+
+def parse_exit_status(payload: bytes) -> Optional[int]:
+    """
+    Exit code from an exit-channel payload, or None if it has none.
+
+    ECI sends a status object with ``exitCode``; Kubernetes-style payloads
+    only report ``Success``/``Failure`` with the code in ``details.causes``.
+    """
+    try:
+        status = json.loads(payload.decode("utf-8", errors="replace") or "{}")
+    except ValueError:
+        return None
+    if not isinstance(status, dict):
+        return None
+    for key in ("exitCode", "ExitCode", "exit_code"):
+        if isinstance(status.get(key), int):
+            return status[key]
+    causes = (status.get("details") or {}).get("causes") or []
+    for cause in causes:
+        if isinstance(cause, dict) and cause.get("reason") == "ExitCode":
+            try:
+                return int(cause.get("message", ""))
+            except ValueError:
+                return None
+    if status.get("status") == "Success":
+        return 0
+    return None
+
+
 def encode_ws_stdin(data: str | bytes) -> bytes:
     """Encode data as a WebSocket stdin message for ECI."""
     if isinstance(data, str):
         data = data.encode("utf-8")
     return bytes([WS_MSG_STDIN]) + data
+
+
+def encode_ws_resize(cols: int, rows: int) -> bytes:
+    """Encode a terminal size as a WebSocket resize message for ECI."""
+    size = json.dumps({"Width": int(cols), "Height": int(rows)})
+    return bytes([WS_MSG_RESIZE]) + size.encode("utf-8")
@@ -1,4 +1,35 @@
-from .client import EciSandbox
+from typing import TYPE_CHECKING, Any
+
+from .agent import SandboxAgent
+from .broadcast import BroadcastRun
+from .pty import PtySession
+from .python_session import PythonSession
 from .sandbox import Sandbox
 
-__all__ = ["EciSandbox", "Sandbox"]
+if TYPE_CHECKING:
+    from .client import EciSandbox
+    from .transport import SyncHttpTransport
+
+
+def __getattr__(name: str) -> Any:
+    # Deferred so that importing the handle type does not load the SDK.
+    if name == "EciSandbox":
+        from .client import EciSandbox
+
+        return EciSandbox
+    if name == "SyncHttpTransport":
+        from .transport import SyncHttpTransport
+
+        return SyncHttpTransport
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "BroadcastRun",
+    "EciSandbox",
+    "PtySession",
+    "PythonSession",
+    "Sandbox",
+    "SandboxAgent",
+    "SyncHttpTransport",
+]
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .._common.agent import (
+    AGENT_CALL_TIMEOUT,
+    AGENT_EXEC_TIMEOUT,
+    AGENT_PING_INTERVAL,
+    AgentCall,
+    AgentStream,
+    agent_job_log,
+    call_fields,
+    command_result,
+    encode_frame,
+    exec_request,
+    frame_id,
+    operation_result,
+    split_frame,
+)
+from .._common.capture import OutputCapture
+from .._common.config import CaptureLimits
+from .._common.models import CommandResult, OperationResult, TRANSPORT_AGENT
+from .._common.process import DEFAULT_KILL_GRACE, new_job_token
+from .._common.ws import (
+    WS_MSG_EXIT,
+    WS_MSG_STDERR,
+    WS_MSG_STDOUT,
+    encode_ws_stdin,
+    parse_exit_status,
+    parse_ws_frame,
+)
+
+# Extra seconds to wait for an exec's result after its own timeout, for the
+# agent to stop the command and report.
+_EXEC_RESULT_GRACE = DEFAULT_KILL_GRACE + 5.0
+
+
+class AgentConnection:
+    """
+    Framed request/response connection to a program running on the stdin
+    of one exec (the helper agent or a Python session kernel).
+
+    Every request carries its own id, so any number of threads can use the
+    connection at once; a reader thread routes the responses. Once the
+    connection is gone, pending and new requests fail and ``connected`` is
+    False.
+    """
+
+    # Names the program in error messages.
+    name = "Agent"
+
+    def __init__(
+        self,
+        ws: Any,
+        sandbox_id: str,
+        container_name: str,
+        request_id: str = "",
+        capture_limits: Optional[CaptureLimits] = None,
+    ):
+        self._ws = ws
+        self.sandbox_id = sandbox_id
+        self.container_name = container_name
+        self.request_id = request_id
+        self._capture_limits = capture_limits or CaptureLimits()
+        self._stream = AgentStream()
+        self._ids = itertools.count(1)
+        self._calls: Dict[int, Tuple[AgentCall, threading.Event]] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._closed = threading.Event()
+        self._stderr = bytearray()
+        self.error_message = ""
+        self._reader = threading.Thread(
+            target=self._read_loop, name="eci-agent-connection", daemon=True
+        )
+        self._reader.start()
+
+    @property
+    def connected(self) -> bool:
+        return self._ready.is_set() and not self._closed.is_set()
+
+    def wait_ready(self, timeout: float) -> str:
+        """
+        Wait for the program to report that it is running. Returns an error
+        message, or an empty string once it is ready.
+        """
+        end_time = time.monotonic() + timeout
+        while not self._ready.is_set() and not self._closed.is_set():
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                return f"{self.name} did not start within {timeout:g}s"
+            self._closed.wait(min(remaining, 0.05))
+        if self._ready.is_set():
+            return ""
+        details = self.startup_output() or self.error_message
+        return f"{self.name} failed to start: {details}"
+
+    def startup_output(self) -> str:
+        """What the launcher printed before the program came up."""
+        stderr = bytes(self._stderr).decode("utf-8", errors="replace").strip()
+        return "\n".join(part for part in (self._stream.startup_text(), stderr) if part)
+
+    def close(self) -> None:
+        """Close the connection; the program exits when its stdin closes."""
+        self._shutdown(f"{self.name} connection closed")
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+    def __enter__(self) -> "AgentConnection":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    # ==================== Connection ====================
+
+    def request(
+        self,
+        request: Dict[str, Any],
+        call: AgentCall,
+        data: bytes = b"",
+        timeout: Optional[float] = AGENT_CALL_TIMEOUT,
+    ) -> AgentCall:
+        """Send ``request`` and wait up to ``timeout`` seconds for ``call`` to finish."""
+        call_id, done = self.submit(request, call, data)
+        if not done.wait(timeout):
+            self.forget(call_id)
+            call.fail(f"{self.name} call timed out after {timeout:g}s")
+        return call
+
+    def submit(
+        self, request: Dict[str, Any], call: AgentCall, data: bytes = b""
+    ) -> Tuple[int, threading.Event]:
+        """
+        Send ``request`` without waiting. Returns its id and an event set
+        once ``call`` has its result (or has failed).
+        """
+        import websocket
+
+        done = threading.Event()
+        with self._lock:
+            if self._closed.is_set():
+                call.fail(self.error_message or f"{self.name} is not connected")
+                done.set()
+                return 0, done
+            call_id = next(self._ids)
+            self._calls[call_id] = (call, done)
+        request["id"] = call_id
+        try:
+            with self._send_lock:
+                for chunk in split_frame(encode_frame(request, data)):
+                    self._ws.send(
+                        encode_ws_stdin(chunk), opcode=websocket.ABNF.OPCODE_BINARY
+                    )
+        except Exception as exc:
+            self._shutdown(f"{self.name} connection failed: {exc}")
+        return call_id, done
+
+    def forget(self, call_id: int) -> None:
+        """Stop routing responses for a submitted request."""
+        with self._lock:
+            self._calls.pop(call_id, None)
+
+    def _read_loop(self) -> None:
+        import websocket
+
+        error = f"{self.name} connection closed"
+        try:
+            while True:
+                self._ws.settimeout(AGENT_PING_INTERVAL)
+                try:
+                    message = self._ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    self._ws.ping()
+                    continue
+                except (websocket.WebSocketException, OSError) as exc:
+                    error = f"{self.name} connection lost: {exc}"
+                    break
+                if not message:
+                    break
+                channel, payload = parse_ws_frame(message)
+                if channel == WS_MSG_EXIT:
+                    error = f"{self.name} exited with code {parse_exit_status(payload)}"
+                    break
+                if channel == WS_MSG_STDERR:
+                    self._stderr.extend(payload)
+                    del self._stderr[:-4096]
+                elif channel == WS_MSG_STDOUT:
+                    self._dispatch(payload)
+        except Exception as exc:
+            error = f"{self.name} connection failed: {exc}"
+        finally:
+            self._shutdown(error)
+
+    def _dispatch(self, payload: bytes) -> None:
+        for header, data in self._stream.feed(payload):
+            rid = frame_id(header)
+            with self._lock:
+                entry = self._calls.get(rid)
+            if entry is None:
+                continue
+            call, done = entry
+            if call.add(header, data):
+                with self._lock:
+                    self._calls.pop(rid, None)
+                done.set()
+        if self._stream.ready:
+            self._ready.set()
+
+    def _shutdown(self, error: str) -> None:
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self.error_message = error
+            self._closed.set()
+            calls = list(self._calls.values())
+            self._calls.clear()
+        for call, done in calls:
+            call.fail(error)
+            done.set()
+
+
+class SandboxAgent(AgentConnection):
+    """
+    Connection to the helper agent running in one sandbox.
+
+    Created by ``EciSandbox.start_agent``. Every call is a framed request
+    with its own id on a single exec stream, so any number of threads can
+    use the agent at once. Once the connection is gone, calls return
+    ``success=False`` and ``connected`` is False.
+    """
+
+    def __enter__(self) -> "SandboxAgent":
+        return self
+
+    def exec(
+        self,
+        command: List[str],
+        exec_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+        stdin: Union[str, bytes] = b"",
+    ) -> CommandResult:
+        """
+        Run a list-form command and collect its output (stdout and stderr
+        combined). A command still running after ``timeout`` seconds
+        (default 600) has its process group stopped and reports
+        ``terminated``.
+        """
+        if not command:
+            return CommandResult(
+                success=False,
+                error_message="command is required",
+                transport=TRANSPORT_AGENT,
+            )
+        if isinstance(stdin, str):
+            stdin = stdin.encode("utf-8")
+        if timeout is None or timeout <= 0:
+            timeout = AGENT_EXEC_TIMEOUT
+        call = AgentCall(OutputCapture(self._capture_limits))
+        self.request(
+            exec_request(command, exec_dir, timeout, DEFAULT_KILL_GRACE),
+            call,
+            stdin,
+            timeout + _EXEC_RESULT_GRACE,
+        )
+        return command_result(call, self.request_id)
+
+    def bash(
+        self,
+        command: str,
+        exec_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> CommandResult:
+        """Run a shell command via ``bash -lc`` (see ``exec``)."""
+        if not command:
+            return CommandResult(
+                success=False,
+                error_message="command is required",
+                transport=TRANSPORT_AGENT,
+            )
+        return self.exec(["bash", "-lc", command], exec_dir=exec_dir, timeout=timeout)
+
+    def spawn(
+        self,
+        command: str,
+        exec_dir: Optional[str] = None,
+        log_path: Optional[str] = None,
+    ) -> OperationResult:
+        """
+        Start a shell command in the background, in its own session, with
+        its output appended to ``log_path`` (a new file under the agent's
+        job directory by default). ``data`` holds ``pid`` and ``log``; the
+        exit code is written to ``<log>.exit`` when it finishes.
+        """
+        request = {
+            "op": "spawn",
+            "argv": ["bash", "-lc", command],
+            "cwd": exec_dir,
+            "log": log_path or agent_job_log(new_job_token()),
+        }
+        call = self.request(request, AgentCall())
+        return operation_result(call, self.request_id, call_fields(call))
+
+    def read_file(
+        self, path: str, offset: int = 0, length: Optional[int] = None
+    ) -> OperationResult:
+        """Read ``length`` bytes (all by default) from ``offset``; ``data`` is bytes."""
+        call = self.request(
+            {"op": "read", "path": path, "offset": offset, "length": length},
+            AgentCall(),
+        )
+        return operation_result(call, self.request_id, bytes(call.data))
+
+    def write_file(
+        self,
+        path: str,
+        content: Union[str, bytes],
+        mode: Optional[int] = None,
+        append: bool = False,
+    ) -> OperationResult:
+        """
+        Write ``content`` to ``path``, creating parent directories. The file
+        is replaced atomically unless ``append`` is set.
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        call = self.request(
+            {"op": "write", "path": path, "mode": mode, "append": append},
+            AgentCall(),
+            content,
+        )
+        return operation_result(call, self.request_id, call_fields(call))
+
+    def stat(self, path: str) -> OperationResult:
+        """``data`` holds ``exists`` and, if it does, size, mode, mtime and is_dir."""
+        call = self.request({"op": "stat", "path": path}, AgentCall())
+        return operation_result(call, self.request_id, call_fields(call))
+
+    def list_dir(self, path: str) -> OperationResult:
+        """``data`` is a list of entries (name, path, size, mode, mtime, is_dir)."""
+        call = self.request({"op": "list", "path": path}, AgentCall())
+        return operation_result(
+            call, self.request_id, call_fields(call).get("entries", [])
+        )
+
+    def kill(self, pid: int, signal: int = 15, group: bool = True) -> OperationResult:
+        """Signal a process (its whole group by default); ``data["killed"]``."""
+        call = self.request(
+            {"op": "kill", "pid": pid, "signal": signal, "group": group}, AgentCall()
+        )
+        return operation_result(call, self.request_id, call_fields(call))
+
+    def tail(
+        self,
+        path: str,
+        lines: Optional[int] = None,
+        cursor: Optional[int] = None,
+        max_bytes: int = 64 * 1024,
+    ) -> OperationResult:
+        """
+        Read the end of a file, or what was written after ``cursor`` (a
+        byte offset from a previous call). ``data`` holds ``output``,
+        ``cursor``, ``size`` and, for a spawned job's log, ``exit_code``
+        once it has finished.
+        """
+        call = self.request(
+            {
+                "op": "tail",
+                "path": path,
+                "lines": lines,
+                "offset": cursor,
+                "max_bytes": max_bytes,
+            },
+            AgentCall(),
+        )
+        fields = call_fields(call)
+        fields["output"] = bytes(call.data).decode("utf-8", errors="replace")
+        return operation_result(call, self.request_id, fields)
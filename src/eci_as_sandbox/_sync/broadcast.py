@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, Optional, Set
+
+from .._common.broadcast import (
+    BroadcastStats,
+    TokenBucket,
+    failed_item,
+    timed_out_item,
+    unique_ids,
+)
+from .._common.models import BroadcastItem, BroadcastSummary, CommandResult
+
+
+class BroadcastRun:
+    """
+    One command running on many sandboxes from a set of worker threads.
+
+    Iterating yields a ``BroadcastItem`` per sandbox in completion order.
+    A target still running ``timeout`` seconds after it started is reported
+    as timed out. Its thread cannot be interrupted, so it is abandoned and
+    a new worker takes its slot; ``abandoned`` counts those threads while
+    they are still running. The clients pass ``timeout`` on to the exec as
+    well, which stops the command in the sandbox, so abandoned threads end
+    shortly after.
+    """
+
+    def __init__(
+        self,
+        run_one: Callable[[str], CommandResult],
+        sandbox_ids: Iterable[str],
+        concurrency: int,
+        timeout: Optional[float] = None,
+        rate_limit: Optional[float] = None,
+    ):
+        ids = unique_ids(sandbox_ids)
+        self._run_one = run_one
+        self._timeout = timeout if timeout and timeout > 0 else None
+        self._bucket = TokenBucket(rate_limit) if rate_limit else None
+        self._stats = BroadcastStats(len(ids))
+        self._todo: Deque[str] = deque(ids)
+        self._ready: Deque[BroadcastItem] = deque()
+        # Start times of targets whose result is still expected.
+        self._running: Dict[str, float] = {}
+        self._abandoned: Set[str] = set()
+        self._unreported = len(ids)
+        self._closed = False
+        self._changed = threading.Condition()
+        for _ in range(max(1, min(concurrency, len(ids) or 1))):
+            self._spawn()
+
+    @property
+    def abandoned(self) -> int:
+        """Timed-out targets whose threads are still running."""
+        with self._changed:
+            return len(self._abandoned)
+
+    def __iter__(self) -> Iterator[BroadcastItem]:
+        return self
+
+    def __next__(self) -> BroadcastItem:
+        with self._changed:
+            while not self._ready:
+                if self._unreported <= 0 or self._closed:
+                    raise StopIteration
+                self._changed.wait(self._expire_locked())
+            return self._ready.popleft()
+
+    def __enter__(self) -> "BroadcastRun":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def summary(self) -> BroadcastSummary:
+        """Drain the remaining results and return aggregate statistics."""
+        for _ in self:
+            pass
+        return self._stats.summary()
+
+    def close(self) -> None:
+        """Skip targets that have not started yet and end iteration."""
+        with self._changed:
+            self._closed = True
+            self._todo.clear()
+            self._changed.notify_all()
+
+    def _spawn(self) -> None:
+        threading.Thread(target=self._worker, name="eci-broadcast", daemon=True).start()
+
+    def _worker(self) -> None:
+        while True:
+            with self._changed:
+                if self._closed or not self._todo:
+                    return
+                sandbox_id = self._todo.popleft()
+            if self._bucket is not None:
+                delay = self._bucket.reserve()
+                if delay > 0:
+                    time.sleep(delay)
+            started = time.monotonic()
+            with self._changed:
+                self._running[sandbox_id] = started
+                # Wake the iterator so it waits for this target's deadline.
+                self._changed.notify_all()
+            item = self._run(sandbox_id, started)
+            with self._changed:
+                if sandbox_id in self._abandoned:
+                    # Reported as timed out; a replacement holds the slot.
+                    self._abandoned.discard(sandbox_id)
+                    return
+                self._running.pop(sandbox_id, None)
+                self._emit_locked(item)
+
+    def _run(self, sandbox_id: str, started: float) -> BroadcastItem:
+        try:
+            result = self._run_one(sandbox_id)
+        except Exception as exc:
+            return failed_item(sandbox_id, exc, time.monotonic() - started)
+        return BroadcastItem(
+            sandbox_id=sandbox_id,
+            result=result,
+            elapsed=time.monotonic() - started,
+        )
+
+    def _expire_locked(self) -> Optional[float]:
+        """
+        Report targets past their timeout, replacing their workers, and
+        return how long the iterator may wait for the next deadline.
+        """
+        if self._timeout is None:
+            return None
+        now = time.monotonic()
+        wait_for = self._timeout
+        for sandbox_id, started in list(self._running.items()):
+            remaining = started + self._timeout - now
+            if remaining > 0:
+                wait_for = min(wait_for, remaining)
+                continue
+            del self._running[sandbox_id]
+            self._abandoned.add(sandbox_id)
+            self._emit_locked(timed_out_item(sandbox_id, self._timeout, now - started))
+            if self._todo and not self._closed:
+                self._spawn()
+        return wait_for
+
+    def _emit_locked(self, item: BroadcastItem) -> None:
+        self._stats.record(item)
+        self._unreported -= 1
+        self._ready.append(item)
+        self._changed.notify_all()
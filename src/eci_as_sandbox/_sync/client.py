@@ -1,36 +1,117 @@
 from __future__ import annotations
 
 import base64
-import gzip
 import json
 import os
 import random
 import shlex
+import socket
 import string
+import threading
 import time
 import uuid
-from typing import Any, Dict, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from alibabacloud_eci20180808 import models as eci_models
-from alibabacloud_eci20180808.client import Client as EciClient
 from alibabacloud_tea_openapi import models as open_api_models
 from alibabacloud_tea_util import models as util_models
 
-from .._common.config import Config, _get_endpoint_for_region, _load_config
+from .._common.agent import (
+    AGENT_READY_TIMEOUT,
+    AGENT_SOURCE,
+    python_script_command,
+)
+from .._common.batch import (
+    build_batch_script,
+    parse_batch_output,
+    validate_batch_mode,
+)
+from .._common.broadcast import DEFAULT_BROADCAST_CONCURRENCY
+from .._common.capture import OutputCapture
+from .._common.compression import DecompressingOutput, client_codecs
+from .._common.config import (
+    CaptureLimits,
+    Config,
+    PoolLimits,
+    _get_endpoint_for_region,
+    _load_config,
+)
 from .._common.exceptions import AuthenticationError
+from .._common.exec_strategy import ExecStrategy, validate_exec_mode
+from .._common.follow import (
+    FOLLOW_ACK,
+    FOLLOW_DONE,
+    FOLLOW_GONE,
+    FOLLOW_RUNNING,
+    FollowStatus,
+    JobOutput,
+)
+from .._common.planner import CommandPlan, TransportPlanner, command_fits
+from .._common.pty import (
+    PTY_DEFAULT_COLS,
+    PTY_DEFAULT_ROWS,
+    PTY_DEFAULT_TERM,
+    pty_command,
+)
+from .._common.python_session import KERNEL_SOURCE
+from .._common.process import (
+    STREAM_LOG_LIMIT,
+    kill_command,
+    new_job_token,
+    remove_stream_command,
+    resume_script,
+    split_inline_output,
+    was_terminated,
+    wrap_argv,
+    wrap_inline_argv,
+    wrap_script,
+)
+from .._common.script_cache import (
+    SCRIPT_MISSING_MARKER,
+    ScriptIndex,
+    guard_command,
+    probe_command,
+    probe_found,
+    script_digest,
+    script_path,
+    upload_command,
+)
+from .._common.registry import DEFAULT_REGISTRY_SIZE, SandboxRegistry
 from .._common.logger import (
+    _api_event_enabled,
     _log_api_call,
     _log_api_response,
     _log_operation_error,
     get_logger,
 )
 from .._common.models import (
+    BATCH_MODE_SEQUENTIAL,
+    BatchResult,
     CommandResult,
+    DEFAULT_RECONNECT_RETRIES,
     DeleteResult,
+    EXEC_MODE_AUTO,
+    EXEC_MODE_HTTP,
+    EXEC_MODE_WEBSOCKET,
     GetSandboxResult,
     OperationResult,
+    PoolStats,
+    RegistryStats,
     SandboxInfo,
     SandboxListResult,
+    RUN_LONG_DETACH_AFTER,
     SandboxResult,
     TmuxCommandStatus,
     TmuxKillResult,
@@ -38,23 +119,86 @@ from .._common.models import (
     TmuxStartResult,
     TMUX_DEFAULT_TIMEOUT,
     TMUX_HISTORY_LIMIT,
-    TMUX_MARKER_EXIT_CODE,
     TMUX_OUTPUT_TAIL_LINES,
     TMUX_POLL_BACKOFF_FACTOR,
     TMUX_POLL_INITIAL_DELAY,
     TMUX_POLL_MAX_DELAY,
     TMUX_SESSION_PREFIX,
+    SYNC_RESPONSE_MAX_SECONDS,
+    TRANSPORT_STDIN,
+    TRANSPORT_UPLOAD,
     extract_request_id,
+    response_field,
 )
-from .._common.ws import decode_ws_message, encode_ws_stdin
+from .._common.tmux import (
+    failed_polls,
+    follow_script,
+    job_result,
+    job_script,
+    kill_sessions_command,
+    list_script,
+    parse_list_output,
+    parse_poll_output,
+    poll_script,
+    start_result,
+    start_script,
+)
+from .._common.ws import (
+    WS_MSG_EXIT,
+    WS_MSG_STDERR,
+    WS_MSG_STDOUT,
+    WsReadResult,
+    encode_ws_stdin,
+    parse_exit_status,
+    parse_ws_frame,
+)
+from .agent import AgentConnection, SandboxAgent
+from .broadcast import BroadcastRun
+from .pty import PtySession
+from .python_session import PythonKernel, PythonSession
 from .sandbox import Sandbox
+from .transport import PooledEciClient, SyncHttpTransport
 
 
 _logger = get_logger("eci-as-sandbox")
+_Connection = TypeVar("_Connection", bound=AgentConnection)
 _DEFAULT_SYNC_TIMEOUT = 600.0
+# Read-timeout headroom over ECI's inline SyncResponse cut-off.
+_SYNC_RESPONSE_GRACE = 5.0
+# Longest single blocking tmux wait exec; longer waits are chained.
+_TMUX_WAIT_CHUNK = 300.0
+_TMUX_WAIT_GRACE = 10.0
+# Headroom for a run_long follow exec on top of its streaming time.
+_FOLLOW_GRACE = 15.0
+# Consecutive follow execs that may fail before run_long gives up.
+_FOLLOW_MAX_FAILURES = 5
+# Handshake budget for exec WebSockets; generous enough for busy worker pools.
+_WS_CONNECT_TIMEOUT = 10.0
+
+# Shared by every client that does not bring its own transport or limits, so
+# connections to the same endpoint are reused across instances and threads.
+_shared_transport: Optional[SyncHttpTransport] = None
+_shared_transport_lock = threading.Lock()
+
+
+def _get_shared_transport() -> SyncHttpTransport:
+    global _shared_transport
+    with _shared_transport_lock:
+        if _shared_transport is None:
+            _shared_transport = SyncHttpTransport()
+        return _shared_transport
 
 
 class EciSandbox:
+    """
+    Synchronous ECI sandbox client.
+
+    A single instance is safe to share between threads (for example the
+    workers of a ``ThreadPoolExecutor``): the handle registry is locked, HTTP
+    requests go through a thread-safe bounded connection pool, and WebSocket
+    TLS settings are cached per thread.
+    """
+
     def __init__(
         self,
         access_key_id: str = "",
@@ -64,6 +208,11 @@ class EciSandbox:
         security_token: str = "",
         region_id: str = "",
         proxy: Optional[Dict[str, Any]] = None,
+        pool_limits: Optional[PoolLimits] = None,
+        registry_size: int = DEFAULT_REGISTRY_SIZE,
+        capture_limits: Optional[CaptureLimits] = None,
+        reconnect_retries: int = DEFAULT_RECONNECT_RETRIES,
+        transport: Optional[SyncHttpTransport] = None,
     ):
         """
         Initialize EciSandbox client.
@@ -78,6 +227,17 @@ class EciSandbox:
             proxy: Optional proxy configuration dict with keys:
                 - http_proxy: HTTP proxy URL (e.g., "http://proxy:8080")
                 - https_proxy: HTTPS proxy URL (e.g., "http://proxy:8080")
+            pool_limits: Connection pool limits for a client-owned transport
+            registry_size: Maximum number of sandbox handles (and their
+                cached metadata) kept by the client
+            capture_limits: Bounds on the streamed output kept in memory
+                per exec (head/tail bytes, optional spill to a temp file)
+            reconnect_retries: How many times in a row a dropped exec
+                stream is reattached without progress before the call
+                fails; 0 reports a drop as an error straight away
+            transport: Transport to share with other clients, closed by the
+                caller; by default a process-wide transport with default
+                limits is used
         """
         config_data = _load_config(cfg, env_file)
 
@@ -141,8 +301,58 @@ class EciSandbox:
             if self._https_proxy:
                 config.https_proxy = self._https_proxy
 
-        self.client = EciClient(config)
-        self._sandboxes: Dict[str, Sandbox] = {}
+        # The client holds a transport it created or the shared one, which
+        # ``close`` releases; a caller's transport is the caller's to close.
+        self._holds_transport = transport is None
+        if transport is None:
+            transport = (
+                SyncHttpTransport(pool_limits)
+                if pool_limits is not None
+                else _get_shared_transport()
+            )
+        if self._holds_transport:
+            transport.acquire()
+        self.transport = transport
+        self.client = PooledEciClient(config, transport)
+        self._sandboxes: SandboxRegistry[Sandbox] = SandboxRegistry(registry_size)
+        self._ws_proxy_settings = self._parse_ws_proxy_settings()
+        self._ws_local = threading.local()
+        self._exec_strategy = ExecStrategy()
+        self._capture_limits = capture_limits or CaptureLimits()
+        self._reconnect_retries = max(0, reconnect_retries)
+        self._planner = TransportPlanner()
+        self._scripts = ScriptIndex()
+        self._agents: Dict[str, SandboxAgent] = {}
+        self._agents_lock = threading.Lock()
+
+    def __enter__(self) -> "EciSandbox":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close agent connections and release the HTTP transport. Its pooled
+        connections are closed once no other client holds it; a transport
+        passed as ``transport`` is left to the caller.
+        """
+        with self._agents_lock:
+            agents = list(self._agents.values())
+            self._agents.clear()
+        for agent in agents:
+            agent.close()
+        if self._holds_transport:
+            self._holds_transport = False
+            self.transport.release()
+
+    def pool_stats(self) -> PoolStats:
+        """Return connection pool statistics for the HTTP transport."""
+        return self.transport.stats()
+
+    def registry_stats(self) -> RegistryStats:
+        """Return size and hit/eviction counters of the sandbox registry."""
+        return self._sandboxes.stats()
 
     def _generate_name(self, prefix: str = "sandbox") -> str:
         suffix = "".join(random.choices(string.ascii_lowercase + string.digits, k=10))
@@ -273,16 +483,16 @@ class EciSandbox:
         if eip_instance_id:
             request.eip_instance_id = eip_instance_id
 
-        _log_api_call("CreateContainerGroup", f"Name={group_name}, Image={image}")
+        _log_api_call("CreateContainerGroup", "Name=%s, Image=%s", group_name, image)
 
         try:
             response = self.client.create_container_group(request)
             request_id = extract_request_id(response)
-            body = response.to_map().get("body", {})
-            sandbox_id = body.get("ContainerGroupId", "")
+            sandbox_id = response_field(response, "container_group_id")
 
             if not sandbox_id:
-                _log_api_response("CreateContainerGroup", request_id, False)
+                if _api_event_enabled():
+                    _log_api_response("CreateContainerGroup", request_id, False)
                 return SandboxResult(
                     request_id=request_id,
                     success=False,
@@ -290,14 +500,15 @@ class EciSandbox:
                 )
 
             sandbox = Sandbox(self, sandbox_id, container_name=container_name)
-            self._sandboxes[sandbox_id] = sandbox
+            self._sandboxes.put(sandbox_id, sandbox, container_name=container_name)
 
-            _log_api_response(
-                "CreateContainerGroup",
-                request_id,
-                True,
-                {"sandbox_id": sandbox_id},
-            )
+            if _api_event_enabled():
+                _log_api_response(
+                    "CreateContainerGroup",
+                    request_id,
+                    True,
+                    sandbox_id=sandbox_id,
+                )
             return SandboxResult(
                 request_id=request_id,
                 success=True,
@@ -322,13 +533,12 @@ class EciSandbox:
             container_group_ids=json.dumps([sandbox_id]),
         )
 
-        _log_api_call("DescribeContainerGroups", f"ContainerGroupId={sandbox_id}")
+        _log_api_call("DescribeContainerGroups", "ContainerGroupId=%s", sandbox_id)
 
         try:
             response = self.client.describe_container_groups(request)
             request_id = extract_request_id(response)
-            body = response.to_map().get("body", {})
-            groups = body.get("ContainerGroups", []) or []
+            groups = response_field(response, "container_groups", [])
 
             if not groups:
                 return OperationResult(
@@ -338,12 +548,19 @@ class EciSandbox:
                 )
 
             info = SandboxInfo.from_group(groups[0])
-            _log_api_response(
-                "DescribeContainerGroups",
-                request_id,
-                True,
-                {"sandbox_id": info.sandbox_id, "status": info.status},
+            self._sandboxes.update(
+                sandbox_id,
+                container_name=info.container_name,
+                status=info.status,
             )
+            if _api_event_enabled():
+                _log_api_response(
+                    "DescribeContainerGroups",
+                    request_id,
+                    True,
+                    sandbox_id=info.sandbox_id,
+                    status=info.status,
+                )
             return OperationResult(
                 request_id=request_id,
                 success=True,
@@ -380,10 +597,19 @@ class EciSandbox:
                 error_message=info_result.error_message,
             )
 
+        info = info_result.data
+        container_name = info.container_name if info else ""
         sandbox = self._sandboxes.get(sandbox_id)
         if sandbox is None:
-            sandbox = Sandbox(self, sandbox_id)
-            self._sandboxes[sandbox_id] = sandbox
+            sandbox = Sandbox(self, sandbox_id, container_name=container_name)
+            self._sandboxes.put(
+                sandbox_id,
+                sandbox,
+                container_name=container_name,
+                status=info.status if info else "",
+            )
+        elif not sandbox.container_name:
+            sandbox.container_name = container_name
 
         return SandboxResult(
             request_id=info_result.request_id,
@@ -422,30 +648,29 @@ class EciSandbox:
             request.tag = self._build_list_tags(tags)
 
         _log_api_call(
-            "DescribeContainerGroups", f"Limit={limit}, Status={status or ''}"
+            "DescribeContainerGroups", "Limit=%s, Status=%s", limit, status or ""
         )
 
         try:
             response = self.client.describe_container_groups(request)
             request_id = extract_request_id(response)
-            body = response.to_map().get("body", {})
-            groups = body.get("ContainerGroups", []) or []
+            groups = response_field(response, "container_groups", [])
             sandbox_ids: list[str] = []
             for group in groups:
-                if not isinstance(group, dict):
-                    continue
-                sandbox_id = group.get("ContainerGroupId")
+                sandbox_id = group.container_group_id
                 if isinstance(sandbox_id, str) and sandbox_id:
                     sandbox_ids.append(sandbox_id)
-            next_token = body.get("NextToken", "")
-            total_count = int(body.get("TotalCount", len(sandbox_ids)))
+            next_token = response_field(response, "next_token")
+            total_count = int(response_field(response, "total_count", len(sandbox_ids)))
 
-            _log_api_response(
-                "DescribeContainerGroups",
-                request_id,
-                True,
-                {"returned": len(sandbox_ids), "total": total_count},
-            )
+            if _api_event_enabled():
+                _log_api_response(
+                    "DescribeContainerGroups",
+                    request_id,
+                    True,
+                    returned=len(sandbox_ids),
+                    total=total_count,
+                )
             return SandboxListResult(
                 request_id=request_id,
                 success=True,
@@ -464,27 +689,34 @@ class EciSandbox:
             )
 
     def delete(self, sandbox_id: str, force: bool = False) -> DeleteResult:
+        """
+        Delete a sandbox, whatever its state.
+
+        ``force`` is accepted for compatibility and has no effect:
+        DeleteContainerGroup has no such option.
+        """
         if not sandbox_id:
             return DeleteResult(success=False, error_message="sandbox_id is required")
 
         request = eci_models.DeleteContainerGroupRequest(
             region_id=self.region_id,
             container_group_id=sandbox_id,
-            force=force,
         )
 
-        _log_api_call("DeleteContainerGroup", f"ContainerGroupId={sandbox_id}")
+        _log_api_call("DeleteContainerGroup", "ContainerGroupId=%s", sandbox_id)
 
         try:
             response = self.client.delete_container_group(request)
             request_id = extract_request_id(response)
-            _log_api_response(
-                "DeleteContainerGroup",
-                request_id,
-                True,
-                {"sandbox_id": sandbox_id},
-            )
-            self._sandboxes.pop(sandbox_id, None)
+            if _api_event_enabled():
+                _log_api_response(
+                    "DeleteContainerGroup",
+                    request_id,
+                    True,
+                    sandbox_id=sandbox_id,
+                )
+            self._sandboxes.pop(sandbox_id)
+            self._scripts.forget(sandbox_id)
             return DeleteResult(request_id=request_id, success=True)
         except Exception as exc:
             _log_operation_error("DeleteContainerGroup", str(exc), exc_info=True)
@@ -505,17 +737,18 @@ class EciSandbox:
             container_group_id=sandbox_id,
         )
 
-        _log_api_call("RestartContainerGroup", f"ContainerGroupId={sandbox_id}")
+        _log_api_call("RestartContainerGroup", "ContainerGroupId=%s", sandbox_id)
 
         try:
             response = self.client.restart_container_group(request)
             request_id = extract_request_id(response)
-            _log_api_response(
-                "RestartContainerGroup",
-                request_id,
-                True,
-                {"sandbox_id": sandbox_id},
-            )
+            if _api_event_enabled():
+                _log_api_response(
+                    "RestartContainerGroup",
+                    request_id,
+                    True,
+                    sandbox_id=sandbox_id,
+                )
             return OperationResult(request_id=request_id, success=True)
         except Exception as exc:
             _log_operation_error("RestartContainerGroup", str(exc), exc_info=True)
@@ -532,12 +765,429 @@ class EciSandbox:
         container_name: Optional[str] = None,
         sync: bool = True,
         timeout: Optional[float] = None,
+        exec_mode: str = EXEC_MODE_AUTO,
+        detach_after: Optional[float] = None,
+        compress_output: bool = False,
+    ) -> CommandResult:
+        """
+        Run a list-form command in the sandbox container.
+
+        Args:
+            sandbox_id: The sandbox container ID
+            command: Command and arguments
+            container_name: Container name (auto-resolved if not provided)
+            sync: Wait for the command and collect its output
+            timeout: Timeout in seconds for collecting output
+            exec_mode: How a sync call collects output: ``"http"`` (inline
+                SyncResponse, one round trip, short commands only),
+                ``"websocket"`` (stream) or ``"auto"`` to choose per call
+                from the timeout and measured history of the command
+            detach_after: Run as a background job and reattach every this
+                many seconds (see ``run_long``); not limited by the sync
+                exec cap
+            compress_output: Compress streamed output in the container
+                (zstd or gzip, whichever the image has) and decompress it
+                here; worth it for verbose commands
+
+        Returns:
+            CommandResult with the command output. Commands over ECI's
+            2048-byte limit are streamed or uploaded (see ``transport``).
+        """
+        if not sandbox_id:
+            return CommandResult(success=False, error_message="sandbox_id is required")
+        if not command:
+            return CommandResult(success=False, error_message="command is required")
+        if detach_after is not None and sync:
+            return self.run_long(
+                sandbox_id,
+                " ".join(shlex.quote(part) for part in command),
+                container_name=container_name,
+                timeout=timeout,
+                detach_after=detach_after,
+            )
+
+        plan = self._planner.plan_argv(command, streamable=sync)
+        return self._run_command_plan(
+            sandbox_id,
+            plan,
+            container_name,
+            sync,
+            timeout,
+            exec_mode,
+            compress_output=compress_output,
+        )
+
+    def bash(
+        self,
+        sandbox_id: str,
+        command: str,
+        exec_dir: Optional[str] = None,
+        container_name: Optional[str] = None,
+        sync: bool = True,
+        timeout: Optional[float] = None,
+        exec_mode: str = EXEC_MODE_AUTO,
+        detach_after: Optional[float] = None,
+        compress_output: bool = False,
+    ) -> CommandResult:
+        if not sandbox_id:
+            return CommandResult(success=False, error_message="sandbox_id is required")
+        if not command:
+            return CommandResult(success=False, error_message="command is required")
+        if detach_after is not None and sync:
+            return self.run_long(
+                sandbox_id,
+                command,
+                exec_dir=exec_dir,
+                container_name=container_name,
+                timeout=timeout,
+                detach_after=detach_after,
+            )
+        if exec_dir:
+            command = f"cd {shlex.quote(exec_dir)} && {command}"
+        # The command is base64-encoded (gzip-compressed when long) so that
+        # heredocs and special characters survive, and decoded into bash in
+        # the container. Past ECI's 2048-byte limit the planner streams it
+        # over WebSocket stdin or uploads it as a script file instead.
+        plan = self._planner.plan_script(command, streamable=sync)
+        return self._run_command_plan(
+            sandbox_id,
+            plan,
+            container_name,
+            sync,
+            timeout,
+            exec_mode,
+            compress_output=compress_output,
+        )
+
+    def run_long(
+        self,
+        sandbox_id: str,
+        command: str,
+        exec_dir: Optional[str] = None,
+        container_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+        detach_after: float = RUN_LONG_DETACH_AFTER,
+        on_output: Optional[Callable[[str], None]] = None,
     ) -> CommandResult:
+        """
+        Run a command of any duration and collect its complete output.
+
+        The command starts as a tmux job with file-backed output (see
+        ``tmux_start``), and its log is streamed while connected. Each
+        connection ends after ``detach_after`` seconds, or earlier if the
+        WebSocket drops; the next exec resumes at the last byte received,
+        so the output arrives once and in order.
+
+        Args:
+            sandbox_id: The sandbox container ID
+            command: Shell command to execute
+            exec_dir: Working directory for command execution
+            container_name: Container name (auto-resolved if not provided)
+            timeout: Overall time limit (None = wait for the command); the
+                job is killed when it passes
+            detach_after: Longest single connection in seconds
+            on_output: Called with output text as it arrives
+
+        Returns:
+            CommandResult with the combined stdout/stderr and exit_code
+        """
         if not sandbox_id:
             return CommandResult(success=False, error_message="sandbox_id is required")
         if not command:
             return CommandResult(success=False, error_message="command is required")
+        if not container_name:
+            container_name = self._resolve_container_name(sandbox_id)
+        if not container_name:
+            return CommandResult(
+                success=False, error_message="container_name is required"
+            )
+
+        started = self.tmux_start(
+            sandbox_id, command, exec_dir=exec_dir, container_name=container_name
+        )
+        if not started.success:
+            return CommandResult(
+                request_id=started.request_id,
+                success=False,
+                error_message=started.error_message,
+                transport=started.transport,
+            )
+        return self._follow_job(
+            sandbox_id,
+            container_name,
+            started.session_id,
+            timeout,
+            detach_after,
+            on_output,
+            started.transport,
+        )
+
+    def _follow_job(
+        self,
+        sandbox_id: str,
+        container_name: str,
+        session_id: str,
+        timeout: Optional[float],
+        detach_after: float,
+        on_output: Optional[Callable[[str], None]],
+        transport: str,
+    ) -> CommandResult:
+        """Stream a tmux job's log over successive execs until it exits."""
+        output = JobOutput(OutputCapture(self._capture_limits), on_output)
+        deadline = None
+        if timeout is not None and timeout > 0:
+            deadline = time.monotonic() + timeout
+        request_id = ""
+        failures = 0
+        last_error = ""
+        try:
+            while True:
+                seconds = min(detach_after, _DEFAULT_SYNC_TIMEOUT - _FOLLOW_GRACE)
+                seconds = max(1.0, seconds)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.bash(
+                            sandbox_id=sandbox_id,
+                            command=kill_sessions_command([session_id]),
+                            container_name=container_name,
+                            sync=True,
+                            timeout=10,
+                            exec_mode=EXEC_MODE_HTTP,
+                        )
+                        output.close()
+                        return job_result(
+                            output, request_id, transport, terminated=True
+                        )
+                    seconds = max(1.0, min(seconds, remaining))
+
+                offset = output.offset
+                try:
+                    request_id, state, exit_code, _ = self._follow_segment(
+                        sandbox_id,
+                        container_name,
+                        follow_script(session_id, output.offset, seconds),
+                        output,
+                        seconds,
+                    )
+                except Exception as exc:
+                    _log_operation_error("FollowJob", str(exc))
+                    state, exit_code, last_error = "", None, str(exc)
+
+                if state == FOLLOW_DONE:
+                    output.close()
+                    return job_result(
+                        output, request_id, transport, exit_code=exit_code
+                    )
+                if state == FOLLOW_GONE:
+                    output.close()
+                    return job_result(
+                        output,
+                        request_id,
+                        transport,
+                        error_message="Job session ended without an exit status",
+                    )
+                if state == FOLLOW_RUNNING or output.offset > offset:
+                    failures = 0
+                    continue
+                # Dropped before making progress: back off, then reattach.
+                failures += 1
+                if failures > _FOLLOW_MAX_FAILURES:
+                    output.close()
+                    return job_result(
+                        output,
+                        request_id,
+                        transport,
+                        error_message=(
+                            f"Lost the output stream of job {session_id} at byte "
+                            f"{output.offset}: {last_error or 'connection dropped'}"
+                        ),
+                    )
+                time.sleep(min(0.5 * 2 ** (failures - 1), 5.0))
+        finally:
+            output.capture.close()
+
+    def _follow_segment(
+        self,
+        sandbox_id: str,
+        container_name: str,
+        script: str,
+        output: JobOutput,
+        seconds: float,
+    ) -> Tuple[str, str, Optional[int], bool]:
+        """
+        One follow exec: run a log follow ``script`` that streams from
+        ``output.offset`` for up to ``seconds``. Returns (request_id, state,
+        exit code, whether its cleanup ran); the state is empty if the
+        stream dropped before reporting.
+        """
+        import websocket
+
+        argv = ["bash", "-c", script]
+        response = self._exec_container_command(
+            sandbox_id=sandbox_id,
+            container_name=container_name,
+            command_json=json.dumps(argv, ensure_ascii=False),
+            sync=False,
+            timeout=None,
+            stdin=True,
+        )
+        request_id = extract_request_id(response)
+        websocket_url = response_field(response, "web_socket_uri")
+        if not websocket_url:
+            raise RuntimeError("WebSocketUri not returned for job follow exec.")
+
+        ws = websocket.create_connection(
+            websocket_url,
+            timeout=_WS_CONNECT_TIMEOUT,
+            **self._get_ws_proxy_settings(),
+        )
+
+        def acknowledge() -> None:
+            ws.send(encode_ws_stdin(FOLLOW_ACK), opcode=websocket.ABNF.OPCODE_BINARY)
+
+        status = FollowStatus(acknowledge)
+        try:
+            self._drain_ws(
+                ws, output, time.monotonic() + seconds + _FOLLOW_GRACE, stderr=status
+            )
+        finally:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        state, exit_code = status.result()
+        return request_id, state, exit_code, status.cleaned
+
+    def bash_batch(
+        self,
+        sandbox_id: str,
+        commands: list[str],
+        mode: str = BATCH_MODE_SEQUENTIAL,
+        stop_on_error: bool = False,
+        exec_dir: Optional[str] = None,
+        container_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+        exec_mode: str = EXEC_MODE_AUTO,
+    ) -> BatchResult:
+        """
+        Run several bash commands in a single exec.
+
+        Args:
+            sandbox_id: The sandbox container ID
+            commands: Bash commands; each runs in its own shell
+            mode: ``"sequential"`` runs them in order, ``"parallel"`` runs
+                them concurrently
+            stop_on_error: In sequential mode, skip the remaining commands
+                after the first non-zero exit
+            exec_dir: Working directory for every command
+            container_name: Container name (auto-resolved if not provided)
+            timeout: Timeout in seconds for the whole batch
+            exec_mode: See ``exec_command``
+
+        Returns:
+            BatchResult with one CommandResult (output, stderr, exit_code)
+            per command, in the order given. As with ``bash``, an item's
+            ``success`` means the command ran; check ``exit_code`` for its
+            status. The batch's ``success`` is set when every command ran.
+        """
+        if not sandbox_id:
+            return BatchResult(success=False, error_message="sandbox_id is required")
+        if not commands:
+            return BatchResult(success=False, error_message="commands is required")
+        mode_error = validate_batch_mode(mode)
+        if mode_error:
+            return BatchResult(success=False, error_message=mode_error)
+
+        marker, script = build_batch_script(commands, mode, stop_on_error, exec_dir)
+        result = self.bash(
+            sandbox_id,
+            script,
+            container_name=container_name,
+            timeout=timeout,
+            exec_mode=exec_mode,
+        )
+        if not result.success:
+            return BatchResult(
+                request_id=result.request_id,
+                success=False,
+                error_message=result.error_message,
+                transport=result.transport,
+            )
+        results = parse_batch_output(
+            result.output, marker, len(commands), result.transport, result.truncated
+        )
+        return BatchResult(
+            request_id=result.request_id,
+            success=all(item.success for item in results),
+            results=results,
+            transport=result.transport,
+        )
+
+    def broadcast_bash(
+        self,
+        sandbox_ids: Iterable[str],
+        command: str,
+        exec_dir: Optional[str] = None,
+        container_name: Optional[str] = None,
+        concurrency: int = DEFAULT_BROADCAST_CONCURRENCY,
+        timeout: Optional[float] = None,
+        rate_limit: Optional[float] = None,
+        exec_mode: str = EXEC_MODE_AUTO,
+    ) -> BroadcastRun:
+        """
+        Run one bash command on many sandboxes.
+
+        Args:
+            sandbox_ids: Target sandbox IDs (duplicates are dropped)
+            command: Bash command to run on every target
+            exec_dir: Working directory for the command
+            container_name: Container name (resolved per sandbox if not provided)
+            concurrency: Maximum number of targets in flight
+            timeout: Per-target timeout in seconds, counted from its start
+            rate_limit: Maximum ExecContainerCommand starts per second, to
+                stay under the account's API QPS quota
+            exec_mode: See ``exec_command``
+
+        Returns:
+            BroadcastRun: iterable of ``BroadcastItem`` in completion order,
+            with ``summary()`` for aggregate statistics. Targets run on
+            ``concurrency`` worker threads; one still running after
+            ``timeout`` is reported as timed out and its worker is
+            replaced, so later targets are not held up.
+        """
+
+        def run_one(sandbox_id: str) -> CommandResult:
+            return self.bash(
+                sandbox_id,
+                command,
+                exec_dir=exec_dir,
+                container_name=container_name,
+                timeout=timeout,
+                exec_mode=exec_mode,
+            )
+
+        return BroadcastRun(
+            run_one,
+            sandbox_ids,
+            concurrency=concurrency,
+            timeout=timeout,
+            rate_limit=rate_limit,
+        )
 
+    def _run_command_plan(
+        self,
+        sandbox_id: str,
+        plan: CommandPlan,
+        container_name: Optional[str],
+        sync: bool,
+        timeout: Optional[float],
+        exec_mode: str,
+        compress_output: bool = False,
+    ) -> CommandResult:
+        mode_error = validate_exec_mode(exec_mode)
+        if mode_error:
+            return CommandResult(success=False, error_message=mode_error)
         if not container_name:
             container_name = self._resolve_container_name(sandbox_id)
         if not container_name:
@@ -546,26 +1196,177 @@ class EciSandbox:
                 error_message="container_name is required",
             )
 
+        if plan.inline:
+            return self._exec_argv(
+                sandbox_id,
+                container_name,
+                plan.argv,
+                sync,
+                timeout,
+                exec_mode,
+                plan.transport,
+                compress_output=compress_output,
+            )
+
+        transport = plan.transport
+        if transport == TRANSPORT_STDIN and self._scripts.has(
+            sandbox_id, script_digest(plan.script)
+        ):
+            # Already in the sandbox's script cache: running it sends nothing.
+            transport = TRANSPORT_UPLOAD
+        if transport == TRANSPORT_STDIN:
+            result = self._exec_via_ws(
+                sandbox_id=sandbox_id,
+                command=plan.script,
+                container_name=container_name,
+                timeout=self._normalize_sync_timeout(timeout),
+                compress_output=compress_output,
+            )
+        else:
+            result = self._exec_uploaded_script(
+                sandbox_id,
+                container_name,
+                plan.script,
+                sync,
+                timeout,
+                exec_mode,
+                compress_output=compress_output,
+            )
+        return result
+
+    def _exec_uploaded_script(
+        self,
+        sandbox_id: str,
+        container_name: str,
+        script: str,
+        sync: bool,
+        timeout: Optional[float],
+        exec_mode: str,
+        compress_output: bool = False,
+    ) -> CommandResult:
+        """Run ``script`` from the sandbox's script cache, uploading it if needed."""
+        retried = False
+        while True:
+            script_path, upload_error = self._ensure_script(
+                sandbox_id, container_name, script
+            )
+            if upload_error is not None:
+                return CommandResult(
+                    request_id=upload_error.request_id,
+                    success=False,
+                    error_message=f"Failed to upload script: {upload_error.error_message}",
+                    transport=TRANSPORT_UPLOAD,
+                )
+            command = guard_command(
+                script_path, f"bash {shlex.quote(script_path)}", missing_exit_code=127
+            )
+            result = self._exec_argv(
+                sandbox_id,
+                container_name,
+                ["bash", "-lc", command],
+                sync,
+                timeout,
+                exec_mode,
+                TRANSPORT_UPLOAD,
+                compress_output=compress_output,
+            )
+            if sync and not retried and SCRIPT_MISSING_MARKER in (result.output or ""):
+                # The cached copy is gone (e.g. container restart); upload again.
+                self._scripts.discard(sandbox_id, script_digest(script))
+                retried = True
+                continue
+            return result
+
+    def _ensure_script(
+        self, sandbox_id: str, container_name: str, script: str
+    ) -> Tuple[str, Optional[CommandResult]]:
+        """
+        Make sure the sandbox's script cache holds ``script``.
+
+        Returns the cached path and, if the upload failed, its result. A
+        script is uploaded at most once per sandbox: the local index is
+        checked first, then a short probe exec, and only then is the content
+        sent over WebSocket.
+        """
+        digest = script_digest(script)
+        path = script_path(digest)
+        if self._scripts.has(sandbox_id, digest):
+            return path, None
+
+        probe = self.bash(
+            sandbox_id=sandbox_id,
+            command=probe_command(path),
+            container_name=container_name,
+            timeout=10,
+            exec_mode=EXEC_MODE_HTTP,
+        )
+        if not probe_found(probe.output):
+            upload = self._exec_via_ws(
+                sandbox_id=sandbox_id,
+                command=upload_command(script, path),
+                container_name=container_name,
+                timeout=60.0,
+            )
+            if not upload.success:
+                return path, upload
+        self._scripts.add(sandbox_id, digest)
+        return path, None
+
+    def _exec_argv(
+        self,
+        sandbox_id: str,
+        container_name: str,
+        argv: list[str],
+        sync: bool,
+        timeout: Optional[float],
+        exec_mode: str,
+        transport: str,
+        compress_output: bool = False,
+    ) -> CommandResult:
         _log_api_call(
             "ExecContainerCommand",
-            f"ContainerGroupId={sandbox_id}, Container={container_name}",
+            "ContainerGroupId=%s, Container=%s",
+            sandbox_id,
+            container_name,
         )
 
+        mode = ""
+        command_json = json.dumps(argv, ensure_ascii=False)
+        started = time.monotonic()
         try:
-            command_json = json.dumps(command, ensure_ascii=False)
+            launch = argv
             if sync:
+                mode = self._exec_strategy.choose(command_json, timeout, exec_mode)
+            if mode == EXEC_MODE_HTTP:
+                # Inline responses carry no exit status and cannot be
+                # stopped from outside; the wrapper provides both.
+                launch = wrap_inline_argv(argv, timeout)
+                if not command_fits(launch):
+                    mode = EXEC_MODE_WEBSOCKET
+            if mode == EXEC_MODE_WEBSOCKET:
+                # Run in its own process group so a timeout can stop it.
+                token = new_job_token()
+                codecs = client_codecs() if compress_output else ()
+                launch = wrap_argv(argv, token, codecs, self._reconnect_retries > 0)
+                if not command_fits(launch):
+                    # Too long once wrapped: send it over stdin instead.
+                    return self._exec_via_ws(
+                        sandbox_id=sandbox_id,
+                        command=shlex.join(argv),
+                        container_name=container_name,
+                        timeout=self._normalize_sync_timeout(timeout),
+                        compress_output=compress_output,
+                    )
                 response = self._exec_container_command(
                     sandbox_id=sandbox_id,
                     container_name=container_name,
-                    command_json=command_json,
+                    command_json=json.dumps(launch, ensure_ascii=False),
                     sync=False,
                     timeout=None,
                 )
                 request_id = extract_request_id(response)
-                body = response.to_map().get("body", {})
-                http_url = body.get("HttpUrl", "")
-                websocket_url = body.get("WebSocketUri", "")
-                output = ""
+                http_url = response_field(response, "http_url")
+                websocket_url = response_field(response, "web_socket_uri")
                 if not websocket_url:
                     return CommandResult(
                         request_id=request_id,
@@ -573,100 +1374,144 @@ class EciSandbox:
                         error_message="WebSocketUri not returned for sync exec.",
                         http_url=http_url,
                         websocket_url=websocket_url,
+                        transport=transport,
                     )
-                output = self._read_ws_output(
-                    websocket_url, self._normalize_sync_timeout(timeout)
+                stream = self._read_ws_output(
+                    websocket_url,
+                    self._normalize_sync_timeout(timeout),
+                    sandbox_id=sandbox_id,
+                    container_name=container_name,
+                    token=token,
+                    compressed=bool(codecs),
                 )
-                _log_api_response(
-                    "ExecContainerCommand",
-                    request_id,
-                    True,
-                    {"sandbox_id": sandbox_id, "container": container_name},
+                capture = stream.capture
+                terminated = False
+                if stream.timed_out and token:
+                    terminated = self._terminate_job(sandbox_id, container_name, token)
+                self._exec_strategy.record(
+                    command_json, time.monotonic() - started, capture.total_bytes
                 )
+                if _api_event_enabled():
+                    _log_api_response(
+                        "ExecContainerCommand",
+                        request_id,
+                        True,
+                        sandbox_id=sandbox_id,
+                        container=container_name,
+                    )
                 return CommandResult(
                     request_id=request_id,
-                    success=True,
-                    output=output,
+                    success=not stream.error_message,
+                    output=capture.text(),
+                    error_message=stream.error_message,
                     http_url=http_url,
                     websocket_url=websocket_url,
+                    transport=transport,
+                    truncated=capture.truncated,
+                    total_bytes=capture.total_bytes,
+                    output_file=capture.spill_path,
+                    exit_code=stream.exit_code,
+                    terminated=terminated,
+                    reconnects=stream.reconnects,
                 )
 
             response = self._exec_container_command(
                 sandbox_id=sandbox_id,
                 container_name=container_name,
-                command_json=command_json,
+                command_json=json.dumps(launch, ensure_ascii=False),
                 sync=sync,
-                timeout=timeout,
+                timeout=self._normalize_sync_response_timeout(timeout)
+                if sync
+                else timeout,
             )
             request_id = extract_request_id(response)
-            body = response.to_map().get("body", {})
-            output = body.get("SyncResponse", "") if sync else ""
-            http_url = body.get("HttpUrl", "")
-            websocket_url = body.get("WebSocketUri", "")
-            _log_api_response(
-                "ExecContainerCommand",
-                request_id,
-                True,
-                {"sandbox_id": sandbox_id, "container": container_name},
-            )
-            return CommandResult(
-                request_id=request_id,
-                success=True,
+            output = response_field(response, "sync_response") if sync else ""
+            http_url = response_field(response, "http_url")
+            websocket_url = response_field(response, "web_socket_uri")
+            exit_code = None
+            terminated = False
+            if sync:
+                output, exit_code, terminated = split_inline_output(output)
+                self._exec_strategy.record(
+                    command_json, time.monotonic() - started, len(output)
+                )
+            if _api_event_enabled():
+                _log_api_response(
+                    "ExecContainerCommand",
+                    request_id,
+                    True,
+                    sandbox_id=sandbox_id,
+                    container=container_name,
+                )
+            return CommandResult(
+                request_id=request_id,
+                success=True,
                 output=output,
                 http_url=http_url,
                 websocket_url=websocket_url,
+                transport=transport,
+                total_bytes=len(output.encode("utf-8")),
+                exit_code=exit_code,
+                terminated=terminated,
             )
         except Exception as exc:
+            if mode == EXEC_MODE_HTTP:
+                # Usually cut off inline: the time it ran before failing is a
+                # lower bound on its duration, and a long one streams next time.
+                self._exec_strategy.record(command_json, time.monotonic() - started, 0)
             _log_operation_error("ExecContainerCommand", str(exc), exc_info=True)
             return CommandResult(
                 request_id="",
                 success=False,
                 output="",
                 error_message=f"Failed to exec command: {exc}",
+                transport=transport,
             )
 
-    def bash(
-        self,
-        sandbox_id: str,
-        command: str,
-        exec_dir: Optional[str] = None,
-        container_name: Optional[str] = None,
-        sync: bool = True,
-        timeout: Optional[float] = None,
-    ) -> CommandResult:
-        if not command:
-            return CommandResult(success=False, error_message="command is required")
-        if exec_dir:
-            command = f"cd {shlex.quote(exec_dir)} && {command}"
-        # Encode command as base64 to preserve heredoc, special characters, etc.
-        # The command is decoded and piped to bash in the container.
-        # For long commands, use gzip compression to stay within ECI's 2048 byte limit.
-        encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
-        wrapper = f"echo {encoded} | base64 -d | bash"
-        if len(wrapper) > 1900:
-            # Use gzip compression for long commands
-            compressed = gzip.compress(command.encode("utf-8"))
-            encoded = base64.b64encode(compressed).decode("ascii")
-            wrapper = f"echo {encoded} | base64 -d | gunzip | bash"
-        return self.exec_command(
-            sandbox_id=sandbox_id,
-            command=["bash", "-lc", wrapper],
-            container_name=container_name,
-            sync=sync,
-            timeout=timeout,
-        )
+    def _terminate_job(self, sandbox_id: str, container_name: str, token: str) -> bool:
+        """
+        Stop the process group of a streamed exec that outlived its timeout
+        (SIGTERM, then SIGKILL). Returns whether a process was signalled.
+        """
+        _log_api_call("TerminateExec", "ContainerGroupId=%s, Job=%s", sandbox_id, token)
+        command = ["bash", "-c", kill_command(token)]
+        try:
+            response = self._exec_container_command(
+                sandbox_id=sandbox_id,
+                container_name=container_name,
+                command_json=json.dumps(command, ensure_ascii=False),
+                sync=True,
+                timeout=self._normalize_sync_response_timeout(None),
+            )
+        except Exception as exc:
+            _log_operation_error("TerminateExec", str(exc), exc_info=True)
+            return False
+        return was_terminated(response_field(response, "sync_response"))
+
+    def _remove_stream_dir(
+        self, sandbox_id: str, container_name: str, token: str
+    ) -> None:
+        """Remove the directory of a finished streamed exec (best effort)."""
+        command = ["bash", "-c", remove_stream_command(token)]
+        try:
+            self._exec_container_command(
+                sandbox_id=sandbox_id,
+                container_name=container_name,
+                command_json=json.dumps(command, ensure_ascii=False),
+                sync=True,
+                timeout=self._normalize_sync_response_timeout(None),
+            )
+        except Exception as exc:
+            _log_operation_error("RemoveExecDir", str(exc))
 
     def _resolve_container_name(self, sandbox_id: str) -> str:
+        entry = self._sandboxes.entry(sandbox_id)
+        if entry is not None and entry.container_name:
+            return entry.container_name
         info_result = self.get_sandbox_info(sandbox_id)
         if not info_result.success or not info_result.data:
             return ""
-        containers = info_result.data.containers or []
-        if not containers:
-            return ""
-        first = containers[0]
-        if isinstance(first, dict):
-            return first.get("Name", "") or first.get("name", "")
-        return ""
+        return info_result.data.container_name
 
     def _exec_container_command(
         self,
@@ -675,6 +1520,8 @@ class EciSandbox:
         command_json: str,
         sync: bool,
         timeout: Optional[float],
+        stdin: bool = False,
+        tty: bool = False,
     ):
         request = eci_models.ExecContainerCommandRequest(
             region_id=self.region_id,
@@ -682,8 +1529,8 @@ class EciSandbox:
             container_name=container_name,
             command=command_json,
             sync=sync,
-            tty=False,
-            stdin=False,
+            tty=tty,
+            stdin=stdin,
         )
         if timeout is None:
             return self.client.exec_container_command(request)
@@ -701,7 +1548,26 @@ class EciSandbox:
             return _DEFAULT_SYNC_TIMEOUT
         return min(timeout, _DEFAULT_SYNC_TIMEOUT)
 
+    def _normalize_sync_response_timeout(self, timeout: Optional[float]) -> float:
+        if timeout is None or timeout <= 0 or timeout > SYNC_RESPONSE_MAX_SECONDS:
+            timeout = SYNC_RESPONSE_MAX_SECONDS
+        return timeout + _SYNC_RESPONSE_GRACE
+
     def _get_ws_proxy_settings(self) -> Dict[str, Any]:
+        """Return WebSocket connection options for the calling thread."""
+        settings = dict(self._ws_proxy_settings)
+        ssl_context = getattr(self._ws_local, "ssl_context", None)
+        if ssl_context is None:
+            # Loading the CA bundle dominates TLS setup cost, so each thread
+            # builds its context once and reuses it for every exec stream.
+            import ssl
+
+            ssl_context = ssl.create_default_context()
+            self._ws_local.ssl_context = ssl_context
+        settings["sslopt"] = {"context": ssl_context}
+        return settings
+
+    def _parse_ws_proxy_settings(self) -> Dict[str, Any]:
         """
         Parse proxy URL and return WebSocket-compatible proxy settings.
 
@@ -730,7 +1596,19 @@ class EciSandbox:
         except Exception:
             return {}
 
-    def _read_ws_output(self, websocket_url: str, timeout: float) -> str:
+    def _read_ws_output(
+        self,
+        websocket_url: str,
+        timeout: float,
+        sandbox_id: str = "",
+        container_name: str = "",
+        token: str = "",
+        compressed: bool = False,
+    ) -> WsReadResult:
+        """
+        Read a streamed exec's output. If the stream drops before the exit
+        frame, resume it from the exec's log (see ``_resume_stream``).
+        """
         try:
             import websocket
         except Exception as exc:  # pragma: no cover - dependency guard
@@ -738,31 +1616,202 @@ class EciSandbox:
                 "websocket-client is required for sync exec output streaming."
             ) from exc
 
-        output_chunks: list[str] = []
+        capture = OutputCapture(self._capture_limits)
+        output = JobOutput(capture)
+        # A dropped stream resumes from the (uncompressed) log, so the
+        # offset counts decompressed bytes.
+        sink = DecompressingOutput(output) if compressed else output
         end_time = time.monotonic() + timeout
 
         # Get proxy settings for WebSocket connection
         proxy_settings = self._get_ws_proxy_settings()
-        ws = websocket.create_connection(websocket_url, timeout=1, **proxy_settings)
         try:
-            while time.monotonic() < end_time:
-                remaining = end_time - time.monotonic()
-                ws.settimeout(min(1.0, remaining))
+            ws = websocket.create_connection(
+                websocket_url,
+                timeout=min(_WS_CONNECT_TIMEOUT, timeout),
+                **proxy_settings,
+            )
+            try:
+                # Only stdout is in the exec's log, so only stdout counts
+                # towards the resume offset.
+                exit_code = self._drain_ws(ws, sink, end_time, stderr=capture)
+                if isinstance(sink, DecompressingOutput):
+                    sink.finish()
+            finally:
                 try:
-                    message = ws.recv()
-                except websocket.WebSocketTimeoutException:
-                    continue
-                except websocket.WebSocketConnectionClosedException:
-                    break
-                if message is None:
-                    break
-                output_chunks.append(decode_ws_message(message))
+                    ws.close()
+                except Exception:
+                    pass
+            return self._finish_stream(
+                sandbox_id, container_name, token, output, exit_code, end_time
+            )
         finally:
+            capture.close()
+
+    def _finish_stream(
+        self,
+        sandbox_id: str,
+        container_name: str,
+        token: str,
+        output: JobOutput,
+        exit_code: Optional[int],
+        end_time: float,
+    ) -> WsReadResult:
+        reconnects = 0
+        error_message = ""
+        if exit_code is None and time.monotonic() < end_time:
+            exit_code, reconnects, error_message = self._resume_stream(
+                sandbox_id, container_name, token, output, end_time
+            )
+        timed_out = (
+            exit_code is None and not error_message and time.monotonic() >= end_time
+        )
+        return WsReadResult(
+            output.capture, exit_code, timed_out, reconnects, error_message
+        )
+
+    def _resume_stream(
+        self,
+        sandbox_id: str,
+        container_name: str,
+        token: str,
+        output: JobOutput,
+        end_time: float,
+    ) -> Tuple[Optional[int], int, str]:
+        """
+        Reattach to a streamed exec whose connection dropped and read the
+        rest of its output from the log it keeps in the container.
+
+        Returns (exit code, reconnects, error message). The exit code is
+        None without an error when ``end_time`` passed first.
+        """
+        if not token or self._reconnect_retries <= 0:
+            return (
+                None,
+                0,
+                (
+                    f"Output stream closed at byte {output.offset} before the "
+                    "exit status arrived"
+                ),
+            )
+        if output.offset >= STREAM_LOG_LIMIT:
+            return (
+                None,
+                0,
+                (
+                    f"Output stream closed at byte {output.offset}, past the "
+                    f"{STREAM_LOG_LIMIT} bytes kept for resuming"
+                ),
+            )
+        reconnects = 0
+        failures = 0
+        last_error = "connection closed"
+        while True:
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                return None, reconnects, ""
+            seconds = max(1.0, min(remaining, _DEFAULT_SYNC_TIMEOUT - _FOLLOW_GRACE))
+            reconnects += 1
+            offset = output.offset
+            _log_api_call(
+                "ResumeExec",
+                "ContainerGroupId=%s, Job=%s, Offset=%s",
+                sandbox_id,
+                token,
+                offset,
+            )
             try:
-                ws.close()
-            except Exception:
-                pass
-        return "".join(output_chunks)
+                _, state, exit_code, cleaned = self._follow_segment(
+                    sandbox_id,
+                    container_name,
+                    resume_script(token, offset, seconds),
+                    output,
+                    seconds,
+                )
+            except Exception as exc:
+                _log_operation_error("ResumeExec", str(exc))
+                state, exit_code, cleaned = "", None, False
+                last_error = str(exc)
+
+            if state == FOLLOW_DONE:
+                if not cleaned:
+                    # The acknowledgement was lost; remove the directory
+                    # now that the exit status is here.
+                    self._remove_stream_dir(sandbox_id, container_name, token)
+                if output.offset >= STREAM_LOG_LIMIT:
+                    return (
+                        exit_code,
+                        reconnects,
+                        (
+                            f"Output stream dropped; only the first {STREAM_LOG_LIMIT} "
+                            "bytes are kept for resuming"
+                        ),
+                    )
+                return exit_code, reconnects, ""
+            if state == FOLLOW_GONE:
+                return (
+                    None,
+                    reconnects,
+                    (
+                        f"Output stream dropped at byte {offset}; the command "
+                        "ended before it could be resumed"
+                    ),
+                )
+            if state == FOLLOW_RUNNING or output.offset > offset:
+                failures = 0
+                continue
+            failures += 1
+            if failures >= self._reconnect_retries:
+                return (
+                    None,
+                    reconnects,
+                    (
+                        f"Output stream dropped at byte {output.offset} and could "
+                        f"not be resumed: {last_error}"
+                    ),
+                )
+            time.sleep(
+                min(
+                    0.5 * 2 ** (failures - 1),
+                    5.0,
+                    max(0.0, end_time - time.monotonic()),
+                )
+            )
+
+    def _drain_ws(
+        self,
+        ws: Any,
+        capture: Any,
+        end_time: float,
+        stderr: Optional[Any] = None,
+    ) -> Optional[int]:
+        """
+        Read output frames into ``capture`` until the exit frame arrives, the
+        socket closes or ``end_time`` passes. Returns the exit code, if any.
+        Stderr frames go to ``stderr`` instead when it is given.
+        """
+        import websocket
+
+        while True:
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                return None
+            ws.settimeout(remaining)
+            try:
+                message = ws.recv()
+            except (websocket.WebSocketException, OSError):
+                # Timeout, close or a network error: the caller decides
+                # whether the stream can be resumed.
+                return None
+            if message is None:
+                return None
+            channel, payload = parse_ws_frame(message)
+            if channel == WS_MSG_EXIT:
+                return parse_exit_status(payload)
+            if channel == WS_MSG_STDERR and stderr is not None:
+                stderr.write(payload)
+            elif channel in (WS_MSG_STDOUT, WS_MSG_STDERR):
+                capture.write(payload)
 
     def _wrap_command_for_log(self, command: list[str], log_path: str) -> list[str]:
         if len(command) >= 2 and command[0] in {"/bin/sh", "sh"} and command[1] == "-c":
@@ -793,8 +1842,7 @@ class EciSandbox:
                 sync=True,
                 timeout=None,
             )
-            body = response.to_map().get("body", {})
-            return body.get("SyncResponse", "") or ""
+            return response_field(response, "sync_response") or ""
         except Exception:
             return ""
 
@@ -806,6 +1854,7 @@ class EciSandbox:
         command: str,
         container_name: str,
         timeout: float,
+        compress_output: bool = False,
     ) -> CommandResult:
         """
         Execute a command via WebSocket stdin (no length limit).
@@ -821,6 +1870,7 @@ class EciSandbox:
             command: The full bash command to execute (any length)
             container_name: Container name
             timeout: Timeout in seconds
+            compress_output: Stream the output compressed
 
         Returns:
             CommandResult with output
@@ -841,24 +1891,47 @@ class EciSandbox:
             )
             response = self.client.exec_container_command(request)
             request_id = extract_request_id(response)
-            body = response.to_map().get("body", {})
-            websocket_url = body.get("WebSocketUri", "")
+            websocket_url = response_field(response, "web_socket_uri")
 
             if not websocket_url:
                 return CommandResult(
                     request_id=request_id,
                     success=False,
                     error_message="WebSocketUri not returned for interactive exec.",
+                    transport=TRANSPORT_STDIN,
                 )
 
-            # Execute command via WebSocket
-            output = self._send_command_via_ws(websocket_url, command, timeout)
+            # Execute command via WebSocket, in its own process group so a
+            # timeout can stop it
+            token = new_job_token()
+            codecs = client_codecs() if compress_output else ()
+            stream = self._send_command_via_ws(
+                websocket_url,
+                wrap_script(command, token, codecs, self._reconnect_retries > 0),
+                timeout,
+                sandbox_id=sandbox_id,
+                container_name=container_name,
+                token=token,
+                compressed=bool(codecs),
+            )
+            capture = stream.capture
+            terminated = False
+            if stream.timed_out:
+                terminated = self._terminate_job(sandbox_id, container_name, token)
 
             return CommandResult(
                 request_id=request_id,
-                success=True,
-                output=output,
+                success=not stream.error_message,
+                output=capture.text(),
+                error_message=stream.error_message,
                 websocket_url=websocket_url,
+                transport=TRANSPORT_STDIN,
+                truncated=capture.truncated,
+                total_bytes=capture.total_bytes,
+                output_file=capture.spill_path,
+                exit_code=stream.exit_code,
+                terminated=terminated,
+                reconnects=stream.reconnects,
             )
 
         except Exception as exc:
@@ -867,6 +1940,7 @@ class EciSandbox:
                 request_id="",
                 success=False,
                 error_message=f"Failed to exec via WebSocket: {exc}",
+                transport=TRANSPORT_STDIN,
             )
 
     def _send_command_via_ws(
@@ -874,7 +1948,11 @@ class EciSandbox:
         websocket_url: str,
         command: str,
         timeout: float,
-    ) -> str:
+        sandbox_id: str = "",
+        container_name: str = "",
+        token: str = "",
+        compressed: bool = False,
+    ) -> WsReadResult:
         """
         Send command through WebSocket and read output.
 
@@ -882,9 +1960,15 @@ class EciSandbox:
             websocket_url: The WebSocket URL from ExecContainerCommand
             command: The command to send
             timeout: Timeout in seconds
+            sandbox_id: Sandbox to resume a dropped stream in
+            container_name: Container to resume a dropped stream in
+            token: Job token of a ``wrap_script`` command; without it a
+                dropped stream is reported as an error
+            compressed: The command was wrapped with output codecs
 
         Returns:
-            Command output as string
+            WsReadResult with the captured (bounded) output, the exit code,
+            whether the deadline passed first and any reconnects
         """
         try:
             import websocket
@@ -893,40 +1977,43 @@ class EciSandbox:
                 "websocket-client is required for WebSocket exec."
             ) from exc
 
-        output_chunks: list[str] = []
+        capture = OutputCapture(self._capture_limits)
+        output = JobOutput(capture)
+        # A dropped stream resumes from the (uncompressed) log, so the
+        # offset counts decompressed bytes.
+        sink = DecompressingOutput(output) if compressed else output
         end_time = time.monotonic() + timeout
 
         # Get proxy settings for WebSocket connection
         proxy_settings = self._get_ws_proxy_settings()
-        ws = websocket.create_connection(websocket_url, timeout=5, **proxy_settings)
         try:
-            # Send the command followed by exit to ensure shell terminates
-            # Use heredoc style to handle multi-line commands properly
-            full_command = f"{command}\nexit $?\n"
-            ws.send(encode_ws_stdin(full_command), opcode=websocket.ABNF.OPCODE_BINARY)
-
-            # Read output until connection closes or timeout
-            while time.monotonic() < end_time:
-                remaining = end_time - time.monotonic()
-                ws.settimeout(min(1.0, remaining))
-                try:
-                    message = ws.recv()
-                except websocket.WebSocketTimeoutException:
-                    continue
-                except websocket.WebSocketConnectionClosedException:
-                    break
-                if message is None:
-                    break
-                decoded = decode_ws_message(message)
-                if decoded:
-                    output_chunks.append(decoded)
-        finally:
+            ws = websocket.create_connection(
+                websocket_url,
+                timeout=min(_WS_CONNECT_TIMEOUT, timeout),
+                **proxy_settings,
+            )
             try:
-                ws.close()
-            except Exception:
-                pass
+                # Send the command followed by exit to ensure shell terminates
+                # Use heredoc style to handle multi-line commands properly
+                full_command = f"{command}\nexit $?\n"
+                ws.send(
+                    encode_ws_stdin(full_command), opcode=websocket.ABNF.OPCODE_BINARY
+                )
 
-        return "".join(output_chunks)
+                # Read output until the exit frame, connection close or timeout
+                exit_code = self._drain_ws(ws, sink, end_time, stderr=capture)
+                if isinstance(sink, DecompressingOutput):
+                    sink.finish()
+            finally:
+                try:
+                    ws.close()
+                except Exception:
+                    pass
+            return self._finish_stream(
+                sandbox_id, container_name, token, output, exit_code, end_time
+            )
+        finally:
+            capture.close()
 
     def bash_ws(
         self,
@@ -935,6 +2022,7 @@ class EciSandbox:
         exec_dir: Optional[str] = None,
         container_name: Optional[str] = None,
         timeout: Optional[float] = None,
+        compress_output: bool = False,
     ) -> CommandResult:
         """
         Execute a bash command via WebSocket (supports unlimited command length).
@@ -948,6 +2036,8 @@ class EciSandbox:
             exec_dir: Working directory for command execution
             container_name: Container name (auto-resolved if not provided)
             timeout: Timeout in seconds (default 600)
+            compress_output: Compress the output in the container (see
+                ``exec_command``)
 
         Returns:
             CommandResult with output
@@ -960,7 +2050,9 @@ class EciSandbox:
         if not container_name:
             container_name = self._resolve_container_name(sandbox_id)
         if not container_name:
-            return CommandResult(success=False, error_message="container_name is required")
+            return CommandResult(
+                success=False, error_message="container_name is required"
+            )
 
         if timeout is None:
             timeout = _DEFAULT_SYNC_TIMEOUT
@@ -972,7 +2064,9 @@ class EciSandbox:
 
         _log_api_call(
             "BashViaWS",
-            f"ContainerGroupId={sandbox_id}, CmdLen={len(full_command)}",
+            "ContainerGroupId=%s, CmdLen=%d",
+            sandbox_id,
+            len(full_command),
         )
 
         return self._exec_via_ws(
@@ -980,6 +2074,7 @@ class EciSandbox:
             command=full_command,
             container_name=container_name,
             timeout=timeout,
+            compress_output=compress_output,
         )
 
     def write_file_ws(
@@ -1014,7 +2109,9 @@ class EciSandbox:
         if not container_name:
             container_name = self._resolve_container_name(sandbox_id)
         if not container_name:
-            return CommandResult(success=False, error_message="container_name is required")
+            return CommandResult(
+                success=False, error_message="container_name is required"
+            )
 
         if timeout is None:
             timeout = 60.0
@@ -1027,7 +2124,9 @@ class EciSandbox:
             counter += 1
             eof_marker = f"EOF_WRITE_FILE_{counter}"
 
-        write_command = f"cat > {shlex.quote(file_path)} << '{eof_marker}'\n{content}\n{eof_marker}"
+        write_command = (
+            f"cat > {shlex.quote(file_path)} << '{eof_marker}'\n{content}\n{eof_marker}"
+        )
 
         return self._exec_via_ws(
             sandbox_id=sandbox_id,
@@ -1036,11 +2135,309 @@ class EciSandbox:
             timeout=timeout,
         )
 
-    # ==================== Tmux Methods ====================
+    # ==================== Agent Methods ====================
+
+    def start_agent(
+        self,
+        sandbox_id: str,
+        container_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> OperationResult:
+        """
+        Start the helper agent in a sandbox, or return the one already
+        connected.
+
+        The agent is a small Python 3 program, uploaded once through the
+        script cache and kept running on the stdin of one exec. It serves
+        exec, spawn, file, stat, list, kill and tail calls over that single
+        connection, without an API call or shell startup per operation.
+        Sandbox handles route ``exec_command`` and ``bash`` through it while
+        it is connected. The container needs ``python3``.
+
+        Args:
+            sandbox_id: The sandbox container ID
+            container_name: Container name (auto-resolved if not provided)
+            timeout: Seconds to wait for the agent to come up (default 20)
+
+        Returns:
+            OperationResult whose ``data`` is the ``SandboxAgent``
+        """
+        if not sandbox_id:
+            return OperationResult(
+                success=False, error_message="sandbox_id is required"
+            )
+        agent = self.get_agent(sandbox_id)
+        if agent is not None:
+            return OperationResult(
+                request_id=agent.request_id, success=True, data=agent
+            )
+        if not container_name:
+            container_name = self._resolve_container_name(sandbox_id)
+        if not container_name:
+            return OperationResult(
+                success=False, error_message="container_name is required"
+            )
+
+        _log_api_call(
+            "StartAgent", "SandboxId=%s, Container=%s", sandbox_id, container_name
+        )
+        agent, request_id, error = self._launch_program(
+            "StartAgent",
+            sandbox_id,
+            container_name,
+            AGENT_SOURCE,
+            SandboxAgent,
+            timeout or AGENT_READY_TIMEOUT,
+        )
+        if agent is None:
+            return OperationResult(
+                request_id=request_id, success=False, error_message=error
+            )
+
+        with self._agents_lock:
+            previous = self._agents.get(sandbox_id)
+            self._agents[sandbox_id] = agent
+        if previous is not None:
+            previous.close()
+        if _api_event_enabled():
+            _log_api_response("StartAgent", request_id, True, sandbox_id=sandbox_id)
+        return OperationResult(request_id=request_id, success=True, data=agent)
+
+    def get_agent(self, sandbox_id: str) -> Optional[SandboxAgent]:
+        """The sandbox's connected agent, if ``start_agent`` started one."""
+        with self._agents_lock:
+            agent = self._agents.get(sandbox_id)
+            if agent is not None and not agent.connected:
+                del self._agents[sandbox_id]
+                agent = None
+        return agent
+
+    def stop_agent(self, sandbox_id: str) -> None:
+        """Disconnect the sandbox's agent; it exits when its stdin closes."""
+        with self._agents_lock:
+            agent = self._agents.pop(sandbox_id, None)
+        if agent is not None:
+            agent.close()
+
+    def python_session(
+        self,
+        sandbox_id: str,
+        container_name: Optional[str] = None,
+        exec_dir: Optional[str] = None,
+        python: str = "python3",
+        start_timeout: Optional[float] = None,
+    ) -> PythonSession:
+        """
+        A persistent Python interpreter in a sandbox.
+
+        ``run`` executes code in one long-lived process whose globals
+        persist between calls, so imports and data stay loaded and a run
+        costs one round trip on an open exec stream rather than an API call
+        and an interpreter startup. Nothing is started until the first
+        ``run`` (or ``start``); close the session when done.
+
+        Args:
+            sandbox_id: The sandbox container ID
+            container_name: Container name (auto-resolved if not provided)
+            exec_dir: Working directory of the interpreter
+            python: Interpreter to run (default ``python3``)
+            start_timeout: Seconds to wait for it to come up (default 20)
+
+        Returns:
+            PythonSession
+        """
+
+        def launch() -> Tuple[Optional[PythonKernel], str, str]:
+            if not sandbox_id:
+                return None, "", "sandbox_id is required"
+            name = container_name or self._resolve_container_name(sandbox_id)
+            if not name:
+                return None, "", "container_name is required"
+            _log_api_call(
+                "StartPythonSession", "SandboxId=%s, Container=%s", sandbox_id, name
+            )
+            kernel, request_id, error = self._launch_program(
+                "StartPythonSession",
+                sandbox_id,
+                name,
+                KERNEL_SOURCE,
+                PythonKernel,
+                start_timeout or AGENT_READY_TIMEOUT,
+                python=python,
+                args=[exec_dir or ""],
+            )
+            if _api_event_enabled():
+                _log_api_response(
+                    "StartPythonSession",
+                    request_id,
+                    kernel is not None,
+                    sandbox_id=sandbox_id,
+                )
+            return kernel, request_id, error
+
+        return PythonSession(launch, self._capture_limits)
+
+    def _launch_program(
+        self,
+        operation: str,
+        sandbox_id: str,
+        container_name: str,
+        source: str,
+        factory: Type[_Connection],
+        timeout: float,
+        python: str = "python3",
+        args: Sequence[str] = (),
+    ) -> Tuple[Optional[_Connection], str, str]:
+        """
+        Upload a framed Python program (the agent, or a Python session's
+        kernel) through the script cache, run it on the stdin of an exec and
+        wait for its ready line. ``factory`` builds the connection from the
+        WebSocket. Returns ``(connection, request_id, error_message)``; the
+        connection is None on failure.
+        """
+        import websocket
+
+        request_id = ""
+        try:
+            for attempt in range(2):
+                path, upload_error = self._ensure_script(
+                    sandbox_id, container_name, source
+                )
+                if upload_error is not None:
+                    return (
+                        None,
+                        upload_error.request_id,
+                        f"{factory.name} upload failed: {upload_error.error_message}",
+                    )
+                command = python_script_command(path, python, args)
+                response = self._exec_container_command(
+                    sandbox_id=sandbox_id,
+                    container_name=container_name,
+                    command_json=json.dumps(command, ensure_ascii=False),
+                    sync=False,
+                    timeout=None,
+                    stdin=True,
+                )
+                request_id = extract_request_id(response)
+                websocket_url = response_field(response, "web_socket_uri")
+                if not websocket_url:
+                    raise RuntimeError("WebSocketUri not returned for program exec.")
+                ws = websocket.create_connection(
+                    websocket_url,
+                    timeout=_WS_CONNECT_TIMEOUT,
+                    **self._get_ws_proxy_settings(),
+                )
+                connection = factory(
+                    ws, sandbox_id, container_name, request_id, self._capture_limits
+                )
+                error = connection.wait_ready(timeout)
+                if not error:
+                    return connection, request_id, ""
+                connection.close()
+                if (
+                    attempt == 0
+                    and SCRIPT_MISSING_MARKER in connection.startup_output()
+                ):
+                    # The cached copy is gone (e.g. container restart); upload again.
+                    self._scripts.discard(sandbox_id, script_digest(source))
+                    continue
+                return None, request_id, error
+        except Exception as exc:
+            _log_operation_error(operation, str(exc), exc_info=True)
+            return None, request_id, f"{factory.name} failed to start: {exc}"
+        return None, request_id, f"{factory.name} failed to start"
+
+    # ==================== PTY Methods ====================
+
+    def open_pty(
+        self,
+        sandbox_id: str,
+        cols: int = PTY_DEFAULT_COLS,
+        rows: int = PTY_DEFAULT_ROWS,
+        command: Optional[List[str]] = None,
+        container_name: Optional[str] = None,
+        exec_dir: Optional[str] = None,
+        term: str = PTY_DEFAULT_TERM,
+    ) -> OperationResult:
+        """
+        Open an interactive terminal in a sandbox.
+
+        Runs ``command`` (an interactive login shell by default) on an exec
+        with a TTY and keeps its WebSocket open, so keystrokes and output
+        travel as frames on that connection instead of costing an API call
+        per command. Writes are sent immediately with Nagle's algorithm
+        disabled, and idle connections are kept alive with pings.
+
+        Args:
+            sandbox_id: The sandbox container ID
+            cols: Initial terminal width in columns
+            rows: Initial terminal height in rows
+            command: Command to run instead of the login shell
+            container_name: Container name (auto-resolved if not provided)
+            exec_dir: Working directory
+            term: Value of ``TERM`` in the terminal
+
+        Returns:
+            OperationResult whose ``data`` is the ``PtySession``
+        """
+        if not sandbox_id:
+            return OperationResult(
+                success=False, error_message="sandbox_id is required"
+            )
+        if not container_name:
+            container_name = self._resolve_container_name(sandbox_id)
+        if not container_name:
+            return OperationResult(
+                success=False, error_message="container_name is required"
+            )
+
+        import websocket
+
+        _log_api_call(
+            "OpenPty",
+            "SandboxId=%s, Container=%s, Size=%sx%s",
+            sandbox_id,
+            container_name,
+            cols,
+            rows,
+        )
+        request_id = ""
+        try:
+            response = self._exec_container_command(
+                sandbox_id=sandbox_id,
+                container_name=container_name,
+                command_json=json.dumps(
+                    pty_command(command, exec_dir, term), ensure_ascii=False
+                ),
+                sync=False,
+                timeout=None,
+                stdin=True,
+                tty=True,
+            )
+            request_id = extract_request_id(response)
+            websocket_url = response_field(response, "web_socket_uri")
+            if not websocket_url:
+                raise RuntimeError("WebSocketUri not returned for PTY exec.")
+            ws = websocket.create_connection(
+                websocket_url,
+                timeout=_WS_CONNECT_TIMEOUT,
+                sockopt=((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),),
+                **self._get_ws_proxy_settings(),
+            )
+            pty = PtySession(ws, sandbox_id, container_name, request_id)
+            pty.resize(cols, rows)
+        except Exception as exc:
+            _log_operation_error("OpenPty", str(exc), exc_info=True)
+            return OperationResult(
+                request_id=request_id,
+                success=False,
+                error_message=f"Failed to open PTY: {exc}",
+            )
+        if _api_event_enabled():
+            _log_api_response("OpenPty", request_id, True, sandbox_id=sandbox_id)
+        return OperationResult(request_id=request_id, success=True, data=pty)
 
-    # Threshold for using file-based execution in tmux_start
-    # If base64-encoded command exceeds this, use write_file_ws instead
-    _TMUX_CMD_LENGTH_THRESHOLD = 1200
+    # ==================== Tmux Methods ====================
 
     def tmux_start(
         self,
@@ -1054,9 +2451,11 @@ class EciSandbox:
         """
         Start a command in a tmux session (non-blocking).
 
-        For long commands that would exceed ECI's 2048 byte API limit,
-        this method automatically uses WebSocket to write the command
-        to a temporary script file, then executes that file in tmux.
+        The session is created, set to ``remain-on-exit`` and confirmed by
+        one in-container script, so starting a job is a single exec. For
+        commands that would exceed ECI's 2048 byte API limit, the command
+        is streamed over WebSocket stdin with the same script and kept in
+        the sandbox's script cache.
 
         Args:
             sandbox_id: The sandbox container ID
@@ -1070,61 +2469,54 @@ class EciSandbox:
             TmuxStartResult with session_id on success
         """
         if not sandbox_id:
-            return TmuxStartResult(success=False, error_message="sandbox_id is required")
+            return TmuxStartResult(
+                success=False, error_message="sandbox_id is required"
+            )
         if not command:
             return TmuxStartResult(success=False, error_message="command is required")
 
         if not container_name:
             container_name = self._resolve_container_name(sandbox_id)
         if not container_name:
-            return TmuxStartResult(success=False, error_message="container_name is required")
+            return TmuxStartResult(
+                success=False, error_message="container_name is required"
+            )
 
         # Generate unique session ID if not provided
         if not session_id:
             session_id = f"{TMUX_SESSION_PREFIX}{uuid.uuid4().hex[:12]}"
 
-        # Build marker for completion detection
-        marker = f"{TMUX_MARKER_EXIT_CODE}{session_id}__"
-
-        # Build the command with exec_dir and completion marker
+        # Build the command with exec_dir
         inner_cmd = command
         if exec_dir:
             inner_cmd = f"cd {shlex.quote(exec_dir)} && {command}"
 
-        # Wrap command to capture exit code and output completion marker
-        # Use subshell () to capture exit code even if command uses 'exit'
-        wrapped_cmd = f'''({inner_cmd})
-__exit_code__=$?
-echo ""
-echo "{marker}$__exit_code__"'''
+        # Wrap command so it logs its output and writes its start time, end
+        # time and exit code to the job's state files
+        wrapped_cmd = job_script(session_id, inner_cmd)
 
-        # Check if command is too long for direct base64 encoding
+        # The job's pane stays open after it completes (for output capture)
         encoded_cmd = base64.b64encode(wrapped_cmd.encode("utf-8")).decode("ascii")
+        tmux_cmd = start_script(session_id, f"echo {encoded_cmd} | base64 -d | bash -l")
 
-        if len(encoded_cmd) > self._TMUX_CMD_LENGTH_THRESHOLD:
-            # Use file-based execution for long commands
+        plan = self._planner.plan_script(tmux_cmd, streamable=False)
+        if not plan.inline:
+            # Too long for the exec API even compressed: go through the
+            # script cache
             return self._tmux_start_via_file(
                 sandbox_id=sandbox_id,
-                wrapped_cmd=wrapped_cmd,
+                command=inner_cmd,
                 session_id=session_id,
                 container_name=container_name,
             )
 
-        # Short command: use direct base64 encoding
-        # Create tmux session with the command
-        # Set remain-on-exit so the pane stays open after command completes (for output capture)
-        tmux_cmd = (
-            f'tmux new-session -d -s {shlex.quote(session_id)} "echo {encoded_cmd} | base64 -d | bash -l"; '
-            f'tmux set-option -t {shlex.quote(session_id)} remain-on-exit on 2>/dev/null || true'
-        )
-
-        # Execute via existing bash() method
         result = self.bash(
             sandbox_id=sandbox_id,
             command=tmux_cmd,
             container_name=container_name,
             sync=True,
             timeout=30,
+            exec_mode=EXEC_MODE_HTTP,
         )
 
         if not result.success:
@@ -1132,127 +2524,83 @@ echo "{marker}$__exit_code__"'''
                 request_id=result.request_id,
                 success=False,
                 error_message=f"Failed to start tmux session: {result.error_message or result.output}",
+                transport=result.transport,
             )
-
-        # Verify session was created
-        return self._verify_tmux_session(sandbox_id, session_id, container_name, result.request_id)
+        return start_result(
+            result.output, session_id, result.request_id, result.transport
+        )
 
     def _tmux_start_via_file(
         self,
         sandbox_id: str,
-        wrapped_cmd: str,
+        command: str,
         session_id: str,
         container_name: str,
     ) -> TmuxStartResult:
         """
-        Start a long command in tmux by writing it to a temporary script file first.
+        Start a long command in tmux from the sandbox's script cache.
 
-        This method uses WebSocket to write the command to a file (bypassing the
-        2048 byte API limit), then starts tmux to execute that file.
+        The command is kept under its content hash. When the sandbox is
+        known to hold it, only a short launch exec is sent; otherwise the
+        command and the launch script are streamed together over one
+        WebSocket stdin exec.
 
         Args:
             sandbox_id: The sandbox container ID
-            wrapped_cmd: The wrapped command (with exit code capture)
+            command: The command to run (without the job wrapper)
             session_id: The tmux session ID
             container_name: Container name
 
         Returns:
             TmuxStartResult with session_id on success
         """
-        # Generate temporary script path
-        script_path = f"/tmp/tmux_cmd_{session_id}.sh"
-
-        # Write command to file via WebSocket (no length limit)
-        write_result = self.write_file_ws(
-            sandbox_id=sandbox_id,
-            file_path=script_path,
-            content=wrapped_cmd,
-            container_name=container_name,
-            timeout=60.0,
-        )
+        digest = script_digest(command)
+        path = script_path(digest)
+        job = job_script(session_id, f"bash -l {shlex.quote(path)}")
+        launch = start_script(session_id, job)
 
-        if not write_result.success:
-            return TmuxStartResult(
-                request_id=write_result.request_id,
-                success=False,
-                error_message=f"Failed to write script file: {write_result.error_message}",
+        if self._scripts.has(sandbox_id, digest):
+            result = self.bash(
+                sandbox_id=sandbox_id,
+                command=guard_command(path, launch),
+                container_name=container_name,
+                sync=True,
+                timeout=30,
+                exec_mode=EXEC_MODE_HTTP,
             )
+            if not result.success:
+                return TmuxStartResult(
+                    request_id=result.request_id,
+                    success=False,
+                    error_message=f"Failed to start tmux session: {result.error_message or result.output}",
+                    transport=TRANSPORT_UPLOAD,
+                )
+            if SCRIPT_MISSING_MARKER not in (result.output or ""):
+                return start_result(
+                    result.output, session_id, result.request_id, TRANSPORT_UPLOAD
+                )
+            # The cached copy is gone (e.g. container restart); send it again.
+            self._scripts.discard(sandbox_id, digest)
 
-        # Make script executable and start tmux session to run it
-        # The script will be cleaned up after execution
-        tmux_cmd = (
-            f'chmod +x {shlex.quote(script_path)} && '
-            f'tmux new-session -d -s {shlex.quote(session_id)} "bash -l {shlex.quote(script_path)}; rm -f {shlex.quote(script_path)}"; '
-            f'tmux set-option -t {shlex.quote(session_id)} remain-on-exit on 2>/dev/null || true'
-        )
-
-        result = self.bash(
+        result = self._exec_via_ws(
             sandbox_id=sandbox_id,
-            command=tmux_cmd,
+            command=f"{upload_command(command, path)}\n{guard_command(path, launch)}",
             container_name=container_name,
-            sync=True,
-            timeout=30,
+            timeout=60.0,
         )
-
         if not result.success:
-            # Clean up script file on failure
-            self.bash(
-                sandbox_id=sandbox_id,
-                command=f"rm -f {shlex.quote(script_path)}",
-                container_name=container_name,
-                sync=True,
-                timeout=10,
-            )
             return TmuxStartResult(
                 request_id=result.request_id,
                 success=False,
-                error_message=f"Failed to start tmux session: {result.error_message or result.output}",
-            )
-
-        # Verify session was created
-        return self._verify_tmux_session(sandbox_id, session_id, container_name, result.request_id)
-
-    def _verify_tmux_session(
-        self,
-        sandbox_id: str,
-        session_id: str,
-        container_name: str,
-        request_id: str,
-        max_retries: int = 3,
-        retry_delay: float = 0.5,
-    ) -> TmuxStartResult:
-        """Verify that a tmux session was successfully created.
-
-        Uses retry logic to handle race condition where session creation
-        may not be immediately visible to has-session check.
-        """
-        verify_cmd = f"tmux has-session -t {shlex.quote(session_id)} 2>/dev/null && echo 'EXISTS' || echo 'NOT_FOUND'"
-
-        for attempt in range(max_retries):
-            verify_result = self.bash(
-                sandbox_id=sandbox_id,
-                command=verify_cmd,
-                container_name=container_name,
-                sync=True,
-                timeout=10,
+                error_message=f"Failed to start tmux session: {result.error_message}",
+                transport=TRANSPORT_STDIN,
             )
-
-            if "EXISTS" in (verify_result.output or ""):
-                return TmuxStartResult(
-                    request_id=request_id,
-                    success=True,
-                    session_id=session_id,
-                )
-
-            # Session not found yet, wait before retry (except on last attempt)
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-
-        return TmuxStartResult(
-            request_id=request_id,
-            success=False,
-            error_message="Session created but verification failed",
+        started = start_result(
+            result.output, session_id, result.request_id, TRANSPORT_STDIN
         )
+        if started.success:
+            self._scripts.add(sandbox_id, digest)
+        return started
 
     def tmux_poll(
         self,
@@ -1260,6 +2608,9 @@ echo "{marker}$__exit_code__"'''
         session_id: str,
         container_name: Optional[str] = None,
         tail_lines: int = TMUX_OUTPUT_TAIL_LINES,
+        cursor: Optional[int] = None,
+        include_output: bool = True,
+        compress_output: bool = False,
     ) -> TmuxPollResult:
         """
         Poll for command completion and retrieve output.
@@ -1269,103 +2620,97 @@ echo "{marker}$__exit_code__"'''
             session_id: The tmux session ID from tmux_start()
             container_name: Container name (auto-resolved if not provided)
             tail_lines: Number of lines to retrieve from output
+            cursor: ``cursor`` of a previous poll; only output written
+                since then is returned
+            include_output: Read the job's log; without it the poll only
+                reads the job's status files
+            compress_output: Compress the output in the container before
+                it is sent (useful with a large ``tail_lines``)
 
         Returns:
-            TmuxPollResult with status, exit_code (if completed), and output
+            TmuxPollResult with status, exit_code (if completed), start and
+            end times, and output
         """
         if not sandbox_id:
             return TmuxPollResult(success=False, error_message="sandbox_id is required")
         if not session_id:
             return TmuxPollResult(success=False, error_message="session_id is required")
 
+        cursors = None if cursor is None else {session_id: cursor}
+        return self.tmux_poll_many(
+            sandbox_id,
+            [session_id],
+            container_name,
+            tail_lines,
+            cursors,
+            include_output,
+            compress_output,
+        )[session_id]
+
+    def tmux_poll_many(
+        self,
+        sandbox_id: str,
+        session_ids: Iterable[str],
+        container_name: Optional[str] = None,
+        tail_lines: int = TMUX_OUTPUT_TAIL_LINES,
+        cursors: Optional[Dict[str, int]] = None,
+        include_output: bool = True,
+        compress_output: bool = False,
+    ) -> Dict[str, TmuxPollResult]:
+        """
+        Poll several tmux sessions with a single exec.
+
+        Each job's state comes from its status files and its output from
+        its log, all read by one script in the container, so the cost does
+        not grow with the number of sessions.
+
+        Args:
+            sandbox_id: The sandbox container ID
+            session_ids: tmux session IDs from tmux_start()
+            container_name: Container name (auto-resolved if not provided)
+            tail_lines: Number of lines to retrieve per session
+            cursors: Per-session ``cursor`` from a previous poll; those
+                sessions only return output written since then
+            include_output: Read the jobs' logs as well as their status
+            compress_output: Compress the output in the container before
+                it is sent
+
+        Returns:
+            Dict mapping each session ID to its TmuxPollResult
+        """
+        session_ids = list(dict.fromkeys(session_ids))
+        if not session_ids:
+            return {}
+        if not sandbox_id:
+            return failed_polls(session_ids, "sandbox_id is required")
+
         if not container_name:
             container_name = self._resolve_container_name(sandbox_id)
         if not container_name:
-            return TmuxPollResult(success=False, error_message="container_name is required")
-
-        # Check if session exists
-        check_cmd = f"tmux has-session -t {shlex.quote(session_id)} 2>/dev/null && echo 'EXISTS' || echo 'NOT_FOUND'"
-        check_result = self.bash(
-            sandbox_id=sandbox_id,
-            command=check_cmd,
-            container_name=container_name,
-            sync=True,
-            timeout=10,
+            return failed_polls(session_ids, "container_name is required")
+
+        cursors = cursors or {}
+        script = poll_script(
+            [(session_id, cursors.get(session_id)) for session_id in session_ids],
+            tail_lines,
+            include_output,
+            codecs=client_codecs() if compress_output else (),
         )
-
-        if "NOT_FOUND" in (check_result.output or ""):
-            return TmuxPollResult(
-                request_id=check_result.request_id,
-                success=True,
-                status=TmuxCommandStatus.NOT_FOUND,
-                error_message="Session does not exist (may have been cleaned up)",
-            )
-
-        # Capture output from tmux pane
-        # capture-pane -p prints to stdout, -S - starts from beginning of history
-        capture_cmd = f"tmux capture-pane -t {shlex.quote(session_id)} -p -S - 2>/dev/null | tail -n {tail_lines}"
-        capture_result = self.bash(
+        result = self.bash(
             sandbox_id=sandbox_id,
-            command=capture_cmd,
+            command=script,
             container_name=container_name,
             sync=True,
             timeout=30,
         )
-
-        if not capture_result.success:
-            return TmuxPollResult(
-                request_id=capture_result.request_id,
-                success=False,
-                status=TmuxCommandStatus.ERROR,
-                error_message=f"Failed to capture output: {capture_result.error_message}",
-            )
-
-        output = capture_result.output or ""
-        marker = f"{TMUX_MARKER_EXIT_CODE}{session_id}__"
-
-        # Check for completion marker in output
-        if marker in output:
-            # Extract exit code from marker line
-            lines = output.split("\n")
-            exit_code: Optional[int] = None
-            clean_output_lines: list[str] = []
-
-            for line in lines:
-                if marker in line:
-                    # Extract exit code after marker
-                    try:
-                        exit_code_str = line.split(marker)[-1].strip()
-                        exit_code = int(exit_code_str)
-                    except (ValueError, IndexError):
-                        exit_code = -1  # Unknown exit code
-                elif line.startswith("Pane is dead"):
-                    # Filter out tmux "Pane is dead" message (from remain-on-exit)
-                    pass
-                else:
-                    clean_output_lines.append(line)
-
-            # Remove trailing empty lines
-            while clean_output_lines and not clean_output_lines[-1].strip():
-                clean_output_lines.pop()
-
-            clean_output = "\n".join(clean_output_lines)
-
-            return TmuxPollResult(
-                request_id=capture_result.request_id,
-                success=True,
-                status=TmuxCommandStatus.COMPLETED,
-                exit_code=exit_code,
-                output=clean_output,
-                output_truncated=len(lines) >= tail_lines,
+        if not result.success:
+            return failed_polls(
+                session_ids,
+                f"Failed to capture output: {result.error_message}",
+                result.request_id,
             )
-
-        # Command still running - return partial output
-        return TmuxPollResult(
-            request_id=capture_result.request_id,
-            success=True,
-            status=TmuxCommandStatus.RUNNING,
-            output=output,
-            output_truncated=len(output.split("\n")) >= tail_lines,
+        return parse_poll_output(
+            result.output, session_ids, tail_lines, result.request_id, cursors
         )
 
     def tmux_wait(
@@ -1379,20 +2724,27 @@ echo "{marker}$__exit_code__"'''
         backoff_factor: float = TMUX_POLL_BACKOFF_FACTOR,
         tail_lines: int = TMUX_OUTPUT_TAIL_LINES,
         cleanup: bool = True,
+        blocking: bool = True,
     ) -> TmuxPollResult:
         """
-        Wait for command completion with exponential backoff polling.
+        Wait for command completion.
+
+        By default the wait blocks inside the container: one streamed exec
+        returns as soon as the job writes its exit code (or the session
+        disappears) and carries the final output with it. With
+        ``blocking=False`` the session is polled with exponential backoff.
 
         Args:
             sandbox_id: The sandbox container ID
             session_id: The tmux session ID
             container_name: Container name
             timeout: Maximum time to wait (None = use default)
-            poll_interval: Initial polling interval
-            max_poll_interval: Maximum polling interval
-            backoff_factor: Multiplier for exponential backoff
+            poll_interval: Initial polling interval (polling mode)
+            max_poll_interval: Maximum polling interval (polling mode)
+            backoff_factor: Multiplier for exponential backoff (polling mode)
             tail_lines: Lines to retrieve from output
             cleanup: Whether to kill the session after completion
+            blocking: Wait in the container instead of polling
 
         Returns:
             TmuxPollResult with final status and output
@@ -1400,6 +2752,11 @@ echo "{marker}$__exit_code__"'''
         if timeout is None:
             timeout = TMUX_DEFAULT_TIMEOUT
 
+        if blocking:
+            return self._tmux_wait_blocking(
+                sandbox_id, session_id, container_name, timeout, tail_lines, cleanup
+            )
+
         start_time = time.monotonic()
         current_interval = poll_interval
 
@@ -1408,7 +2765,9 @@ echo "{marker}$__exit_code__"'''
             elapsed = time.monotonic() - start_time
             if elapsed >= timeout:
                 # Timeout - get final output and optionally cleanup
-                poll_result = self.tmux_poll(sandbox_id, session_id, container_name, tail_lines)
+                poll_result = self.tmux_poll(
+                    sandbox_id, session_id, container_name, tail_lines
+                )
                 if cleanup:
                     self.tmux_kill(sandbox_id, session_id, container_name)
                 return TmuxPollResult(
@@ -1421,7 +2780,9 @@ echo "{marker}$__exit_code__"'''
                 )
 
             # Poll for status
-            poll_result = self.tmux_poll(sandbox_id, session_id, container_name, tail_lines)
+            poll_result = self.tmux_poll(
+                sandbox_id, session_id, container_name, tail_lines
+            )
 
             if not poll_result.success:
                 return poll_result
@@ -1438,6 +2799,136 @@ echo "{marker}$__exit_code__"'''
             time.sleep(current_interval)
             current_interval = min(current_interval * backoff_factor, max_poll_interval)
 
+    def _tmux_wait_blocking(
+        self,
+        sandbox_id: str,
+        session_id: str,
+        container_name: Optional[str],
+        timeout: float,
+        tail_lines: int,
+        cleanup: bool,
+    ) -> TmuxPollResult:
+        """Wait for a tmux job with a blocking in-container loop."""
+        if not sandbox_id:
+            return TmuxPollResult(success=False, error_message="sandbox_id is required")
+        if not session_id:
+            return TmuxPollResult(success=False, error_message="session_id is required")
+        for _, result in self.tmux_wait_many(
+            sandbox_id, [session_id], container_name, timeout, tail_lines, cleanup
+        ):
+            return result
+        return TmuxPollResult(
+            success=False, error_message="No status returned for session"
+        )
+
+    def tmux_wait_many(
+        self,
+        sandbox_id: str,
+        session_ids: Iterable[str],
+        container_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+        tail_lines: int = TMUX_OUTPUT_TAIL_LINES,
+        cleanup: bool = True,
+    ) -> Iterator[Tuple[str, TmuxPollResult]]:
+        """
+        Wait for several tmux sessions, yielding each as it finishes.
+
+        Each exec blocks in the container until at least one session has
+        finished, then returns all of them; the client never polls.
+        Sessions still running at ``timeout`` are yielded last with
+        ``success=False``.
+
+        Args:
+            sandbox_id: The sandbox container ID
+            session_ids: tmux session IDs from tmux_start()
+            container_name: Container name
+            timeout: Maximum time to wait for all sessions (None = use default)
+            tail_lines: Lines to retrieve from output
+            cleanup: Whether to kill each session after completion
+
+        Yields:
+            (session_id, TmuxPollResult) in completion order
+        """
+        pending: List[str] = list(dict.fromkeys(session_ids))
+        if not pending:
+            return
+        if timeout is None:
+            timeout = TMUX_DEFAULT_TIMEOUT
+        if not sandbox_id:
+            yield from failed_polls(pending, "sandbox_id is required").items()
+            return
+        if not container_name:
+            container_name = self._resolve_container_name(sandbox_id)
+        if not container_name:
+            yield from failed_polls(pending, "container_name is required").items()
+            return
+
+        start_time = time.monotonic()
+        while True:
+            remaining = timeout - (time.monotonic() - start_time)
+            chunk = max(1.0, min(remaining, _TMUX_WAIT_CHUNK))
+            script = poll_script(
+                [(session_id, None) for session_id in pending],
+                tail_lines,
+                wait_seconds=chunk,
+                cleanup=cleanup,
+            )
+            result = self.bash(
+                sandbox_id=sandbox_id,
+                command=script,
+                container_name=container_name,
+                timeout=chunk + _TMUX_WAIT_GRACE,
+                exec_mode=EXEC_MODE_WEBSOCKET,
+            )
+            if not result.success:
+                yield from failed_polls(
+                    pending,
+                    f"Failed to wait for sessions: {result.error_message}",
+                    result.request_id,
+                ).items()
+                return
+
+            polls = parse_poll_output(
+                result.output, pending, tail_lines, result.request_id
+            )
+            still_running = []
+            for session_id in pending:
+                if polls[session_id].status == TmuxCommandStatus.RUNNING:
+                    still_running.append(session_id)
+                else:
+                    yield session_id, polls[session_id]
+            pending = still_running
+            if not pending:
+                return
+
+            elapsed = time.monotonic() - start_time
+            if elapsed < timeout:
+                continue
+            if cleanup:
+                self.bash(
+                    sandbox_id=sandbox_id,
+                    command=kill_sessions_command(pending),
+                    container_name=container_name,
+                    sync=True,
+                    timeout=10,
+                    exec_mode=EXEC_MODE_HTTP,
+                )
+            for session_id in pending:
+                poll_result = polls[session_id]
+                yield (
+                    session_id,
+                    TmuxPollResult(
+                        request_id=result.request_id,
+                        success=False,
+                        status=TmuxCommandStatus.RUNNING,
+                        output=poll_result.output,
+                        output_truncated=poll_result.output_truncated,
+                        error_message=f"Timeout after {elapsed:.1f}s",
+                        cursor=poll_result.cursor,
+                    ),
+                )
+            return
+
     def tmux_kill(
         self,
         sandbox_id: str,
@@ -1463,13 +2954,13 @@ echo "{marker}$__exit_code__"'''
         if not container_name:
             container_name = self._resolve_container_name(sandbox_id)
 
-        kill_cmd = f"tmux kill-session -t {shlex.quote(session_id)} 2>/dev/null || true"
         result = self.bash(
             sandbox_id=sandbox_id,
-            command=kill_cmd,
+            command=kill_sessions_command([session_id]),
             container_name=container_name,
             sync=True,
             timeout=10,
+            exec_mode=EXEC_MODE_HTTP,
         )
 
         return TmuxKillResult(
@@ -1493,18 +2984,20 @@ echo "{marker}$__exit_code__"'''
             OperationResult with data containing list of session info dicts
         """
         if not sandbox_id:
-            return OperationResult(success=False, error_message="sandbox_id is required")
+            return OperationResult(
+                success=False, error_message="sandbox_id is required"
+            )
 
         if not container_name:
             container_name = self._resolve_container_name(sandbox_id)
 
-        list_cmd = "tmux list-sessions -F '#{session_name}:#{session_created}:#{session_attached}' 2>/dev/null || echo ''"
         result = self.bash(
             sandbox_id=sandbox_id,
-            command=list_cmd,
+            command=list_script(),
             container_name=container_name,
             sync=True,
             timeout=10,
+            exec_mode=EXEC_MODE_HTTP,
         )
 
         if not result.success:
@@ -1514,19 +3007,8 @@ echo "{marker}$__exit_code__"'''
                 error_message=result.error_message,
             )
 
-        sessions: list[dict[str, Any]] = []
-        for line in (result.output or "").strip().split("\n"):
-            if ":" in line:
-                parts = line.split(":")
-                if len(parts) >= 3:
-                    sessions.append({
-                        "session_id": parts[0],
-                        "created": parts[1],
-                        "attached": parts[2] == "1",
-                    })
-
         return OperationResult(
             request_id=result.request_id,
             success=True,
-            data=sessions,
+            data=parse_list_output(result.output),
         )
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Iterator, Optional, Union
+
+from .._common.pty import PTY_PING_INTERVAL
+from .._common.ws import (
+    WS_MSG_EXIT,
+    WS_MSG_STDERR,
+    WS_MSG_STDOUT,
+    encode_ws_resize,
+    encode_ws_stdin,
+    parse_exit_status,
+    parse_ws_frame,
+)
+
+
+class PtySession:
+    """
+    Interactive terminal in a sandbox, on one exec with a TTY.
+
+    Created by ``EciSandbox.open_pty``. ``write`` sends keystrokes as they
+    come, each in its own stdin frame; ``read`` returns the terminal's raw
+    output; ``resize`` changes the window size. A reader thread collects
+    output and pings the connection while it is idle. Once the shell exits
+    or the connection drops, ``closed`` is True, ``exit_code`` and
+    ``error_message`` say why, and ``write`` returns False.
+    """
+
+    def __init__(
+        self,
+        ws: Any,
+        sandbox_id: str,
+        container_name: str,
+        request_id: str = "",
+    ):
+        self._ws = ws
+        self.sandbox_id = sandbox_id
+        self.container_name = container_name
+        self.request_id = request_id
+        self.exit_code: Optional[int] = None
+        self.error_message = ""
+        self._output: "queue.Queue[bytes]" = queue.Queue()
+        self._send_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._reader = threading.Thread(
+            target=self._read_loop, name="eci-pty", daemon=True
+        )
+        self._reader.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def write(self, data: Union[str, bytes]) -> bool:
+        """Send input to the terminal; False once the session is closed."""
+        return self._send(encode_ws_stdin(data))
+
+    def resize(self, cols: int, rows: int) -> bool:
+        """Set the terminal's window size in columns and rows."""
+        return self._send(encode_ws_resize(cols, rows))
+
+    def read(self, timeout: Optional[float] = None) -> bytes:
+        """
+        Output received since the last read, waiting up to ``timeout``
+        seconds (forever if None) for some to arrive. Returns ``b""`` on
+        timeout or once the session has ended and everything was read.
+        """
+        chunks = []
+        try:
+            chunk = self._output.get(timeout=timeout)
+            while chunk:
+                chunks.append(chunk)
+                chunk = self._output.get_nowait()
+            # The end-of-session marker stays queued for later reads.
+            self._output.put(b"")
+        except queue.Empty:
+            pass
+        return b"".join(chunks)
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Yield output chunks until the session ends."""
+        while True:
+            data = self.read(timeout=0.5)
+            if data:
+                yield data
+            elif self.closed:
+                return
+
+    def close(self) -> None:
+        """Close the connection; the shell gets a hangup."""
+        self._shutdown("PTY session closed")
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+    def __enter__(self) -> "PtySession":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _send(self, message: bytes) -> bool:
+        import websocket
+
+        if self._closed.is_set():
+            return False
+        try:
+            with self._send_lock:
+                self._ws.send(message, opcode=websocket.ABNF.OPCODE_BINARY)
+        except Exception as exc:
+            self._shutdown(f"PTY connection failed: {exc}")
+            return False
+        return True
+
+    def _read_loop(self) -> None:
+        import websocket
+
+        error = ""
+        try:
+            while True:
+                self._ws.settimeout(PTY_PING_INTERVAL)
+                try:
+                    message = self._ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    with self._send_lock:
+                        self._ws.ping()
+                    continue
+                except (websocket.WebSocketException, OSError) as exc:
+                    if not self._closed.is_set():
+                        error = f"PTY connection lost: {exc}"
+                    break
+                if not message:
+                    break
+                channel, payload = parse_ws_frame(message)
+                if channel == WS_MSG_EXIT:
+                    self.exit_code = parse_exit_status(payload)
+                    break
+                if channel in (WS_MSG_STDOUT, WS_MSG_STDERR) and payload:
+                    self._output.put(payload)
+        except Exception as exc:
+            error = f"PTY connection failed: {exc}"
+        finally:
+            self._shutdown(error)
+
+    def _shutdown(self, error: str) -> None:
+        if self._closed.is_set():
+            return
+        self.error_message = error
+        self._closed.set()
+        # Marks the end of the output; ``read`` returns at it.
+        self._output.put(b"")
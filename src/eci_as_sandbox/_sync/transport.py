@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import contextvars
+import ssl
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from alibabacloud_eci20180808.client import Client as EciClient
+from requests.adapters import HTTPAdapter
+
+from .._common.config import PoolLimits
+from .._common.logger import get_logger
+from .._common.models import PoolStats
+from .._common.transport import (
+    _patch_sdk_cores,
+    _pool_key,
+    _request_body,
+    _resolve_proxy,
+    _resolve_ssl,
+    _resolve_timeouts,
+)
+
+
+_logger = get_logger("eci-as-sandbox.transport")
+
+# Transport used by SDK calls issued from the current thread/context. Set
+# around ``call_api`` by ``PooledEciClient`` and read by the SDK core hook.
+_active_transport: contextvars.ContextVar[Optional["SyncHttpTransport"]] = (
+    contextvars.ContextVar("eci_sandbox_sync_transport", default=None)
+)
+_HOOK_INSTALLED = False
+_HOOK_LOCK = threading.Lock()
+
+
+def _install_sdk_hook() -> None:
+    """
+    Route the SDK's ``do_action`` through the active transport.
+
+    The hook is process-wide but only diverts requests issued while a
+    transport is active, so other SDK users keep the stock behaviour.
+    """
+    global _HOOK_INSTALLED
+    with _HOOK_LOCK:
+        if _HOOK_INSTALLED:
+            return
+
+        def _make_dispatch(core, original, response_cls, retry_error):
+            def _dispatch(request, runtime_option=None):
+                transport = _active_transport.get()
+                if transport is None:
+                    return original(request, runtime_option)
+                return transport.send(
+                    core, request, runtime_option or {}, response_cls, retry_error
+                )
+
+            return _dispatch
+
+        _patch_sdk_cores("do_action", _make_dispatch)
+        _HOOK_INSTALLED = True
+
+
+class SyncHttpTransport:
+    """
+    Thread-safe keep-alive HTTP transport for ``EciSandbox``.
+
+    One ``requests`` session with a bounded, blocking urllib3 pool is kept per
+    endpoint (scheme, host, port, proxy and TLS settings). When all
+    ``max_connections`` connections are busy, further threads wait for one to
+    be returned instead of opening throwaway connections.
+
+    A single instance may be shared by several clients and threads.
+    Clients that did not get it passed in hold it (``acquire``); the last
+    one to ``release`` it closes its sessions.
+    """
+
+    def __init__(self, limits: Optional[PoolLimits] = None):
+        self.limits = limits or PoolLimits()
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[Any, ...], Any] = {}
+        self._holders = 0
+        self._requests = 0
+        self._errors = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._pools_opened = 0
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            stats = PoolStats(
+                pools=len(sessions),
+                pools_opened=self._pools_opened,
+                requests=self._requests,
+                errors=self._errors,
+                in_flight=self._in_flight,
+                peak_in_flight=self._peak_in_flight,
+                max_connections=self.limits.max_connections,
+            )
+        stats.idle_connections = sum(_idle_connections(s) for s in sessions)
+        return stats
+
+    def acquire(self) -> None:
+        """Register a client holding the transport."""
+        with self._lock:
+            self._holders += 1
+
+    def release(self) -> None:
+        """Drop a hold; the last holder closes the sessions."""
+        with self._lock:
+            self._holders = max(0, self._holders - 1)
+            last = self._holders == 0
+        if last:
+            self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def send(
+        self,
+        core: Any,
+        request: Any,
+        runtime_option: Dict[str, Any],
+        response_cls: Any,
+        retry_error: Any,
+    ) -> Any:
+        url = core.compose_url(request)
+        protocol = request.protocol.upper()
+        verify, ssl_context = _resolve_ssl(core, protocol, runtime_option)
+        proxy = _resolve_proxy(
+            protocol, request.headers.get("host", ""), runtime_option
+        )
+        timeout = _resolve_timeouts(runtime_option)
+
+        session = self._get_session(
+            _pool_key(request, proxy, verify, runtime_option), ssl_context
+        )
+        proxies: Dict[str, str] = {}
+        if proxy:
+            proxies[protocol.lower()] = proxy
+
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            resp = session.request(
+                request.method.upper(),
+                url,
+                data=_request_body(request),
+                headers=request.headers,
+                proxies=proxies,
+                timeout=timeout,
+                verify=verify,
+                cert=runtime_option.get("cert"),
+            )
+        except IOError as exc:
+            with self._lock:
+                self._errors += 1
+            raise retry_error(str(exc))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        response = response_cls()
+        response.status_message = resp.reason
+        response.status_code = resp.status_code
+        response.headers = {k.lower(): v for k, v in resp.headers.items()}
+        response.body = resp.content
+        response.response = resp
+        return response
+
+    def _get_session(
+        self, key: Tuple[Any, ...], ssl_context: Optional[ssl.SSLContext]
+    ) -> Any:
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                return session
+
+            session = requests.Session()
+            # The SDK composes headers itself; don't let requests add env
+            # proxies or .netrc auth behind its back.
+            session.trust_env = False
+            adapter = _PoolAdapter(
+                ssl_context=ssl_context,
+                pool_connections=1,
+                pool_maxsize=self.limits.max_connections,
+                pool_block=True,
+            )
+            session.mount(f"{key[0].lower()}://", adapter)
+            self._sessions[key] = session
+            self._pools_opened += 1
+        _logger.debug("Opened connection pool for %s", key[1])
+        return session
+
+
+class _PoolAdapter(HTTPAdapter):
+    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None, **kwargs: Any):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        if self.ssl_context is not None:
+            kwargs["ssl_context"] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+
+class PooledEciClient(EciClient):
+    """``EciClient`` whose calls go through a ``SyncHttpTransport``."""
+
+    def __init__(self, config: Any, transport: SyncHttpTransport):
+        super().__init__(config)
+        self.transport = transport
+        _install_sdk_hook()
+
+    def call_api(self, params, request, runtime):
+        token = _active_transport.set(self.transport)
+        try:
+            return super().call_api(params, request, runtime)
+        finally:
+            _active_transport.reset(token)
+
+
+def _idle_connections(session: Any) -> int:
+    # Best effort: urllib3 does not expose pool occupancy publicly.
+    try:
+        total = 0
+        for adapter in session.adapters.values():
+            for pool in adapter.poolmanager.pools._container.values():
+                total += pool.pool.qsize() - sum(
+                    1 for conn in list(pool.pool.queue) if conn is None
+                )
+        return total
+    except Exception:
+        return 0
@@ -0,0 +1,94 @@
+"""The helper agent's stdout framing."""
+
+import json
+import struct
+
+import pytest
+
+from eci_as_sandbox._common.agent import (
+    AGENT_READY_LINE,
+    AgentStream,
+    encode_frame,
+    frame_id,
+    split_frame,
+)
+
+READY = (AGENT_READY_LINE + "\n").encode()
+
+
+def _feed_bytewise(stream, data):
+    frames = []
+    for position in range(len(data)):
+        frames.extend(stream.feed(data[position : position + 1]))
+    return frames
+
+
+def test_startup_text_is_kept_until_ready():
+    stream = AgentStream()
+    assert stream.feed(b"bash: warning: setlocale\n") == []
+    assert not stream.ready
+    frames = stream.feed(READY + encode_frame({"id": 1, "ok": True}, b"data"))
+    assert stream.ready
+    assert frames == [({"id": 1, "ok": True}, b"data")]
+    assert stream.startup_text() == "bash: warning: setlocale"
+
+
+def test_ready_line_and_frames_split_across_reads():
+    stream = AgentStream()
+    data = (
+        b"noise\n"
+        + READY
+        + encode_frame({"id": 1}, b"x" * 300)
+        + encode_frame({"id": 2})
+        + encode_frame({"id": 3}, b"\x00" * 5)[:-1]
+    )
+    frames = _feed_bytewise(stream, data)
+    assert [(header["id"], payload) for header, payload in frames] == [
+        (1, b"x" * 300),
+        (2, b""),
+    ]
+    # The third frame is one byte short and stays buffered.
+    assert stream.feed(b"\x00") == [({"id": 3}, b"\x00" * 5)]
+
+
+def test_startup_text_is_bounded():
+    stream = AgentStream()
+    for _ in range(100):
+        stream.feed(b"x" * 1000)
+    assert len(stream.startup) <= 4096
+    assert stream.feed(READY) == []
+    assert stream.ready
+
+
+def test_split_frame_reassembles():
+    frame = encode_frame({"id": 9, "op": "write"}, bytes(range(256)) * 10)
+    parts = split_frame(frame, 100)
+    assert all(len(part) <= 100 for part in parts)
+    assert b"".join(parts) == frame
+    assert split_frame(b"") == [b""]
+
+    stream = AgentStream()
+    stream.feed(READY)
+    frames = []
+    for part in parts:
+        frames.extend(stream.feed(part))
+    assert frames == [({"id": 9, "op": "write"}, bytes(range(256)) * 10)]
+
+
+def test_malformed_body_raises():
+    body = b"{not json"
+    stream = AgentStream()
+    stream.feed(READY)
+    with pytest.raises(ValueError):
+        stream.feed(struct.pack(">II", len(body), 0) + body)
+
+
+@pytest.mark.parametrize("header", [{}, {"id": "1"}, {"id": None}, {"id": True}])
+def test_frame_id_rejects_frames_without_an_integer_id(header):
+    with pytest.raises(ValueError, match="without a call id"):
+        frame_id(header)
+
+
+def test_frame_id():
+    header = json.loads(json.dumps({"id": 12, "ok": True}))
+    assert frame_id(header) == 12
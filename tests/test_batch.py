@@ -0,0 +1,81 @@
+"""Batch framing: building the script, running it and reading the frames."""
+
+import base64
+import subprocess
+
+from eci_as_sandbox._common.batch import build_batch_script, parse_batch_output
+from eci_as_sandbox._common.models import BATCH_MODE_PARALLEL
+
+MARKER = "__ECI_BATCH_0123__"
+
+
+def _frame(index, exit_code, stdout=b"", stderr=b""):
+    return (
+        f"{MARKER} {index} {exit_code}\n"
+        f"{base64.b64encode(stdout).decode()}\n"
+        f"{base64.b64encode(stderr).decode()}\n"
+    )
+
+
+def test_frames_are_matched_by_index():
+    output = "profile noise\n" + _frame(1, 2, b"b\n", b"oops\n") + _frame(0, 0, b"a\n")
+    first, second = parse_batch_output(output, MARKER, 2, transport="inline")
+    assert (first.success, first.exit_code, first.output) == (True, 0, "a\n")
+    assert (second.success, second.exit_code) == (True, 2)
+    assert (second.output, second.stderr) == ("b\n", "oops\n")
+    assert first.transport == second.transport == "inline"
+
+
+def test_output_that_looks_like_a_marker_is_not_a_frame():
+    # Command output is base64-encoded, so only real frames start a line
+    # with the marker; a malformed or cut-off frame is skipped.
+    output = (
+        _frame(0, 0, f"{MARKER} 1 0\n".encode())
+        + f"{MARKER} 1 zero\nYQ==\nYQ==\n"
+        + f"{MARKER} 2 0\n!!!\nYQ==\n"
+        + f"{MARKER} 3 0\nYQ==\n"
+    )
+    results = parse_batch_output(output, MARKER, 4)
+    assert results[0].output == f"{MARKER} 1 0\n"
+    assert [result.success for result in results] == [True, False, False, False]
+
+
+def test_missing_frames_are_reported_by_cause():
+    skipped = parse_batch_output(_frame(0, 1), MARKER, 2)[1]
+    assert not skipped.success and not skipped.truncated
+    assert "did not run" in skipped.error_message
+
+    lost = parse_batch_output(_frame(0, 1), MARKER, 2, truncated=True)[1]
+    assert not lost.success and lost.truncated
+    assert "truncated" in lost.error_message
+
+
+def _run(commands, **kwargs):
+    marker, script = build_batch_script(commands, **kwargs)
+    completed = subprocess.run(
+        ["bash", "-c", script], capture_output=True, text=True, check=True
+    )
+    return parse_batch_output(completed.stdout, marker, len(commands))
+
+
+def test_script_round_trip():
+    results = _run(["echo out; echo err >&2; exit 3", "printf 'two\\nlines'"])
+    assert [(r.exit_code, r.output, r.stderr) for r in results] == [
+        (3, "out\n", "err\n"),
+        (0, "two\nlines", ""),
+    ]
+
+
+def test_script_stops_on_error():
+    results = _run(["true", "false", "echo never"], stop_on_error=True)
+    assert [r.exit_code for r in results] == [0, 1, None]
+    assert not results[2].success
+
+
+def test_parallel_script_keeps_frames_whole():
+    commands = [f"seq {n * 1000} {n * 1000 + 500}" for n in range(4)]
+    results = _run(commands, mode=BATCH_MODE_PARALLEL)
+    for n, result in enumerate(results):
+        assert result.output.split() == [
+            str(i) for i in range(n * 1000, n * 1000 + 501)
+        ]
@@ -0,0 +1,84 @@
+"""Bounded output capture and the followed-job sink built on it."""
+
+import os
+
+from eci_as_sandbox._common.capture import OutputCapture
+from eci_as_sandbox._common.config import CaptureLimits
+from eci_as_sandbox._common.follow import JobOutput
+
+
+def test_output_within_limits_is_kept_whole():
+    capture = OutputCapture(CaptureLimits(head_bytes=4, tail_bytes=4))
+    for chunk in (b"ab", "cd", b"", b"efgh"):
+        capture.write(chunk)
+    assert capture.text() == "abcdefgh"
+    assert (capture.total_bytes, capture.dropped_bytes) == (8, 0)
+    assert not capture.truncated
+
+
+def test_head_and_tail_are_kept_around_a_marker():
+    capture = OutputCapture(CaptureLimits(head_bytes=3, tail_bytes=4))
+    for byte in b"0123456789abcdefghij":
+        capture.write(bytes([byte]))
+    assert capture.truncated
+    assert capture.total_bytes == 20
+    assert capture.dropped_bytes == 13
+    assert capture.text() == "012\n... [13 bytes truncated] ...\nghij"
+
+
+def test_one_large_write_splits_across_head_and_tail():
+    capture = OutputCapture(CaptureLimits(head_bytes=2, tail_bytes=3))
+    capture.write(b"x" * 2 + b"y" * 100 + b"z" * 3)
+    assert capture.text() == "xx\n... [100 bytes truncated] ...\nzzz"
+
+
+def test_zero_limits():
+    head_only = OutputCapture(CaptureLimits(head_bytes=2, tail_bytes=0))
+    head_only.write(b"abcdef")
+    assert head_only.text() == "ab\n... [4 bytes truncated] ...\n"
+
+    tail_only = OutputCapture(CaptureLimits(head_bytes=0, tail_bytes=2))
+    tail_only.write(b"abcdef")
+    assert tail_only.text() == "\n... [4 bytes truncated] ...\nef"
+
+
+def test_spill_file_holds_the_full_stream(tmp_path):
+    limits = CaptureLimits(
+        head_bytes=1, tail_bytes=1, spill_to_file=True, spill_dir=str(tmp_path)
+    )
+    capture = OutputCapture(limits)
+    capture.write(b"abc")
+    capture.write(b"def")
+    capture.close()
+    capture.write(b"after close")
+    with open(capture.spill_path, "rb") as spilled:
+        assert spilled.read() == b"abcdef"
+    assert os.path.dirname(capture.spill_path) == str(tmp_path)
+
+
+def test_spill_file_is_not_created_without_output(tmp_path):
+    capture = OutputCapture(CaptureLimits(spill_to_file=True, spill_dir=str(tmp_path)))
+    capture.close()
+    assert capture.spill_path == ""
+    assert not os.listdir(tmp_path)
+
+
+def test_job_output_counts_bytes_and_holds_back_split_characters():
+    seen = []
+    output = JobOutput(OutputCapture(), seen.append)
+    encoded = "héllo ✓".encode()
+    for position in range(len(encoded)):
+        output.write(encoded[position : position + 1])
+    output.close()
+    assert "".join(seen) == "héllo ✓"
+    assert output.offset == len(encoded)
+    assert output.capture.text() == "héllo ✓"
+
+
+def test_job_output_flushes_an_incomplete_character_on_close():
+    seen = []
+    output = JobOutput(OutputCapture(), seen.append)
+    output.write("✓".encode()[:2])
+    assert seen == []
+    output.close()
+    assert seen == ["�"]
@@ -0,0 +1,101 @@
+"""Decoding compressed launcher output."""
+
+import gzip
+import subprocess
+
+import pytest
+
+from eci_as_sandbox._common.compression import (
+    CODEC_GZIP,
+    CODEC_HEADER,
+    CODEC_IDENTITY,
+    DecompressingOutput,
+    Decompressor,
+    codec_line,
+    compressor_setup,
+    decompress_payload,
+    parse_codec_line,
+)
+
+
+class _Sink:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.data.extend(data)
+
+
+def test_parse_codec_line():
+    assert parse_codec_line(f"{CODEC_HEADER} gzip") == CODEC_GZIP
+    assert parse_codec_line(f"{CODEC_HEADER} gzip\n") == CODEC_GZIP
+    assert parse_codec_line(f"{CODEC_HEADER}") is None
+    assert parse_codec_line("gzip") is None
+
+
+def test_concatenated_gzip_members_decode_in_order():
+    # Each poll or flush of the launcher's pipe may start a new member.
+    members = b"".join(gzip.compress(f"part {i}\n".encode()) for i in range(3))
+    assert decompress_payload(CODEC_GZIP, members) == b"part 0\npart 1\npart 2\n"
+
+    decompressor = Decompressor(CODEC_GZIP)
+    decoded = b"".join(
+        decompressor.decompress(members[i : i + 7]) for i in range(0, len(members), 7)
+    )
+    assert decoded == b"part 0\npart 1\npart 2\n"
+
+
+def test_corrupt_and_unknown_payloads():
+    with pytest.raises(ValueError, match="Corrupt gzip"):
+        decompress_payload(CODEC_GZIP, b"not gzip")
+    with pytest.raises(ValueError, match="Unsupported"):
+        Decompressor("brotli")
+    assert decompress_payload(CODEC_IDENTITY, b"as is") == b"as is"
+
+
+def test_output_before_the_codec_line_passes_through():
+    sink = _Sink()
+    output = DecompressingOutput(sink)
+    stream = (
+        b"motd line\n"
+        + f"{CODEC_HEADER} gzip\n".encode()
+        + gzip.compress(b"first\n")
+        + gzip.compress(b"second\n")
+    )
+    for position in range(len(stream)):
+        output.write(stream[position : position + 1])
+    output.finish()
+    assert bytes(sink.data) == b"motd line\nfirst\nsecond\n"
+
+
+def test_finish_passes_on_output_without_a_codec_line():
+    sink = _Sink()
+    output = DecompressingOutput(sink)
+    output.write(b"complete line\nno newline")
+    assert bytes(sink.data) == b"complete line\n"
+    output.finish()
+    assert bytes(sink.data) == b"complete line\nno newline"
+
+
+def test_launcher_round_trip():
+    script = (
+        f"{compressor_setup([CODEC_GZIP])}; {codec_line()}; "
+        "{ seq 1 2000; seq 2001 4000; } | $__eci_z"
+    )
+    stdout = subprocess.run(
+        ["bash", "-c", script], capture_output=True, check=True
+    ).stdout
+    sink = _Sink()
+    output = DecompressingOutput(sink)
+    output.write(stdout)
+    output.finish()
+    assert bytes(sink.data).split() == [str(i).encode() for i in range(1, 4001)]
+
+
+def test_setup_falls_back_to_identity():
+    assert compressor_setup([]) == f"__eci_c={CODEC_IDENTITY}; __eci_z=cat"
+    script = f"{compressor_setup(['brotli'])}; {codec_line()}; echo hi | $__eci_z"
+    stdout = subprocess.run(
+        ["bash", "-c", script], capture_output=True, check=True
+    ).stdout
+    assert stdout == f"{CODEC_HEADER} identity\nhi\n".encode()
@@ -0,0 +1,347 @@
+"""
+Many threads sharing one ``EciSandbox`` against a local stand-in endpoint.
+
+The stand-in answers the OpenAPI calls over HTTP and serves exec streams
+from a local WebSocket server. Execs run the client's wrapped command
+under the local bash, so the launchers and poll scripts are the real ones.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import signal
+import subprocess
+import time
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Set, Tuple, cast
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import ServerConnection, serve
+
+from eci_as_sandbox import Config, EciSandbox, PoolLimits, SyncHttpTransport
+from eci_as_sandbox._common.models import EXEC_MODE_WEBSOCKET
+from eci_as_sandbox._common.ws import WS_MSG_EXIT, WS_MSG_STDIN
+
+THREADS = 32
+CALLS = 400
+MAX_CONNECTIONS = 8
+EXEC_THREADS = 64
+EXEC_CALLS = 256
+# Incompressible and over 64 KiB, so it goes through the script cache.
+SCRIPT = (
+    "".join(f": {hashlib.sha256(b'%d' % i).hexdigest()}\n" for i in range(1200))
+    + "echo script done\n"
+)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.peers: Set[Tuple[str, int]] = set()
+        self.actions: Dict[str, int] = {}
+        # Streamed execs waiting for their WebSocket, by path.
+        self.execs: Dict[str, List[str]] = {}
+        self.streams = 0
+        self.ws_url = ""
+        # Execs run with an empty home, like a container without a profile.
+        self.env: Dict[str, str] = {}
+        self.procs: List["subprocess.Popen[bytes]"] = []
+
+
+def _run_exec(server: _Server, connection: ServerConnection, argv: List[str]) -> None:
+    """Run one streamed exec the way ECI does: stdin in, output and exit out."""
+    proc = subprocess.Popen(
+        argv,
+        env=server.env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    assert proc.stdin is not None and proc.stdout is not None
+    assert proc.stderr is not None
+    with server.lock:
+        server.procs.append(proc)
+
+    def feed() -> None:
+        assert proc.stdin is not None
+        try:
+            for message in connection:
+                if isinstance(message, bytes) and message[:1] == bytes([WS_MSG_STDIN]):
+                    proc.stdin.write(message[1:])
+                    proc.stdin.flush()
+        except (ConnectionClosed, OSError):
+            pass
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+
+    def pump(stream: Any, channel: int) -> None:
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            try:
+                connection.send(bytes([channel]) + chunk)
+            except ConnectionClosed:
+                break
+
+    threading.Thread(target=feed, daemon=True).start()
+    stderr = threading.Thread(target=pump, args=(proc.stderr, 2), daemon=True)
+    stderr.start()
+    pump(proc.stdout, 1)
+    stderr.join()
+    exit_code = proc.wait()
+    try:
+        connection.send(
+            bytes([WS_MSG_EXIT]) + json.dumps({"exitCode": exit_code}).encode()
+        )
+    except ConnectionClosed:
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._reply(dict(parse_qsl(urlsplit(self.path).query)))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        query = dict(parse_qsl(urlsplit(self.path).query))
+        query.update(parse_qsl(self.rfile.read(length).decode()))
+        self._reply(query)
+
+    def _reply(self, query):
+        server = cast(_Server, self.server)
+        action = query.get("Action") or self.headers.get("x-acs-action", "")
+        with server.lock:
+            server.requests += 1
+            server.peers.add(self.client_address)
+            server.actions[action] = server.actions.get(action, 0) + 1
+            request_id = "req-%d" % server.requests
+        if action == "ExecContainerCommand":
+            reply = self._exec(server, query)
+        else:
+            group_id = (json.loads(query.get("ContainerGroupIds") or "[]") or [""])[0]
+            reply = {
+                "TotalCount": 1,
+                "ContainerGroups": [
+                    {
+                        "ContainerGroupId": group_id,
+                        "Status": "Running",
+                        "Containers": [{"Name": "sandbox"}],
+                    }
+                ],
+            }
+        body = json.dumps(dict(reply, RequestId=request_id)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _exec(self, server, query):
+        argv = json.loads(query["Command"])
+        if query.get("Sync", "").lower() == "true":
+            completed = subprocess.run(
+                argv, capture_output=True, stdin=subprocess.DEVNULL, env=server.env
+            )
+            output = completed.stdout + completed.stderr
+            return {"SyncResponse": output.decode("utf-8", errors="replace")}
+        path = "/exec/" + uuid.uuid4().hex
+        with server.lock:
+            server.execs[path] = argv
+        return {"WebSocketUri": server.ws_url + path, "HttpUrl": ""}
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def endpoint(tmp_path):
+    server = _Server()
+    server.env = dict(os.environ, HOME=str(tmp_path))
+
+    def stream(connection: ServerConnection) -> None:
+        assert connection.request is not None
+        with server.lock:
+            argv = server.execs.pop(connection.request.path)
+            server.streams += 1
+        _run_exec(server, connection, argv)
+
+    ws_server = serve(stream, "127.0.0.1", 0)
+    host, port = ws_server.socket.getsockname()[:2]
+    server.ws_url = f"ws://{host}:{port}"
+    for target in (server.serve_forever, ws_server.serve_forever):
+        threading.Thread(target=target, daemon=True).start()
+    yield server
+    for proc in server.procs:
+        if proc.poll() is None:
+            os.killpg(proc.pid, signal.SIGKILL)
+    ws_server.shutdown()
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, **kwargs):
+    host, port = server.server_address
+    client = EciSandbox(
+        access_key_id="id",
+        access_key_secret="secret",
+        cfg=Config(f"{host}:{port}", 10000, "cn-test"),
+        region_id="cn-test",
+        **kwargs,
+    )
+    # The SDK derives the endpoint from the region; point it at the stub.
+    client.client._endpoint = f"{host}:{port}"
+    client.client._protocol = "http"
+    return client
+
+
+def test_one_client_many_threads(endpoint):
+    client = _client(
+        endpoint,
+        pool_limits=PoolLimits(max_connections=MAX_CONNECTIONS),
+        registry_size=16,
+    )
+
+    def work(i):
+        sandbox_id = "eci-%d" % (i % 50)
+        result = client.get(sandbox_id)
+        assert result.success, result.error_message
+        assert result.sandbox is not None
+        assert result.sandbox.sandbox_id == sandbox_id
+        return result.request_id
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        request_ids = list(pool.map(work, range(CALLS)))
+
+    stats = client.pool_stats()
+    assert len(set(request_ids)) == CALLS
+    assert endpoint.requests == CALLS
+    assert stats.requests == CALLS and stats.errors == 0
+    assert stats.in_flight == 0
+    assert stats.pools == 1
+    # Threads beyond the pool size queue for a connection instead of
+    # opening throwaway ones.
+    assert stats.peak_in_flight <= THREADS
+    assert len(endpoint.peers) <= MAX_CONNECTIONS
+    assert client.registry_stats().size <= 16
+
+    client.close()
+    assert client.pool_stats().pools == 0
+
+
+def test_close_leaves_shared_transport_open(endpoint):
+    transport = SyncHttpTransport(PoolLimits(max_connections=MAX_CONNECTIONS))
+    first = _client(endpoint, transport=transport)
+    second = _client(endpoint, transport=transport)
+
+    def work(i):
+        client = first if i % 2 else second
+        return client.get_sandbox_info("eci-%d" % i).success
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        assert all(pool.map(work, range(CALLS // 4)))
+
+    first.close()
+    assert transport.stats().pools == 1
+    assert second.get_sandbox_info("eci-1").success
+    assert len(endpoint.peers) <= MAX_CONNECTIONS
+
+    transport.close()
+    assert transport.stats().pools == 0
+
+
+def test_last_client_closes_shared_transport(endpoint):
+    first = _client(endpoint)
+    second = _client(endpoint)
+    assert first.transport is second.transport
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        assert all(
+            pool.map(
+                lambda i: (
+                    (first if i % 2 else second).get_sandbox_info("eci-%d" % i).success
+                ),
+                range(CALLS // 4),
+            )
+        )
+
+    first.close()
+    first.close()
+    assert second.pool_stats().pools == 1
+    assert second.get_sandbox_info("eci-1").success
+    second.close()
+    assert second.pool_stats().pools == 0
+
+
+def test_exec_and_poll_from_many_threads(endpoint):
+    client = _client(endpoint, pool_limits=PoolLimits(max_connections=16))
+    # Inline and streamed execs, polls and cached scripts, interleaved.
+    # Every fifth streamed exec times out, so the client stops its job
+    # with another exec.
+    kinds = itertools.cycle(["http", "http", "stream", "http", "poll", "script"])
+    calls = [(i, next(kinds)) for i in range(EXEC_CALLS)]
+    for n, i in enumerate(i for i, kind in calls if kind == "stream"):
+        if n % 5 == 0:
+            calls[i] = (i, "timeout")
+
+    def work(call):
+        i, kind = call
+        sandbox_id = "eci-%d" % (i % 8)
+        if kind == "script":
+            result = client.bash(sandbox_id, SCRIPT, timeout=None)
+            assert result.success and result.exit_code == 0, result.error_message
+            assert result.output == "script done\n"
+            return kind
+        if kind == "poll":
+            result = client.tmux_poll(sandbox_id, "missing-%d" % i)
+            assert result.success, result.error_message
+            return kind
+        if kind == "timeout":
+            result = client.exec_command(
+                sandbox_id,
+                ["sleep", "30"],
+                timeout=2,
+                exec_mode=EXEC_MODE_WEBSOCKET,
+            )
+            # A timed-out stream returns what it read and stops the job.
+            assert result.terminated and result.exit_code is None
+            return kind
+        result = client.exec_command(
+            sandbox_id,
+            ["sh", "-c", 'echo "out $0"; echo err >&2; exit $(($0 % 3))', str(i)],
+            timeout=None if kind == "stream" else 5,
+        )
+        assert result.exit_code == i % 3, (kind, result.output, result.error_message)
+        assert "out %d" % i in result.output
+        return kind
+
+    with ThreadPoolExecutor(EXEC_THREADS) as pool:
+        kinds_run = list(pool.map(work, calls))
+
+    assert sorted(kinds_run) == sorted(kind for _, kind in calls)
+    # Each timed-out stream cost one more exec to stop its job.
+    timeouts = kinds_run.count("timeout")
+    assert endpoint.actions["ExecContainerCommand"] >= EXEC_CALLS + timeouts
+    # Everything but the inline calls streamed (scripts once more to upload).
+    assert endpoint.streams >= len(calls) - kinds_run.count("http")
+    assert not endpoint.execs
+    # Timed-out jobs were stopped in the container, not left running.
+    deadline = time.monotonic() + 10
+    while any(proc.poll() is None for proc in endpoint.procs):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    stats = client.pool_stats()
+    assert stats.in_flight == 0 and stats.errors == 0
+    client.close()
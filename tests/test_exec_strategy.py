@@ -0,0 +1,84 @@
+"""Choosing between inline HTTP and streamed execs, and the inline wrapper."""
+
+import subprocess
+
+from eci_as_sandbox._common.exec_strategy import ExecStrategy
+from eci_as_sandbox._common.models import (
+    EXEC_MODE_AUTO,
+    EXEC_MODE_HTTP,
+    EXEC_MODE_WEBSOCKET,
+    SYNC_RESPONSE_MAX_OUTPUT,
+)
+from eci_as_sandbox._common.process import (
+    EXIT_MARKER,
+    TERMINATED_MARKER,
+    split_inline_output,
+    wrap_inline_argv,
+)
+
+
+def test_explicit_mode_wins():
+    strategy = ExecStrategy()
+    assert strategy.choose("ls", None, EXEC_MODE_HTTP) == EXEC_MODE_HTTP
+    assert strategy.choose("ls", 5, EXEC_MODE_WEBSOCKET) == EXEC_MODE_WEBSOCKET
+
+
+def test_unbounded_calls_stream_despite_fast_history():
+    strategy = ExecStrategy()
+    strategy.record("make", 0.1, 10)
+    assert strategy.choose("make", None, EXEC_MODE_AUTO) == EXEC_MODE_WEBSOCKET
+    assert strategy.choose("make", 0, EXEC_MODE_AUTO) == EXEC_MODE_WEBSOCKET
+    assert strategy.choose("make", 30, EXEC_MODE_AUTO) == EXEC_MODE_WEBSOCKET
+    assert strategy.choose("make", 5, EXEC_MODE_AUTO) == EXEC_MODE_HTTP
+
+
+def test_history_moves_bounded_calls_to_stream():
+    strategy = ExecStrategy()
+    assert strategy.choose("new", 5, EXEC_MODE_AUTO) == EXEC_MODE_HTTP
+    strategy.record("slow", 5.0, 10)
+    strategy.record("verbose", 0.1, SYNC_RESPONSE_MAX_OUTPUT + 1)
+    assert strategy.choose("slow", 5, EXEC_MODE_AUTO) == EXEC_MODE_WEBSOCKET
+    assert strategy.choose("verbose", 5, EXEC_MODE_AUTO) == EXEC_MODE_WEBSOCKET
+
+
+def test_history_is_bounded():
+    strategy = ExecStrategy(history_size=2)
+    for key in ("a", "b", "c"):
+        strategy.record(key, 5.0, 10)
+    assert strategy.choose("a", 5, EXEC_MODE_AUTO) == EXEC_MODE_HTTP
+    assert strategy.choose("c", 5, EXEC_MODE_AUTO) == EXEC_MODE_WEBSOCKET
+
+
+def _run_inline(argv, timeout=None, grace=0.2):
+    completed = subprocess.run(
+        wrap_inline_argv(argv, timeout, grace), capture_output=True, text=True
+    )
+    # The response may hold stderr after stdout; the wrapper leaves it empty.
+    return split_inline_output(completed.stdout + completed.stderr)
+
+
+def test_inline_wrapper_reports_exit_code():
+    assert _run_inline(["sh", "-c", "echo out; exit 3"]) == ("out\n", 3, False)
+    assert _run_inline(["printf", "no newline"]) == ("no newline", 0, False)
+    assert _run_inline(["sh", "-c", "echo out; echo err >&2"]) == (
+        "out\nerr\n",
+        0,
+        False,
+    )
+
+
+def test_inline_wrapper_stops_command_at_timeout():
+    output, exit_code, terminated = _run_inline(
+        ["sh", "-c", "echo started; echo err >&2; sleep 30"], timeout=0.3
+    )
+    assert output.startswith("started\nerr\n")
+    assert TERMINATED_MARKER not in output
+    assert exit_code is None and terminated
+
+
+def test_split_inline_output_without_marker():
+    # A response cut off before the status line reports no exit code.
+    assert split_inline_output("partial") == ("partial", None, False)
+    text = f"a\n{EXIT_MARKER} 0\nb"
+    assert split_inline_output(f"{text}\n{EXIT_MARKER} 7\n") == (text, 7, False)
+    assert split_inline_output(f"x\n{EXIT_MARKER} junk\n") == ("x", None, False)
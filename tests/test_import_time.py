@@ -0,0 +1,73 @@
+"""Guard against importing the SDK and network stacks on ``import eci_as_sandbox``."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# Top-level packages that only the clients need.
+HEAVY_PACKAGES = (
+    "alibabacloud_eci20180808",
+    "alibabacloud_tea_openapi",
+    "alibabacloud_tea_util",
+    "Tea",
+    "darabonba",
+    "dotenv",
+    "aiohttp",
+    "requests",
+    "httpx",
+    "websocket",
+    "websockets",
+)
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        part for part in (str(SRC), env.get("PYTHONPATH")) if part
+    )
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def _loaded(code: str) -> set:
+    result = _run(code + "\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))")
+    modules = json.loads(result.stdout.strip().splitlines()[-1])
+    return {name.split(".")[0] for name in modules}
+
+
+def test_package_import_does_not_load_sdk():
+    loaded = _loaded("import eci_as_sandbox")
+    assert not loaded.intersection(HEAVY_PACKAGES)
+
+
+def test_handle_and_model_imports_do_not_load_sdk():
+    loaded = _loaded(
+        "from eci_as_sandbox import CommandResult, Config, Sandbox, AsyncSandbox"
+    )
+    assert not loaded.intersection(HEAVY_PACKAGES)
+
+
+def test_importtime_report_has_no_sdk_modules():
+    result = _run("import eci_as_sandbox", "-X", "importtime")
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        name = line.rsplit("|", 1)[1].strip()
+        imported.add(name.split(".")[0])
+    assert "eci_as_sandbox" in imported
+    assert not imported.intersection(HEAVY_PACKAGES)
+
+
+def test_client_attribute_loads_lazily():
+    loaded = _loaded("import eci_as_sandbox\neci_as_sandbox.EciSandbox")
+    assert "alibabacloud_eci20180808" in loaded
@@ -0,0 +1,64 @@
+"""Slotted result models and the lazy ``SandboxInfo`` payload."""
+
+import pickle
+
+import pytest
+from alibabacloud_eci20180808 import models as eci_models
+
+from eci_as_sandbox import CommandResult, SandboxInfo
+
+GROUP = {
+    "ContainerGroupId": "eci-1",
+    "ContainerGroupName": "sandbox-1",
+    "Status": "Running",
+    "Cpu": 2.0,
+    "Containers": [{"Name": "sandbox", "Image": "image"}],
+}
+
+
+class _CountingGroup(eci_models.DescribeContainerGroupsResponseBodyContainerGroups):
+    to_map_calls = 0
+
+    def to_map(self):
+        type(self).to_map_calls += 1
+        return super().to_map()
+
+
+def test_model_payload_is_serialized_only_when_read():
+    _CountingGroup.to_map_calls = 0
+    info = SandboxInfo.from_group(_CountingGroup().from_map(GROUP))
+    assert (info.sandbox_id, info.status, info.cpu) == ("eci-1", "Running", 2.0)
+    assert info.container_name == "sandbox"
+    assert _CountingGroup.to_map_calls == 0
+    assert info.raw["ContainerGroupName"] == "sandbox-1"
+    assert _CountingGroup.to_map_calls == 1
+    # ``containers`` reuses the dicts ``raw`` built.
+    assert info.containers is info.raw["Containers"]
+    assert _CountingGroup.to_map_calls == 1
+
+
+def test_dict_payload_is_shared():
+    info = SandboxInfo.from_group(GROUP)
+    assert info.raw is GROUP
+    assert info.containers is GROUP["Containers"]
+
+
+def test_containers_then_raw_share_dicts():
+    model = eci_models.DescribeContainerGroupsResponseBodyContainerGroups()
+    info = SandboxInfo.from_group(model.from_map(GROUP))
+    containers = info.containers
+    assert containers[0]["Name"] == "sandbox"
+    assert info.raw["Containers"] is containers
+
+
+def test_models_are_immutable_and_picklable():
+    info = SandboxInfo.from_group(
+        eci_models.DescribeContainerGroupsResponseBodyContainerGroups().from_map(GROUP)
+    )
+    with pytest.raises(AttributeError):
+        info.status = "Stopped"  # type: ignore[misc]
+    copy = pickle.loads(pickle.dumps(info))
+    assert copy.sandbox_id == "eci-1" and copy.containers == info.containers
+    result = pickle.loads(pickle.dumps(CommandResult(request_id="r", output="o")))
+    assert (result.request_id, result.output) == ("r", "o")
+    assert SandboxInfo().raw == {} and SandboxInfo().containers == []
@@ -0,0 +1,82 @@
+"""PTY sessions reading from a scripted WebSocket until the shell exits."""
+
+import asyncio
+import json
+import queue
+
+from eci_as_sandbox._async.pty import AsyncPtySession
+from eci_as_sandbox._common.ws import WS_MSG_EXIT, WS_MSG_STDOUT
+from eci_as_sandbox._sync.pty import PtySession
+
+
+def _frames(*chunks: bytes, exit_code: int = 0):
+    frames = [bytes([WS_MSG_STDOUT]) + chunk for chunk in chunks]
+    frames.append(bytes([WS_MSG_EXIT]) + json.dumps({"exitCode": exit_code}).encode())
+    return frames
+
+
+class _SyncWs:
+    def __init__(self, frames):
+        self._frames: "queue.Queue[bytes]" = queue.Queue()
+        for frame in frames:
+            self._frames.put(frame)
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self):
+        return self._frames.get()
+
+    def send(self, message, opcode=None):
+        pass
+
+    def ping(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _AsyncWs:
+    def __init__(self, frames):
+        self._frames: "asyncio.Queue[bytes]" = asyncio.Queue()
+        for frame in frames:
+            self._frames.put_nowait(frame)
+
+    async def recv(self):
+        return await self._frames.get()
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        pass
+
+
+def test_sync_reads_return_empty_after_exit():
+    session = PtySession(_SyncWs(_frames(b"hello ", b"world", exit_code=3)), "eci", "c")
+    session._reader.join(5)
+    assert session.closed and session.exit_code == 3
+    assert session.read() == b"hello world"
+    # Every read after the end returns at once, not only the first.
+    assert session.read() == b""
+    assert session.read() == b""
+
+
+def test_sync_iteration_ends_with_session():
+    session = PtySession(_SyncWs(_frames(b"a", b"b")), "eci", "c")
+    assert b"".join(session) == b"ab"
+    assert session.read() == b""
+
+
+def test_async_reads_return_empty_after_exit():
+    async def main():
+        session = AsyncPtySession(_AsyncWs(_frames(b"hi", exit_code=1)), "eci", "c")
+        await asyncio.wait_for(session._reader, 5)
+        assert session.closed and session.exit_code == 1
+        assert await session.read() == b"hi"
+        assert await asyncio.wait_for(session.read(), 1) == b""
+        assert await asyncio.wait_for(session.read(), 1) == b""
+        assert [chunk async for chunk in session] == []
+
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""The in-sandbox script cache, run against a local directory."""
+
+import os
+import subprocess
+import time
+
+import pytest
+
+from eci_as_sandbox._common import script_cache
+from eci_as_sandbox._common.script_cache import (
+    SCRIPT_MISSING_MARKER,
+    ScriptIndex,
+    guard_command,
+    script_digest,
+    script_path,
+    upload_command,
+)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "scripts"
+    monkeypatch.setattr(script_cache, "SCRIPT_CACHE_DIR", str(directory))
+    monkeypatch.setattr(script_cache, "SCRIPT_CACHE_LIMIT", 3)
+    return directory
+
+
+def _sh(command: str) -> str:
+    # Uploads arrive on the shell's stdin, as over the exec WebSocket.
+    completed = subprocess.run(
+        ["bash"], input=command, capture_output=True, text=True, check=True
+    )
+    return completed.stdout
+
+
+def _upload(script: str) -> str:
+    path = script_path(script_digest(script))
+    _sh(upload_command(script, path))
+    return path
+
+
+def test_upload_writes_script_verbatim(cache_dir):
+    script = "echo one\nEOF_ECI_SCRIPT\necho 'two'\n"
+    path = _upload(script)
+    with open(path) as handle:
+        assert handle.read() == script + "\n"
+    assert os.listdir(cache_dir) == [os.path.basename(path)]
+
+
+def test_upload_keeps_newest_scripts(cache_dir):
+    old = time.time() - 1000
+    paths = []
+    for i in range(5):
+        paths.append(_upload(f"echo {i}\n"))
+        # Distinct upload times, oldest first.
+        os.utime(paths[-1], (old + i, old + i))
+    assert sorted(os.listdir(cache_dir)) == sorted(
+        os.path.basename(path) for path in paths[-3:]
+    )
+
+
+def test_guard_reports_missing_script(cache_dir):
+    path = _upload("echo cached\n")
+    assert _sh(guard_command(path, f"bash {path}")) == "cached\n"
+    os.remove(path)
+    assert _sh(guard_command(path, f"bash {path}")).strip() == SCRIPT_MISSING_MARKER
+
+
+def test_index_is_bounded_per_sandbox_and_overall():
+    index = ScriptIndex(max_sandboxes=2, max_scripts=2)
+    for digest in ("a", "b", "c"):
+        index.add("eci-1", digest)
+    assert not index.has("eci-1", "a")
+    assert index.has("eci-1", "b") and index.has("eci-1", "c")
+    index.add("eci-2", "a")
+    index.add("eci-3", "a")
+    assert not index.has("eci-1", "c")
+    index.discard("eci-3", "a")
+    assert not index.has("eci-3", "a")
+    index.forget("eci-2")
+    assert not index.has("eci-2", "a")
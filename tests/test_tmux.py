@@ -0,0 +1,138 @@
+"""Reading tmux poll output: framing, cursors and partial-line holdback."""
+
+import base64
+import gzip
+import subprocess
+
+import pytest
+
+from eci_as_sandbox import TmuxCommandStatus
+from eci_as_sandbox._common import tmux
+from eci_as_sandbox._common.compression import CODEC_GZIP, CODEC_HEADER
+from eci_as_sandbox._common.tmux import parse_poll_output, poll_script
+
+HEADER = "__ECI_TMUX_POLL__"
+
+
+def _frame(index, state, offset, size, count, data=b"", start="100", end="-", rc="-"):
+    header = f"{HEADER} {index} {state} {offset} {size} {count} {start} {end} {rc}"
+    return f"{header}\n{base64.b64encode(data).decode()}\n"
+
+
+def test_frames_map_to_sessions_by_index():
+    output = (
+        "profile noise\n"
+        + _frame(1, "done", 0, 6, 6, b"b out\n", end="105", rc="2")
+        + _frame(0, "running", 0, 4, 4, b"a\nb\n")
+        + f"{HEADER} 2 gone 0 0 0 100 - -\n\n"
+    )
+    results = parse_poll_output(output, ["a", "b", "c", "d"], tail_lines=50)
+
+    assert results["a"].status == TmuxCommandStatus.RUNNING
+    assert results["a"].output == "a\nb"
+    assert results["a"].cursor == 4
+    assert results["b"].status == TmuxCommandStatus.COMPLETED
+    assert (results["b"].exit_code, results["b"].finished_at) == (2, 105)
+    assert results["b"].output == "b out"
+    assert results["c"].status == TmuxCommandStatus.NOT_FOUND
+    assert results["c"].started_at == 100
+    # No frame at all: reported as a failed poll, not dropped.
+    assert results["d"].status == TmuxCommandStatus.ERROR
+    assert not results["d"].success
+
+
+def test_malformed_headers_are_ignored():
+    output = (
+        f"{HEADER} x running 0 1 1 - - -\nYQ==\n"
+        f"{HEADER} 7 running 0 1 1 - - -\nYQ==\n"
+        f"{HEADER} 0 running 0 1\nYQ==\n"
+        f"{HEADER} 0 done 0 1 1 - - -\n!!!\n"
+    )
+    results = parse_poll_output(output, ["a"], tail_lines=50)
+    # Only the last header is complete; its undecodable body reads as empty.
+    assert results["a"].status == TmuxCommandStatus.COMPLETED
+    assert results["a"].output == ""
+    assert results["a"].exit_code is None
+
+
+def test_running_job_holds_back_partial_line():
+    output = _frame(0, "running", 10, 21, 11, b"line 1\nline")
+    result = parse_poll_output(output, ["a"], tail_lines=50, cursors={"a": 10})["a"]
+    assert result.output == "line 1\n"
+    assert result.cursor == 21 - len("line")
+    assert not result.output_truncated
+
+
+def test_finished_job_returns_partial_line():
+    output = _frame(0, "done", 10, 21, 11, b"line 1\nlast", rc="0")
+    result = parse_poll_output(output, ["a"], tail_lines=50, cursors={"a": 10})["a"]
+    # Incremental output is returned as is, trailing newline or not.
+    assert result.output == "line 1\nlast"
+    assert result.cursor == 21
+
+
+def test_running_job_without_newline_keeps_cursor():
+    output = _frame(0, "running", 10, 14, 4, b"line")
+    result = parse_poll_output(output, ["a"], tail_lines=50, cursors={"a": 10})["a"]
+    assert result.output == ""
+    assert result.cursor == 10
+
+
+def test_tail_limit_marks_output_truncated():
+    # The script read 20 bytes from the cursor but kept only the last lines.
+    output = _frame(0, "done", 0, 20, 20, b"kept\n", rc="0")
+    result = parse_poll_output(output, ["a"], tail_lines=1, cursors={"a": 0})["a"]
+    assert result.output == "kept\n"
+    assert result.output_truncated
+
+
+def test_codec_line_applies_to_every_frame():
+    first, second = gzip.compress(b"one\n"), gzip.compress(b"two\n")
+    output = (
+        f"{CODEC_HEADER} {CODEC_GZIP}\n"
+        + _frame(0, "done", 0, 4, 4, first, rc="0")
+        + _frame(1, "done", 0, 4, 4, second, rc="0")
+    )
+    results = parse_poll_output(output, ["a", "b"], tail_lines=50)
+    assert (results["a"].output, results["b"].output) == ("one", "two")
+
+
+def _write_job(state_dir, session_id, log, exit_line=None):
+    job = state_dir / session_id
+    job.mkdir(parents=True)
+    (job / "log").write_bytes(log)
+    (job / "start").write_text("100\n")
+    if exit_line is not None:
+        (job / "exit").write_text(exit_line)
+
+
+def _poll(sessions, **kwargs):
+    script = poll_script(sessions, tail_lines=50, **kwargs)
+    completed = subprocess.run(
+        ["bash", "-c", script], capture_output=True, text=True, check=True
+    )
+    return completed.stdout
+
+
+@pytest.mark.parametrize("codecs", [(), (CODEC_GZIP,)])
+def test_poll_script_round_trip(tmp_path, monkeypatch, codecs):
+    monkeypatch.setattr(tmux, "TMUX_STATE_DIR", str(tmp_path))
+    _write_job(tmp_path, "a", b"one\ntwo\nthree\n", "0 105\n")
+    _write_job(tmp_path, "b", b"x\n", "3 106\n")
+
+    output = _poll([("a", 4), ("b", None)], codecs=codecs)
+    results = parse_poll_output(output, ["a", "b"], tail_lines=50, cursors={"a": 4})
+
+    assert results["a"].output == "two\nthree\n"
+    assert results["a"].cursor == 14
+    assert (results["b"].output, results["b"].exit_code) == ("x", 3)
+    assert results["b"].finished_at == 106
+
+
+def test_cursor_past_end_of_log_is_clamped(tmp_path, monkeypatch):
+    monkeypatch.setattr(tmux, "TMUX_STATE_DIR", str(tmp_path))
+    _write_job(tmp_path, "a", b"short\n", "0 105\n")
+
+    output = _poll([("a", 1000)])
+    result = parse_poll_output(output, ["a"], tail_lines=50, cursors={"a": 1000})["a"]
+    assert (result.output, result.cursor) == ("", 6)